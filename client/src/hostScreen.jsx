@@ -9,9 +9,14 @@ function HostScreen() {
   const [currentQuestion, setCurrentQuestion] = useState(null);
   const [questionNumber, setQuestionNumber] = useState(0);
   const [totalQuestions, setTotalQuestions] = useState(0);
+  const [questionClosed, setQuestionClosed] = useState(null);
+  const [currentOptions, setCurrentOptions] = useState([]);
+  const [answerStats, setAnswerStats] = useState(null);
   const [connectionStatus, setConnectionStatus] = useState("disconnected");
   const [gameStatus, setGameStatus] = useState("waiting");
   const wsRef = useRef(null);
+  // Worker that owns this game, once the server has redirected us to it
+  const redirectUrlRef = useRef(null);
 
   // AI Modal states
   const [showAIModal, setShowAIModal] = useState(false);
@@ -25,7 +30,9 @@ function HostScreen() {
 
     const connectWebSocket = () => {
       setConnectionStatus("connecting");
-      const ws = new WebSocket(`ws://localhost:8000/ws/host/${gamePin}`);
+      const ws = new WebSocket(
+        redirectUrlRef.current || `ws://localhost:8000/ws/host/${gamePin}`
+      );
       wsRef.current = ws;
 
       ws.onopen = () => {
@@ -40,6 +47,11 @@ function HostScreen() {
 
         // Handle different message types
         switch (data.type) {
+          case "lobby_snapshot":
+            // Full roster on (re)connect; later join/leave events are deltas
+            setPlayers(data.players.map((player) => player.nickname));
+            break;
+
           case "player_joined":
             console.log("Player joined:", data.nickname);
             setPlayers((prevPlayers) => {
@@ -62,6 +74,22 @@ function HostScreen() {
             setQuestionNumber(data.question_number);
             setTotalQuestions(data.total_questions);
             setGameStatus("in_progress");
+            setQuestionClosed(null);
+            setCurrentOptions(data.options || []);
+            setAnswerStats(null);
+            break;
+
+          case "answer_stats":
+            // Live tally of the current question, a few times per second
+            setAnswerStats(data);
+            break;
+
+          case "question_closed":
+            // The server's timer ran out for this question
+            setQuestionClosed({ answered: data.answered, players: data.players });
+            if (data.stats) {
+              setAnswerStats((prev) => ({ ...prev, ...data.stats }));
+            }
             break;
 
           case "game_over":
@@ -69,6 +97,14 @@ function HostScreen() {
             // Handle game over state
             break;
 
+          case "ping":
+            ws.send(JSON.stringify({ action: "pong" }));
+            break;
+
+          case "redirect":
+            redirectUrlRef.current = data.url;
+            break;
+
           case "connection_status":
             console.log(`Connection status: ${data.status}`);
             setConnectionStatus(data.status);
@@ -89,6 +125,12 @@ function HostScreen() {
         setWebsocket(null);
         setConnectionStatus("disconnected");
 
+        // Redirected to the worker that owns the game: reconnect right away
+        if (event.code === 4302 && redirectUrlRef.current) {
+          connectWebSocket();
+          return;
+        }
+
         // Attempt to reconnect after a delay
         setTimeout(() => {
           if (document.visibilityState === "visible") {
@@ -343,8 +385,41 @@ function HostScreen() {
 
               <div className="question-content">
                 <p className="question-text">{currentQuestion}</p>
+                {questionClosed && (
+                  <p className="question-closed">
+                    Time's up: {questionClosed.answered} of {questionClosed.players}{" "}
+                    answered
+                  </p>
+                )}
               </div>
 
+              {answerStats && (
+                <div className="answer-stats">
+                  <p className="answer-stats-summary">
+                    {answerStats.answered} answered, {answerStats.percent_correct}%
+                    correct
+                  </p>
+                  {currentOptions.map((option, index) => {
+                    const count = answerStats.histogram[index] || 0;
+                    const share = answerStats.answered
+                      ? (count / answerStats.answered) * 100
+                      : 0;
+                    return (
+                      <div key={index} className="answer-stats-row">
+                        <span className="answer-stats-option">{option}</span>
+                        <div className="answer-stats-track">
+                          <div
+                            className="answer-stats-bar"
+                            style={{ width: `${share}%` }}
+                          />
+                        </div>
+                        <span className="answer-stats-count">{count}</span>
+                      </div>
+                    );
+                  })}
+                </div>
+              )}
+
               <div className="question-controls">
                 <button
                   className="primary-button next-button"
@@ -21,13 +21,17 @@ function PlayerScreen() {
   const [prevScore, setPrevScore] = useState(0);
   const [timerFinished, setTimerFinished] = useState(false);
   const [topPlayers, setTopPlayers] = useState([]);
+  const [myRank, setMyRank] = useState(null);
   const [gameOver, setGameOver] = useState(false);
   const [finalResults, setFinalResults] = useState([]);
-  const [questionStartTime, setQuestionStartTime] = useState(null);
   const timerRef = useRef(null);
   const colors = ["#ff5252", "#4caf50", "#2196f3", "#ff9800"];
   const iconNames = ["🔴", "🟢", "🔵", "🟠"];
   const wsRef = useRef(null);
+  // Worker that owns this game, once the server has redirected us to it
+  const redirectUrlRef = useRef(null);
+  // Whether topPlayers holds a full leaderboard that deltas can be applied to
+  const hasLeaderboardRef = useRef(false);
 
   useEffect(() => {
     connectWebSocket();
@@ -40,21 +44,31 @@ function PlayerScreen() {
   }, [gamePin]);
 
   const connectWebSocket = () => {
-    const ws = new WebSocket(`ws://localhost:8000/ws/join/${gamePin}`);
+    const ws = new WebSocket(
+      redirectUrlRef.current || `ws://localhost:8000/ws/join/${gamePin}`
+    );
     wsRef.current = ws;
 
     ws.onopen = () => {
       console.log("Connected to the websocket");
       ws.send(nickname);
+      // Deltas may have been missed while disconnected; wait for a full list
+      hasLeaderboardRef.current = false;
       setWebsocket(ws);
       setConnectionStatus("connected");
     };
 
-    ws.onclose = () => {
+    ws.onclose = (event) => {
       console.log("Disconnected from WebSocket");
       setWebsocket(null);
       setConnectionStatus("disconnected");
 
+      // Redirected to the worker that owns the game: reconnect right away
+      if (event.code === 4302 && redirectUrlRef.current) {
+        connectWebSocket();
+        return;
+      }
+
       // Attempt to reconnect after a delay
       setTimeout(() => {
         if (document.visibilityState === "visible") {
@@ -72,7 +86,11 @@ function PlayerScreen() {
       const data = JSON.parse(event.data);
       console.log("Received message:", data);
 
-      if (data.type === "question") {
+      if (data.type === "ping") {
+        ws.send(JSON.stringify({ action: "pong" }));
+      } else if (data.type === "redirect") {
+        redirectUrlRef.current = data.url;
+      } else if (data.type === "question") {
         setQuestion(data.question);
         setOptions(data.options);
         setFeedback("");
@@ -80,16 +98,23 @@ function PlayerScreen() {
         setWaitingForNext(false);
         setGameStarted(true);
         setTimerFinished(false);
-        setQuestionStartTime(Date.now());
 
-        // Start the countdown timer (assuming 20 seconds per question)
-        if (data.time_limit) {
+        // Start the countdown timer; a resent question carries the seconds left
+        if (data.time_limit !== undefined) {
           startCountdown(data.time_limit);
         } else {
           startCountdown(20); // Default 20 seconds
         }
       } else if (data.type === "answer_reveal") {
-        setFeedback(data.is_correct ? "Correct!" : "Incorrect");
+        // Sent by the server when the question's time is up
+        setTimerFinished(true);
+        setFeedback(
+          data.is_correct
+            ? "Correct!"
+            : data.answered === false
+            ? "Time's Up!"
+            : "Incorrect"
+        );
         setPrevScore(score);
         setScore(data.new_score);
         setWaitingForNext(true);
@@ -98,9 +123,31 @@ function PlayerScreen() {
           setScoreAnimation(true);
           setTimeout(() => setScoreAnimation(false), 1500);
         }
+      } else if (data.type === "answer_rejected") {
+        // Reached the server after the question closed
+        setTimerFinished(true);
+        setFeedback("Too late!");
       } else if (data.type === "leaderboard_update") {
         // Update top players list
+        hasLeaderboardRef.current = true;
         setTopPlayers(data.top_players);
+      } else if (data.type === "leaderboard_delta") {
+        // Only the ranks that changed are sent; patch them into the list.
+        // Without a full list to patch, only a delta listing every rank helps
+        if (!hasLeaderboardRef.current && data.changes.length < data.size) {
+          return;
+        }
+        hasLeaderboardRef.current = true;
+        setTopPlayers((prev) => {
+          const next = prev.slice(0, data.size);
+          data.changes.forEach(({ rank, nickname, score }) => {
+            next[rank - 1] = { nickname, score };
+          });
+          return next;
+        });
+      } else if (data.type === "rank_update") {
+        setMyRank({ rank: data.rank, players: data.players });
+        setScore(data.score);
       } else if (data.type === "game_over") {
         // Handle game over state
         setQuestion(null);
@@ -117,14 +164,11 @@ function PlayerScreen() {
 
   const submitAnswer = (answerIndex) => {
     if (websocket && !feedback && !selectedAnswer && !timerFinished) {
-      // Calculate time taken to answer (in seconds)
-      const timeTaken = (Date.now() - questionStartTime) / 1000;
-
+      // The server times the answer from when it sent the question
       websocket.send(
         JSON.stringify({
           action: "submit_answer",
           answer_index: answerIndex,
-          time_taken: timeTaken,
         })
       );
       setSelectedAnswer(answerIndex);
@@ -144,9 +188,7 @@ function PlayerScreen() {
         clearInterval(timerRef.current);
         setTimerFinished(true);
         console.log("TIMER FINISHED");
-        if (wsRef.current) {
-          wsRef.current.send(JSON.stringify({ action: "time_up" }));
-        }
+        // The server closes the question and sends the answer_reveal
         return 0;
       }
       return prev - 1;
@@ -192,6 +234,11 @@ function PlayerScreen() {
           </div>
         ))}
       </div>
+      {myRank && (
+        <div className="your-rank">
+          You are #{myRank.rank} of {myRank.players}
+        </div>
+      )}
     </div>
   );
 
@@ -1,7 +1,13 @@
 from typing import List
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
 from app.services.game_service import GameService, get_game_service
-from app.models.question import MessageRequest, Question
+from app.services.question_bank import QuestionBank, get_question_bank
+from app.models.question import (
+    BankQuestionsRequest,
+    MessageRequest,
+    Question,
+    QuestionQuery,
+)
 
 router = APIRouter()
 
@@ -20,14 +26,56 @@ async def create_new_game(
     return {"game_pin": game_pin}
 
 
+@router.post("/new-game-from-bank")
+async def create_new_game_from_bank(
+    body: QuestionQuery,
+    game_service: GameService = Depends(get_game_service),
+    question_bank: QuestionBank = Depends(get_question_bank),
+):
+    questions = await question_bank.find(body)
+    if not questions:
+        raise HTTPException(status_code=404, detail="No matching questions in the bank")
+    game_pin = await game_service.create_game(manual=True, questions_data=questions)
+    return {"game_pin": game_pin, "question_count": len(questions)}
+
+
 @router.post("/generate")
 async def generate_questions(
     body: MessageRequest, game_service: GameService = Depends(get_game_service)
 ):
-    questions = game_service.generate_questions(body.message)
+    questions = await game_service.generate_questions(body.message)
     return {"questions": questions}
 
 
+@router.post("/questions")
+async def add_bank_questions(
+    body: BankQuestionsRequest,
+    question_bank: QuestionBank = Depends(get_question_bank),
+):
+    added = await question_bank.add_questions(
+        body.questions, topic=body.topic, difficulty=body.difficulty
+    )
+    return {"added": added, "duplicates": len(body.questions) - added}
+
+
+@router.post("/questions/search")
+async def search_bank_questions(
+    body: QuestionQuery, question_bank: QuestionBank = Depends(get_question_bank)
+):
+    questions = await question_bank.find(body)
+    return {"questions": questions}
+
+
+@router.get("/games/{game_pin}/question-stats")
+async def get_question_stats(
+    game_pin: str, game_service: GameService = Depends(get_game_service)
+):
+    stats = await game_service.get_question_stats(game_pin)
+    if stats is None:
+        raise HTTPException(status_code=404, detail="Game not found")
+    return {"question_stats": stats}
+
+
 @router.get("/list-games")
 async def get_all_active_games(game_service: GameService = Depends(get_game_service)):
     games = game_service._get_all_active_games()
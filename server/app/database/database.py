@@ -18,6 +18,41 @@ async def connect_db():
     client = AsyncIOMotorClient(MONGO_DETAILS)
     await client.server_info()
     logger.info("Database Connected")
+    await ensure_indexes()
+
+
+async def ensure_indexes():
+    """Create the indexes every game lookup relies on (no-op if they exist)"""
+    games = client.quizblitz.games
+    try:
+        await games.create_index("game_pin", unique=True, name="game_pin_unique")
+        await games.create_index("game_status", name="game_status")
+        await games.create_index("created_at", name="created_at")
+        logger.info("Game collection indexes ensured")
+    except Exception as e:
+        # e.g. duplicate pins left from before the unique index existed
+        logger.error(f"Error creating game collection indexes: {e}")
+
+    questions = client.quizblitz.questions
+    try:
+        await questions.create_index("fingerprint", unique=True, name="fingerprint_unique")
+        await questions.create_index(
+            [("topic", 1), ("difficulty", 1)], name="topic_difficulty"
+        )
+        await questions.create_index("difficulty", name="difficulty")
+        await questions.create_index(
+            [("question", "text"), ("topic", "text")], name="question_text"
+        )
+        logger.info("Question bank indexes ensured")
+    except Exception as e:
+        logger.error(f"Error creating question bank indexes: {e}")
+
+    snapshots = client.quizblitz.snapshots
+    try:
+        await snapshots.create_index("game_pin", unique=True, name="game_pin_unique")
+        logger.info("Game snapshot indexes ensured")
+    except Exception as e:
+        logger.error(f"Error creating game snapshot indexes: {e}")
 
 
 async def close_db():
@@ -27,6 +62,27 @@ async def close_db():
         logger.info("Database Disconnected")
 
 
+def get_question_collection():
+    if client is None:
+        logger.error("Database client is not initialized! Call connect_db() first.")
+        raise RuntimeError("Database connection not initialized")
+    return client.quizblitz.questions
+
+
+def get_snapshot_collection():
+    if client is None:
+        logger.error("Database client is not initialized! Call connect_db() first.")
+        raise RuntimeError("Database connection not initialized")
+    return client.quizblitz.snapshots
+
+
+def get_archive_collection():
+    if client is None:
+        logger.error("Database client is not initialized! Call connect_db() first.")
+        raise RuntimeError("Database connection not initialized")
+    return client.quizblitz.games_archive
+
+
 def get_game_collection():
     if client is None:
         logger.error("Database client is not initialized! Call connect_db() first.")
@@ -1,7 +1,19 @@
 from fastapi import Depends, FastAPI, WebSocket, HTTPException, status
+from fastapi.responses import PlainTextResponse
+from app import metrics
 from app.api import host
-from app.services.game_service import GameService, QuizService
-from app.database.database import connect_db, close_db, get_game_collection
+from app.services.game_service import GameService, get_game_service
+from app.database.database import connect_db, close_db
+from app.services.answer_stats_publisher import get_answer_stats_publisher
+from app.services.game_lifecycle import get_game_lifecycle
+from app.services.game_router import WORKER_AFFINITY, get_game_router
+from app.services.leaderboard_publisher import get_leaderboard_publisher
+from app.services.prompt_service import get_question_generator
+from app.services.question_timer import get_question_timer
+from app.services.snapshots import get_snapshot_manager
+from app.services.write_behind import get_write_behind
+from app.websocket.connection_manager import get_connection_manager
+from app.websocket.pubsub import CROSS_NODE_BROADCAST
 from dotenv import load_dotenv
 import logging
 from fastapi.middleware.cors import CORSMiddleware
@@ -29,54 +41,87 @@ async def read_root():
     return {"message": "Welcome to the Kahoot Server!"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus text exposition of this process's metrics"""
+    games, hosts, players = get_connection_manager().connection_counts()
+    metrics.ACTIVE_GAMES.set(games)
+    metrics.CONNECTED_HOSTS.set(hosts)
+    metrics.CONNECTED_PLAYERS.set(players)
+    return PlainTextResponse(
+        metrics.registry.render(), media_type="text/plain; version=0.0.4"
+    )
+
+
 @app.on_event("startup")
 async def startup_event():
     await connect_db()
+    if WORKER_AFFINITY:
+        await get_game_router().start()
+    if CROSS_NODE_BROADCAST and not get_game_router().enabled:
+        # Game state lives in the memory of the worker that runs the game and
+        # per-player frames are never relayed; only the owner routing keeps a
+        # game's sockets on that worker
+        raise RuntimeError(
+            "CROSS_NODE_BROADCAST requires WORKER_AFFINITY with a WORKER_URL: "
+            "players and hosts of one game must reach the same worker"
+        )
+    # Bring back the games this worker was running before a restart
+    await get_game_service().restore_games()
+    get_snapshot_manager().start()
+    await get_game_lifecycle().start()
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    await get_game_lifecycle().close()
+    await get_game_router().stop()
+    await get_question_generator().close()
+    await get_leaderboard_publisher().close()
+    await get_answer_stats_publisher().close()
+    await get_question_timer().close()
+    await get_snapshot_manager().close()
+    await get_write_behind().close()
+    get_connection_manager().heartbeat.stop()
+    events = get_connection_manager().events
+    if events is not None:
+        await events.close()
     await close_db()
 
 
-quiz_service = QuizService()
-
-
 from app.websocket import host_ws, player_ws
 
 
-async def get_game_service(game_collection=Depends(get_game_collection)):
-    return GameService(quiz_service=quiz_service, game_collection=game_collection)
-
-
 app.include_router(host.router, prefix="/api/host", tags=["host"])
 
 
 @app.websocket("/ws/join/{game_pin}")
 async def websocket_endpoint(websocket: WebSocket, game_pin: str):
+    if await get_game_router().redirect_if_remote(websocket, game_pin):
+        return
     await player_ws.player_websocket(websocket, game_pin)
 
 
 @app.websocket("/ws/host/{game_pin}")
 async def host_websocket_endpoint(websocket: WebSocket, game_pin: str):
-    await host_ws.host_websocket(
-        websocket, game_pin, GameService(quiz_service=quiz_service)
-    )
+    if await get_game_router().redirect_if_remote(websocket, game_pin):
+        return
+    await host_ws.host_websocket(websocket, game_pin, get_game_service())
 
 
 @app.get("/game/{game_pin}/status")
 async def get_game_status(
     game_pin: str, game_service: GameService = Depends(get_game_service)
 ):
-    game_data = await game_service.get_game_data_from_db(game_pin)
-    if not game_data:
+    game_status = await game_service.get_game_status(game_pin)
+    if not game_status:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Game with pin {game_pin} not found",
         )
     return {
         "game_pin": game_pin,
-        "status": game_data.get("game_status", "unknown"),
-        "player_count": len(game_data.get("players", [])),
-        "current_question_index": game_data.get("current_question_index", 0),
+        "status": game_status.get("game_status", "unknown"),
+        "player_count": game_status.get("player_count", 0),
+        "current_question_index": game_status.get("current_question_index", 0),
     }
@@ -0,0 +1,245 @@
+"""
+Minimal in-process metrics exposed in the Prometheus text format at /metrics.
+
+Every update is a dict lookup and an integer or float add on the event loop
+thread, so the instrumentation can stay on in production. Values live in
+this process only; each worker is scraped separately.
+"""
+
+import time
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing value, e.g. answers received"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels: str) -> float:
+        return self.values.get(self._key(labels), 0)
+
+    def samples(self) -> Iterable[str]:
+        if not self.values and not self.labelnames:
+            yield f"{self.name} 0"
+        for key, value in self.values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Gauge(_Metric):
+    """Value that goes up and down, e.g. connected players"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels: str):
+        self.values[self._key(labels)] = value
+
+    def get(self, **labels: str) -> float:
+        return self.values.get(self._key(labels), 0)
+
+    def samples(self) -> Iterable[str]:
+        if not self.values and not self.labelnames:
+            yield f"{self.name} 0"
+        for key, value in self.values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram: "Histogram", labels: Dict[str, str]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in fixed buckets, e.g. call latency"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: non-cumulative bucket counts (last slot is +Inf), sum
+        self.counts: Dict[Tuple[str, ...], List[int]] = {}
+        self.sums: Dict[Tuple[str, ...], float] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        counts = self.counts.get(key)
+        if counts is None:
+            counts = self.counts[key] = [0] * (len(self.buckets) + 1)
+            self.sums[key] = 0.0
+        counts[bisect_left(self.buckets, value)] += 1
+        self.sums[key] += value
+
+    def time(self, **labels: str) -> _Timer:
+        """Context manager observing the wall time of its block"""
+        return _Timer(self, labels)
+
+    def samples(self) -> Iterable[str]:
+        for key, counts in self.counts.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield (
+                    f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} "
+                    f"{cumulative}"
+                )
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(self.sums[key])}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self.metrics.values()) + "\n"
+
+
+registry = MetricsRegistry()
+
+ACTIVE_GAMES = registry.register(
+    Gauge("quizblitz_active_games", "Games with a host or player connected to this process")
+)
+CONNECTED_HOSTS = registry.register(
+    Gauge("quizblitz_connected_hosts", "Host WebSockets connected to this process")
+)
+CONNECTED_PLAYERS = registry.register(
+    Gauge("quizblitz_connected_players", "Player WebSockets connected to this process")
+)
+BROADCAST_DURATION = registry.register(
+    Histogram(
+        "quizblitz_broadcast_duration_seconds",
+        "Time to fan one frame out to every player of a game",
+    )
+)
+BROADCAST_FRAMES = registry.register(
+    Counter("quizblitz_broadcast_frames_total", "Frames sent to players by broadcasts")
+)
+BROADCAST_FAILURES = registry.register(
+    Counter(
+        "quizblitz_broadcast_failures_total",
+        "Broadcast sends that failed or timed out",
+    )
+)
+ANSWERS = registry.register(
+    Counter("quizblitz_answers_total", "Answers accepted from players")
+)
+MONGO_LATENCY = registry.register(
+    Histogram(
+        "quizblitz_mongo_seconds",
+        "MongoDB call latency by operation",
+        labelnames=("operation",),
+    )
+)
+REDIS_LATENCY = registry.register(
+    Histogram(
+        "quizblitz_redis_seconds",
+        "Redis call latency by operation",
+        labelnames=("operation",),
+    )
+)
+HEARTBEAT_FAILURES = registry.register(
+    Counter(
+        "quizblitz_heartbeat_failures_total",
+        "Connections closed because a ping failed or went unanswered",
+    )
+)
+WS_FRAMES = registry.register(
+    Counter(
+        "quizblitz_ws_frames_received_total",
+        "Inbound WebSocket frames by connection role",
+        labelnames=("role",),
+    )
+)
+WS_DROPPED = registry.register(
+    Counter(
+        "quizblitz_ws_frames_dropped_total",
+        "Inbound WebSocket frames dropped before dispatch, by role and reason",
+        labelnames=("role", "reason"),
+    )
+)
@@ -1,13 +1,8 @@
-from pydantic import BaseModel, ConfigDict
-from typing import Optional
-from fastapi import WebSocket
-
-# from starlette.websockets import WebSocket
+from pydantic import BaseModel
 
 
 class Player(BaseModel):
-    websocket: Optional[WebSocket]
+    """A player as stored in the game document"""
+
     nickname: str
     score: int = 0
-
-    model_config = ConfigDict(arbitrary_types_allowed=True)
@@ -1,5 +1,7 @@
-from pydantic import BaseModel
-from typing import List
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+
+Difficulty = Literal["easy", "medium", "hard"]
 
 
 class Question(BaseModel):
@@ -12,3 +14,17 @@ class Question(BaseModel):
 
 class MessageRequest(BaseModel):
     message: str
+
+
+class BankQuestionsRequest(BaseModel):
+    topic: str
+    difficulty: Difficulty = "medium"
+    questions: List[Question]
+
+
+class QuestionQuery(BaseModel):
+    topic: Optional[str] = None
+    difficulty: Optional[Difficulty] = None
+    text: Optional[str] = None  # Full-text search over question text and topic
+    limit: int = Field(10, ge=1, le=100)
+    random: bool = False  # Sample matching questions instead of ranking them
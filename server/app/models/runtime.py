@@ -0,0 +1,186 @@
+"""
+In-memory state of live games. These are plain `__slots__` classes rather
+than pydantic models: they are touched on every join, answer and broadcast,
+hold WebSocket objects, and never cross the API or DB boundary themselves.
+Documents are validated with the pydantic models when loaded or written.
+"""
+
+import time
+from typing import Dict, Iterable, List, Optional
+
+from fastapi import WebSocket
+
+from app.models.player import Player
+from app.models.question import Question
+from app.services.answer_stats import QuestionStats
+from app.services.leaderboard import Leaderboard
+from app.websocket.codec import Frame
+
+
+class PlayerState:
+    __slots__ = ("nickname", "score", "websocket")
+
+    def __init__(self, nickname: str, score: int = 0, websocket: Optional[WebSocket] = None):
+        self.nickname = nickname
+        self.score = score
+        self.websocket = websocket
+
+    @classmethod
+    def from_document(
+        cls, document: dict, websocket: Optional[WebSocket] = None
+    ) -> "PlayerState":
+        player = Player.model_validate(document)
+        return cls(player.nickname, player.score, websocket)
+
+    def to_document(self) -> dict:
+        return Player(nickname=self.nickname, score=self.score).model_dump()
+
+
+class QuestionFrames:
+    """A question's player and host frames, encoded once per wire format and sent as-is"""
+
+    __slots__ = ("player", "host")
+
+    def __init__(self, question: Question, number: int, total: int):
+        time_limit = question.time_limit or 20  # Default to 20 seconds if not specified
+        self.player = Frame(
+            {
+                "type": "question",
+                "question": question.question,
+                "options": question.options,
+                "time_limit": time_limit,
+            }
+        )
+        self.host = Frame(
+            {
+                "type": "current_question_host",
+                "question": question.question,
+                "options": question.options,
+                "question_number": number,
+                "total_questions": total,
+                "time_limit": time_limit,
+                "correct_answer": question.correct_answer,
+            }
+        )
+
+
+class GameState:
+    """
+    Live state of one game. Players are kept in join order and indexed by
+    nickname and by socket, so the answer path finds its player in O(1).
+    """
+
+    __slots__ = (
+        "host",
+        "players",
+        "questions",
+        "current_question_index",
+        "game_status",
+        "player_answers",
+        "current_question_start_time",
+        "leaderboard",
+        "question_stats",
+        "question_frames",
+        "last_activity",
+        "_by_nickname",
+        "_by_socket",
+    )
+
+    def __init__(
+        self,
+        questions: List[Question],
+        players: Iterable[PlayerState] = (),
+        host: Optional[WebSocket] = None,
+        current_question_index: int = 0,
+        game_status: str = "waiting",
+        player_answers: Optional[dict] = None,
+        current_question_start_time: Optional[float] = None,
+    ):
+        self.host = host
+        self.questions = questions
+        # Questions never change once a game is created
+        self.question_frames = [
+            QuestionFrames(question, number, len(questions))
+            for number, question in enumerate(questions, start=1)
+        ]
+        self.current_question_index = current_question_index
+        self.game_status = game_status
+        self.player_answers = player_answers if player_answers is not None else {}
+        self.current_question_start_time = current_question_start_time
+        self.players: List[PlayerState] = []
+        self._by_nickname: Dict[str, PlayerState] = {}
+        # Keyed by id() so lookups never fall back to Starlette's mapping equality
+        self._by_socket: Dict[int, PlayerState] = {}
+        for player in players:
+            self._index(player)
+        self.leaderboard = Leaderboard.from_scores(
+            (player.nickname, player.score) for player in self.players
+        )
+        self.question_stats: Optional[QuestionStats] = None
+        self.reset_question_stats()
+        self.last_activity = time.time()
+
+    def touch(self):
+        """Note that something happened in the game; idle games are evicted"""
+        self.last_activity = time.time()
+
+    def reset_question_stats(self):
+        """Count the current question's stats afresh from the answers recorded so far"""
+        if not 0 <= self.current_question_index < len(self.questions):
+            self.question_stats = None
+            return
+        question = self.questions[self.current_question_index]
+        self.question_stats = QuestionStats(
+            self.current_question_index,
+            len(question.options),
+            question.correct_answer,
+            question.time_limit or 20,
+        )
+        answers = self.player_answers.get(str(self.current_question_index), {})
+        for answer_index in answers.values():
+            self.question_stats.add(answer_index)
+
+    def question_ends_at(self) -> Optional[float]:
+        """When the current question's time limit runs out, if it has been sent"""
+        if self.current_question_start_time is None:
+            return None
+        if not 0 <= self.current_question_index < len(self.questions):
+            return None
+        time_limit = self.questions[self.current_question_index].time_limit or 20
+        return self.current_question_start_time + time_limit
+
+    def current_question_frames(self) -> Optional[QuestionFrames]:
+        if 0 <= self.current_question_index < len(self.question_frames):
+            return self.question_frames[self.current_question_index]
+        return None
+
+    def _index(self, player: PlayerState):
+        self.players.append(player)
+        self._by_nickname[player.nickname] = player
+        if player.websocket is not None:
+            self._by_socket[id(player.websocket)] = player
+
+    def add_player(self, player: PlayerState):
+        self._index(player)
+        self.leaderboard.add_player(player.nickname, player.score)
+
+    def get_player(self, nickname: str) -> Optional[PlayerState]:
+        return self._by_nickname.get(nickname)
+
+    def player_for(self, websocket: WebSocket) -> Optional[PlayerState]:
+        player = self._by_socket.get(id(websocket))
+        if player is not None and player.websocket is websocket:
+            return player
+        return None
+
+    def attach(self, player: PlayerState, websocket: WebSocket):
+        """Bind a (re)connected socket to a player"""
+        self.detach(player)
+        player.websocket = websocket
+        self._by_socket[id(websocket)] = player
+
+    def detach(self, player: PlayerState):
+        """Forget a player's socket; the player keeps its score and place"""
+        if player.websocket is not None:
+            self._by_socket.pop(id(player.websocket), None)
+            player.websocket = None
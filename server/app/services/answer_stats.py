@@ -0,0 +1,67 @@
+from typing import List, Optional
+
+# Response times are counted in this many equal slices of the time limit
+RESPONSE_TIME_BUCKETS = 10
+
+
+class QuestionStats:
+    """
+    Running answer statistics for one question: how many players picked
+    each option, how many were right, and how fast they answered. Every
+    answer updates a few counters, so a summary costs the same whether
+    ten or ten thousand players have answered.
+    """
+
+    __slots__ = (
+        "question_index",
+        "correct_answer",
+        "time_limit",
+        "histogram",
+        "answered",
+        "correct",
+        "response_times",
+        "timed",
+        "total_time",
+    )
+
+    def __init__(
+        self, question_index: int, options: int, correct_answer: int, time_limit: float
+    ):
+        self.question_index = question_index
+        self.correct_answer = correct_answer
+        self.time_limit = time_limit
+        self.histogram: List[int] = [0] * options
+        self.answered = 0
+        self.correct = 0
+        self.response_times: List[int] = [0] * RESPONSE_TIME_BUCKETS
+        # Answers whose time is known; answers reloaded from the DB have none
+        self.timed = 0
+        self.total_time = 0.0
+
+    def add(self, answer_index: int, time_taken: Optional[float] = None):
+        self.answered += 1
+        if isinstance(answer_index, int) and 0 <= answer_index < len(self.histogram):
+            self.histogram[answer_index] += 1
+        if answer_index == self.correct_answer:
+            self.correct += 1
+        if time_taken is not None:
+            bucket = int(time_taken / self.time_limit * RESPONSE_TIME_BUCKETS)
+            self.response_times[min(max(bucket, 0), RESPONSE_TIME_BUCKETS - 1)] += 1
+            self.timed += 1
+            self.total_time += time_taken
+
+    def summary(self) -> dict:
+        return {
+            "question_index": self.question_index,
+            "answered": self.answered,
+            "histogram": list(self.histogram),
+            "correct": self.correct,
+            "percent_correct": (
+                round(100 * self.correct / self.answered, 1) if self.answered else 0.0
+            ),
+            "response_times": {
+                "bucket_seconds": self.time_limit / RESPONSE_TIME_BUCKETS,
+                "counts": list(self.response_times),
+                "average": round(self.total_time / self.timed, 3) if self.timed else None,
+            },
+        }
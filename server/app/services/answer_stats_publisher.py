@@ -0,0 +1,88 @@
+import asyncio
+import os
+from typing import Optional, Set
+import logging
+
+from app.services.game_registry import GameRegistry, get_game_registry
+from app.websocket.connection_manager import (
+    RedisConnectionManager,
+    get_connection_manager,
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ANSWER_STATS_TICK_MS = int(os.getenv("ANSWER_STATS_TICK_MS", "500"))
+
+
+class AnswerStatsPublisher:
+    """
+    Streams the current question's answer statistics to the host. Answers
+    only mark their game dirty; once per tick every dirty game's host gets
+    a single `answer_stats` frame, however many answers came in meanwhile.
+    """
+
+    def __init__(
+        self,
+        connection_manager: RedisConnectionManager = None,
+        registry: Optional[GameRegistry] = None,
+        tick_ms: int = ANSWER_STATS_TICK_MS,
+    ):
+        self.connection_manager = connection_manager or get_connection_manager()
+        self.registry = registry or get_game_registry()
+        self.tick = tick_ms / 1000
+        self.dirty: Set[str] = set()
+        self.tick_task: Optional[asyncio.Task] = None
+
+    def mark(self, game_pin: str):
+        """Note that a game got an answer; its host hears about it on the next tick"""
+        self.dirty.add(game_pin)
+        if self.tick_task is None or self.tick_task.done():
+            self.tick_task = asyncio.create_task(self._tick_loop())
+
+    async def _tick_loop(self):
+        try:
+            while self.dirty:
+                await asyncio.sleep(self.tick)
+                pins, self.dirty = self.dirty, set()
+                await asyncio.gather(*(self.publish(game_pin) for game_pin in pins))
+        except asyncio.CancelledError:
+            pass
+
+    async def publish(self, game_pin: str):
+        """Send a game's host the current question's statistics"""
+        game_state = self.registry.get(game_pin)
+        if game_state is None or game_state.question_stats is None:
+            return
+        try:
+            await self.connection_manager.broadcast_to_host(
+                game_pin,
+                {
+                    "type": "answer_stats",
+                    "players": len(game_state.players),
+                    **game_state.question_stats.summary(),
+                },
+            )
+        except Exception as e:
+            logger.error(f"Error publishing answer stats for game {game_pin}: {e}")
+
+    def discard(self, game_pin: str):
+        """Forget a game that ended"""
+        self.dirty.discard(game_pin)
+
+    async def close(self):
+        if self.tick_task is not None:
+            self.tick_task.cancel()
+            self.tick_task = None
+
+
+# Singleton instance
+_answer_stats_publisher = None
+
+
+def get_answer_stats_publisher() -> AnswerStatsPublisher:
+    """Get the global answer stats publisher instance"""
+    global _answer_stats_publisher
+    if _answer_stats_publisher is None:
+        _answer_stats_publisher = AnswerStatsPublisher()
+    return _answer_stats_publisher
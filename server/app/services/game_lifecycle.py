@@ -0,0 +1,252 @@
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Iterable, Optional
+import logging
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ReplaceOne
+
+from app.database.database import (
+    get_archive_collection,
+    get_game_collection,
+    get_snapshot_collection,
+)
+from app.metrics import MONGO_LATENCY
+from app.services.game_registry import GameRegistry, get_game_registry
+from app.services.game_service import GameService, get_game_service
+from app.services.pin_allocator import (
+    PIN_RESERVATION_TTL,
+    PIN_REUSE_DELAY,
+    PinAllocator,
+    get_pin_allocator,
+)
+from app.services.snapshots import ENDED_STATUSES, SNAPSHOT_MAX_AGE
+from app.websocket.connection_manager import GAME_IDLE_TIMEOUT
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+GAME_SWEEP_INTERVAL = float(os.getenv("GAME_SWEEP_INTERVAL", "300"))
+# Ended games stay in the games collection this long for result and stats
+# lookups; must be shorter than PIN_REUSE_DELAY, after which the PIN is reused
+FINISHED_GAME_RETENTION = int(os.getenv("FINISHED_GAME_RETENTION", str(6 * 3600)))
+# Games never ended that saw no activity for this long are archived as abandoned
+ABANDONED_GAME_TTL = int(os.getenv("ABANDONED_GAME_TTL", str(24 * 3600)))
+# Archived games are deleted this long after archiving; 0 keeps them forever
+ARCHIVE_RETENTION = int(os.getenv("ARCHIVE_RETENTION", "0"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+
+
+async def ensure_expiry_index(
+    collection: AsyncIOMotorCollection, field: str, seconds: Optional[int]
+):
+    """
+    Index `field`, expiring documents `seconds` after it if given. An
+    existing index on the field with a different expiry is rebuilt.
+    """
+    existing = (await collection.index_information()).get(field)
+    if existing is not None and existing.get("expireAfterSeconds") != seconds:
+        await collection.drop_index(field)
+    options = {"expireAfterSeconds": seconds} if seconds else {}
+    await collection.create_index(field, name=field, **options)
+
+
+def _older_than(field: str, cutoff: datetime) -> dict:
+    # Documents written before `field` existed fall back to created_at
+    return {
+        "$or": [
+            {field: {"$lt": cutoff}},
+            {field: {"$exists": False}, "created_at": {"$lt": cutoff}},
+        ]
+    }
+
+
+def expired_games_query(now: datetime, live_pins: Iterable[str] = ()) -> dict:
+    """Games due for the archive: ended a while ago, or idle for too long"""
+    return {
+        "game_pin": {"$nin": list(live_pins)},
+        "$or": [
+            {
+                "game_status": {"$in": ENDED_STATUSES},
+                **_older_than(
+                    "finished_at", now - timedelta(seconds=FINISHED_GAME_RETENTION)
+                ),
+            },
+            {
+                "game_status": {"$nin": ENDED_STATUSES},
+                **_older_than(
+                    "last_activity_at", now - timedelta(seconds=ABANDONED_GAME_TTL)
+                ),
+            },
+        ],
+    }
+
+
+class GameLifecycle:
+    """
+    Keeps memory and the games collection bounded by live games rather than
+    by history. Every `interval` seconds, games in this worker's registry
+    with no activity for GAME_IDLE_TIMEOUT are ended as abandoned. Then
+    games ended more than FINISHED_GAME_RETENTION ago, and games never ended
+    but idle for ABANDONED_GAME_TTL, are moved in batches from `games` to
+    `games_archive`. Snapshots, and archived games if ARCHIVE_RETENTION is
+    set, expire through TTL indexes.
+    """
+
+    def __init__(
+        self,
+        game_service: Optional[GameService] = None,
+        registry: Optional[GameRegistry] = None,
+        pin_allocator: Optional[PinAllocator] = None,
+        collection_getter: Callable[[], AsyncIOMotorCollection] = get_game_collection,
+        archive_getter: Callable[[], AsyncIOMotorCollection] = get_archive_collection,
+        interval: float = GAME_SWEEP_INTERVAL,
+    ):
+        self.game_service = game_service or get_game_service()
+        self.registry = registry or get_game_registry()
+        self.pin_allocator = pin_allocator or get_pin_allocator()
+        self.collection_getter = collection_getter
+        self.archive_getter = archive_getter
+        self.interval = interval
+        self.sweep_task: Optional[asyncio.Task] = None
+
+    def check_settings(self):
+        """Warn about retention settings that work against each other"""
+        if FINISHED_GAME_RETENTION + self.interval >= PIN_REUSE_DELAY:
+            logger.warning(
+                "FINISHED_GAME_RETENTION is not shorter than PIN_REUSE_DELAY by a sweep "
+                "interval; reused PINs may collide with ended games not yet archived"
+            )
+        if ABANDONED_GAME_TTL + self.interval >= PIN_RESERVATION_TTL:
+            logger.warning(
+                "ABANDONED_GAME_TTL is not shorter than PIN_RESERVATION_TTL by a sweep "
+                "interval; PIN reservations may lapse while an abandoned game holds its PIN"
+            )
+        if ABANDONED_GAME_TTL <= GAME_IDLE_TIMEOUT:
+            logger.warning(
+                "ABANDONED_GAME_TTL is not longer than GAME_IDLE_TIMEOUT; games may be "
+                "archived while a worker still holds them in memory"
+            )
+
+    async def ensure_indexes(self):
+        """Create the indexes the sweep and the TTL expiry rely on"""
+        games = self.collection_getter()
+        archive = self.archive_getter()
+        try:
+            await games.create_index(
+                [("game_status", 1), ("finished_at", 1)], name="status_finished_at"
+            )
+            await games.create_index(
+                [("game_status", 1), ("last_activity_at", 1)], name="status_last_activity"
+            )
+            await ensure_expiry_index(get_snapshot_collection(), "taken_at", SNAPSHOT_MAX_AGE)
+            await archive.create_index("game_pin", name="game_pin")
+            await ensure_expiry_index(archive, "archived_at", ARCHIVE_RETENTION or None)
+            logger.info("Game lifecycle indexes ensured")
+        except Exception as e:
+            logger.error(f"Error creating game lifecycle indexes: {e}")
+
+    async def start(self):
+        if self.sweep_task is None:
+            self.check_settings()
+            await self.ensure_indexes()
+            self.sweep_task = asyncio.create_task(self._sweep_loop())
+
+    async def _sweep_loop(self):
+        try:
+            while True:
+                await asyncio.sleep(self.interval)
+                await self.sweep()
+        except asyncio.CancelledError:
+            pass
+
+    async def sweep(self):
+        try:
+            await self.evict_idle_games()
+        except Exception as e:
+            logger.error(f"Error evicting idle games: {e}")
+        try:
+            await self.archive_games()
+        except Exception as e:
+            logger.error(f"Error archiving games: {e}")
+
+    async def evict_idle_games(self) -> int:
+        """End the games in memory that saw no activity for GAME_IDLE_TIMEOUT"""
+        cutoff = time.time() - GAME_IDLE_TIMEOUT
+        idle = []
+        for game_pin in self.registry.pins():
+            game_state = self.registry.get(game_pin)
+            if game_state is not None and game_state.last_activity < cutoff:
+                idle.append(game_pin)
+        if not idle:
+            return 0
+        results = await asyncio.gather(
+            *(self.game_service.end_game(game_pin, status="abandoned") for game_pin in idle),
+            return_exceptions=True,
+        )
+        for game_pin, result in zip(idle, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error ending idle game {game_pin}: {result}")
+        logger.info(f"Ended {len(idle)} idle game(s)")
+        return len(idle)
+
+    async def archive_games(self) -> int:
+        """Move expired games to the archive; returns how many were moved"""
+        now = datetime.now(timezone.utc)
+        query = expired_games_query(now, self.registry.pins())
+        games = self.collection_getter()
+        archive = self.archive_getter()
+        archived = 0
+        while True:
+            with MONGO_LATENCY.time(operation="find_expired_games"):
+                batch = await games.find(query).limit(ARCHIVE_BATCH_SIZE).to_list(
+                    length=ARCHIVE_BATCH_SIZE
+                )
+            if not batch:
+                break
+
+            abandoned = []
+            for game in batch:
+                game["archived_at"] = now
+                if game.get("game_status") not in ENDED_STATUSES:
+                    game["game_status"] = "abandoned"
+                    abandoned.append(game["game_pin"])
+            with MONGO_LATENCY.time(operation="archive_games"):
+                # Upserts by _id, so a batch retried after a crash is not duplicated
+                await archive.bulk_write(
+                    [ReplaceOne({"_id": game["_id"]}, game, upsert=True) for game in batch],
+                    ordered=False,
+                )
+                # A game touched since it was read still fails the query and stays
+                await games.delete_many(
+                    {"_id": {"$in": [game["_id"] for game in batch]}, **query}
+                )
+            # Abandoned games never released their PINs
+            await asyncio.gather(*(self.pin_allocator.release(pin) for pin in abandoned))
+
+            archived += len(batch)
+            if len(batch) < ARCHIVE_BATCH_SIZE:
+                break
+
+        if archived:
+            logger.info(f"Archived {archived} game(s)")
+        return archived
+
+    async def close(self):
+        if self.sweep_task is not None:
+            self.sweep_task.cancel()
+            self.sweep_task = None
+
+
+# Singleton instance
+_game_lifecycle = None
+
+
+def get_game_lifecycle() -> GameLifecycle:
+    """Get the global game lifecycle instance"""
+    global _game_lifecycle
+    if _game_lifecycle is None:
+        _game_lifecycle = GameLifecycle()
+    return _game_lifecycle
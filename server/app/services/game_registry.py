@@ -0,0 +1,88 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional
+import logging
+
+from app.models.runtime import GameState
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class GameRegistry:
+    """
+    Process-wide store of the live GameState for every game pin.
+    A game is loaded from the database once, shared by the host and every
+    player connection on this process, and evicted when the game ends.
+    """
+
+    def __init__(self):
+        self._games: Dict[str, GameState] = {}
+        self._loading: Dict[str, asyncio.Task] = {}
+
+    def __contains__(self, game_pin: str) -> bool:
+        return game_pin in self._games
+
+    def __len__(self) -> int:
+        return len(self._games)
+
+    def get(self, game_pin: str) -> Optional[GameState]:
+        """Return the live game state if it is already loaded"""
+        return self._games.get(game_pin)
+
+    def pins(self) -> List[str]:
+        return list(self._games)
+
+    def add(self, game_pin: str, game_state: GameState):
+        self._games[game_pin] = game_state
+
+    async def get_or_load(
+        self,
+        game_pin: str,
+        loader: Callable[[str], Awaitable[Optional[GameState]]],
+    ) -> Optional[GameState]:
+        """
+        Return the live game state, loading it with `loader` on first use.
+        Concurrent callers for the same pin share a single load.
+        """
+        game_state = self._games.get(game_pin)
+        if game_state is not None:
+            return game_state
+
+        task = self._loading.get(game_pin)
+        if task is None:
+            task = asyncio.create_task(self._load(game_pin, loader))
+            self._loading[game_pin] = task
+        return await asyncio.shield(task)
+
+    async def _load(
+        self,
+        game_pin: str,
+        loader: Callable[[str], Awaitable[Optional[GameState]]],
+    ) -> Optional[GameState]:
+        try:
+            game_state = await loader(game_pin)
+            if game_state is not None:
+                self._games[game_pin] = game_state
+                logger.info(f"Loaded game {game_pin} into the game registry")
+            return game_state
+        finally:
+            self._loading.pop(game_pin, None)
+
+    def evict(self, game_pin: str) -> Optional[GameState]:
+        """Drop a game from memory, returning its last state"""
+        game_state = self._games.pop(game_pin, None)
+        if game_state is not None:
+            logger.info(f"Evicted game {game_pin} from the game registry")
+        return game_state
+
+
+# Singleton instance
+_game_registry = None
+
+
+def get_game_registry() -> GameRegistry:
+    """Get the global game registry instance"""
+    global _game_registry
+    if _game_registry is None:
+        _game_registry = GameRegistry()
+    return _game_registry
@@ -0,0 +1,264 @@
+import asyncio
+import hashlib
+import os
+import uuid
+from bisect import bisect
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+
+from fastapi import WebSocket
+
+from app.metrics import REDIS_LATENCY
+from app.services.pin_allocator import PIN_REUSE_DELAY
+from app.websocket import codec
+from app.websocket.connection_manager import (
+    RedisConnectionManager,
+    get_connection_manager,
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Off by default: with one worker every game is local anyway
+WORKER_AFFINITY = os.getenv("WORKER_AFFINITY", "0").lower() in ("1", "true", "yes")
+# WebSocket base URL clients can reach this worker on, e.g. ws://10.0.0.5:8001
+WORKER_URL = os.getenv("WORKER_URL")
+WORKER_TTL = int(os.getenv("WORKER_TTL", "30"))
+
+WORKERS_KEY = "workers"
+REDIRECT_CLOSE_CODE = 4302
+
+# Compare-and-set of a game's owner: KEYS[1] is `owner:{pin}`, ARGV is the
+# owner the caller saw ("" for none), the new owner and the key's TTL.
+# Returns the owner after the call, so a caller that lost a race learns the winner.
+CLAIM_OWNER_SCRIPT = """
+local owner = redis.call('GET', KEYS[1])
+if (owner or '') == ARGV[1] then
+    redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+    return ARGV[2]
+end
+return owner
+"""
+
+
+class HashRing:
+    """Consistent hash ring; adding or removing a worker only moves its share of PINs"""
+
+    def __init__(self, nodes: Iterable[str] = (), replicas: int = 64):
+        self.replicas = replicas
+        self.points: List[int] = []
+        self.owners: List[str] = []
+        self.rebuild(nodes)
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+    def rebuild(self, nodes: Iterable[str]):
+        ring = sorted(
+            (self._hash(f"{node}#{replica}"), node)
+            for node in set(nodes)
+            for replica in range(self.replicas)
+        )
+        self.points = [point for point, _ in ring]
+        self.owners = [node for _, node in ring]
+
+    def get(self, key: str) -> Optional[str]:
+        if not self.points:
+            return None
+        index = bisect(self.points, self._hash(key)) % len(self.points)
+        return self.owners[index]
+
+
+class GameRouter:
+    """
+    Assigns every game PIN to one worker process so all of a game's state
+    lives in one process. Workers announce themselves in Redis with a TTL,
+    the owner is picked on a consistent hash ring of the live workers, and
+    the choice is pinned in Redis (`owner:{pin}`) so it survives membership
+    changes until the owner dies. Sockets that reach another worker are told
+    where to reconnect and closed.
+    """
+
+    def __init__(
+        self,
+        connection_manager: RedisConnectionManager = None,
+        worker_id: Optional[str] = None,
+        worker_url: Optional[str] = WORKER_URL,
+    ):
+        self.connection_manager = connection_manager or get_connection_manager()
+        self.worker_id = worker_id or uuid.uuid4().hex
+        self.worker_url = worker_url
+        self.workers: Dict[str, str] = {}  # Live worker id -> URL
+        self.ring = HashRing()
+        self.refresh_task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.refresh_task is not None
+
+    @staticmethod
+    def _owner_key(game_pin: str) -> str:
+        return f"owner:{game_pin}"
+
+    @staticmethod
+    def _worker_key(worker_id: str) -> str:
+        return f"worker:{worker_id}"
+
+    async def start(self):
+        """Announce this worker and keep the ring up to date"""
+        if not self.worker_url:
+            logger.error("WORKER_AFFINITY is set without WORKER_URL; serving every game locally")
+            return
+        await self.connection_manager.connect_to_redis()
+        await self._announce()
+        await self.refresh()
+        self.refresh_task = asyncio.create_task(self._refresh_loop())
+        logger.info(f"Worker {self.worker_id} serving games at {self.worker_url}")
+
+    async def stop(self):
+        if self.refresh_task is None:
+            return
+        self.refresh_task.cancel()
+        self.refresh_task = None
+        try:
+            redis = self.connection_manager.redis
+            async with redis.pipeline(transaction=False) as pipe:
+                pipe.hdel(WORKERS_KEY, self.worker_id)
+                pipe.delete(self._worker_key(self.worker_id))
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Error deregistering worker {self.worker_id}: {e}")
+
+    async def _announce(self):
+        async with self.connection_manager.redis.pipeline(transaction=False) as pipe:
+            pipe.hset(WORKERS_KEY, self.worker_id, self.worker_url)
+            pipe.set(self._worker_key(self.worker_id), self.worker_url, ex=WORKER_TTL)
+            await pipe.execute()
+
+    async def refresh(self):
+        """Rebuild the ring from the workers whose liveness key has not expired"""
+        redis = self.connection_manager.redis
+        registered = await redis.hgetall(WORKERS_KEY)
+        ids = list(registered)
+        alive = await redis.mget([self._worker_key(worker_id) for worker_id in ids]) if ids else []
+        workers = {worker_id: url for worker_id, url in zip(ids, alive) if url}
+        dead = [worker_id for worker_id in ids if worker_id not in workers]
+        if dead:
+            await redis.hdel(WORKERS_KEY, *dead)
+            logger.info(f"Dropped {len(dead)} dead worker(s) from the ring")
+        if workers.keys() != self.workers.keys():
+            self.ring.rebuild(workers)
+        self.workers = workers
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(WORKER_TTL / 3)
+            try:
+                await self._announce()
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error refreshing worker ring: {e}")
+
+    async def owner_of(self, game_pin: str) -> Tuple[str, str]:
+        """Return the (worker id, URL) that owns a game, claiming it if unowned"""
+        redis = self.connection_manager.redis
+        owner_key = self._owner_key(game_pin)
+        with REDIS_LATENCY.time(operation="game_owner"):
+            owner = await redis.get(owner_key)
+            if owner == self.worker_id:
+                return owner, self.worker_url
+            # Liveness is read from Redis, not the ring: a worker that started
+            # since the last refresh is alive though not in self.workers yet
+            url = await redis.get(self._worker_key(owner)) if owner is not None else None
+            if url is not None:
+                return owner, url
+            candidate = self.ring.get(game_pin) or self.worker_id
+            if owner is not None:
+                logger.warning(f"Owner of game {game_pin} is gone, moving it to {candidate}")
+            owner = await redis.eval(
+                CLAIM_OWNER_SCRIPT, 1, owner_key, owner or "", candidate, PIN_REUSE_DELAY
+            )
+            if owner == self.worker_id:
+                return owner, self.worker_url
+            url = await redis.get(self._worker_key(owner))
+        return owner, url or self.workers.get(owner, self.worker_url)
+
+    async def owned(self, game_pins: List[str]) -> List[str]:
+        """
+        The subset of `game_pins` this worker owns. PINs that are unowned, or
+        whose owner's liveness key has expired, and that the ring assigns to
+        this worker are claimed first, each with a compare-and-set on the
+        owner seen, so of two workers racing for a game only one takes it.
+        """
+        if not game_pins:
+            return []
+        redis = self.connection_manager.redis
+        with REDIS_LATENCY.time(operation="game_owner"):
+            owners = await redis.mget([self._owner_key(game_pin) for game_pin in game_pins])
+            others = sorted({owner for owner in owners if owner not in (None, self.worker_id)})
+            alive = (
+                await redis.mget([self._worker_key(worker_id) for worker_id in others])
+                if others
+                else []
+            )
+            live = {worker_id for worker_id, url in zip(others, alive) if url is not None}
+            mine, claimable = [], []
+            for game_pin, owner in zip(game_pins, owners):
+                if owner == self.worker_id:
+                    mine.append(game_pin)
+                elif owner not in live and self.ring.get(game_pin) == self.worker_id:
+                    claimable.append((game_pin, owner))
+            if claimable:
+                async with redis.pipeline(transaction=False) as pipe:
+                    for game_pin, owner in claimable:
+                        pipe.eval(
+                            CLAIM_OWNER_SCRIPT,
+                            1,
+                            self._owner_key(game_pin),
+                            owner or "",
+                            self.worker_id,
+                            PIN_REUSE_DELAY,
+                        )
+                    claimed = await pipe.execute()
+                mine.extend(
+                    game_pin
+                    for (game_pin, _), owner in zip(claimable, claimed)
+                    if owner == self.worker_id
+                )
+        return mine
+
+    async def redirect_if_remote(self, websocket: WebSocket, game_pin: str) -> bool:
+        """
+        Send a socket for another worker's game a redirect frame and close it.
+        Returns True if the caller should stop handling the socket.
+        """
+        if not self.enabled:
+            return False
+        try:
+            owner, url = await self.owner_of(game_pin)
+        except Exception as e:
+            logger.error(f"Error looking up owner of game {game_pin}, serving locally: {e}")
+            return False
+        if owner == self.worker_id:
+            return False
+
+        await codec.accept(websocket)
+        await codec.send(websocket, {"type": "redirect", "url": f"{url}{websocket.url.path}"})
+        await websocket.close(code=REDIRECT_CLOSE_CODE)
+        logger.debug(f"Redirected socket for game {game_pin} to worker {owner}")
+        return True
+
+
+# Singleton instance
+_game_router = None
+
+
+def get_game_router() -> GameRouter:
+    """Get the global game router instance"""
+    global _game_router
+    if _game_router is None:
+        _game_router = GameRouter(get_connection_manager())
+    return _game_router
@@ -1,19 +1,48 @@
-import json
 from typing import Dict, List, Optional
-import uuid
 from fastapi import WebSocket, status
 import asyncio
+import math
 import time
+from datetime import datetime, timezone
+from functools import partial
 
-from app.models.game import GameState
 from app.database.database import get_game_collection
-from app.models.player import Player
+from app.metrics import ANSWERS, MONGO_LATENCY, WS_DROPPED
 from app.models.question import Question
+from app.models.runtime import GameState, PlayerState
+from app.services.answer_stats_publisher import get_answer_stats_publisher
+from app.services.game_registry import get_game_registry
+from app.services.game_router import get_game_router
+from app.services.leaderboard import Leaderboard
+from app.services.leaderboard_publisher import get_leaderboard_publisher
+from app.services.pin_allocator import get_pin_allocator
+from app.services.question_bank import get_question_bank
+from app.services.question_timer import (
+    ANSWER_GRACE_MS,
+    AUTO_ADVANCE,
+    AUTO_ADVANCE_DELAY,
+    get_question_timer,
+)
+from app.services.snapshots import (
+    ENDED_STATUSES,
+    RESTORE_TIMEOUT,
+    apply_snapshot,
+    compact,
+    get_snapshot_manager,
+)
 from app.services.quiz_service import QuizService
+from app.services.write_behind import get_write_behind
+from app.websocket import codec
+from app.websocket.rate_limit import (
+    HOST_ACTION_LIMITS,
+    PLAYER_ACTION_LIMITS,
+    InboundLimiter,
+)
 from app.websocket.connection_manager import (
     get_connection_manager,
 )
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection
+from pymongo.errors import DuplicateKeyError
 import logging
 
 from app.services.prompt_service import get_questions_response
@@ -22,9 +51,31 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def is_valid_nickname(nickname: str) -> bool:
+    """
+    Nicknames are used as field names in the game document
+    (`player_answers.<question>.<nickname>`), where a dot would split the
+    path and a leading `$` reads as an operator
+    """
+    return (
+        isinstance(nickname, str)
+        and bool(nickname.strip())
+        and "." not in nickname
+        and not nickname.startswith("$")
+        and "\0" not in nickname
+    )
+
+
+# Every connection shares one service; live game state lives in the game registry
+_game_service_instance = None
+
+
 def get_game_service():
-    game_collection = get_game_collection()
-    return GameService(game_collection=game_collection)
+    global _game_service_instance
+    if _game_service_instance is None:
+        game_collection = get_game_collection()
+        _game_service_instance = GameService(game_collection=game_collection)
+    return _game_service_instance
 
 
 class GameService:
@@ -34,15 +85,44 @@ class GameService:
         game_collection: AsyncIOMotorCollection = None,
     ):
         self.connection_manager = get_connection_manager()
-        self.active_games: Dict[str, GameState] = {}
+        self.active_games = get_game_registry()
+        self.write_behind = get_write_behind()
+        self.pin_allocator = get_pin_allocator()
+        self.question_bank = get_question_bank()
+        self.snapshots = get_snapshot_manager()
+        self.leaderboard_publisher = get_leaderboard_publisher()
+        self.answer_stats_publisher = get_answer_stats_publisher()
+        self.question_timer = get_question_timer()
         self.quiz_service = quiz_service or QuizService()
         self.game_collection = get_game_collection()
 
     def _get_db_projection(self):
-        return {"_id": 0}
+        # Finished questions' stats are only ever read back through the API
+        return {"_id": 0, "question_stats": 0}
 
-    def generate_questions(self, message: str) -> dict:
-        return get_questions_response(message)
+    async def generate_questions(self, message: str) -> dict:
+        # A topic the bank already covers needs no generation at all
+        try:
+            banked = await self.question_bank.for_topic(message)
+        except Exception as e:
+            logger.error(f"Error reading question bank for {message!r}: {e}")
+            banked = None
+        if banked:
+            return {
+                "success": True,
+                "data": [q.model_dump() for q in banked],
+                "message": "Questions loaded from the question bank",
+            }
+
+        response = await get_questions_response(message)
+        if response["success"] and isinstance(response.get("data"), list):
+            try:
+                await self.question_bank.add_questions(
+                    response["data"], topic=message, source="generated"
+                )
+            except Exception as e:
+                logger.error(f"Error storing generated questions for {message!r}: {e}")
+        return response
 
     async def create_game(self, manual=False, questions_data=None) -> str:
         if not self.quiz_service:
@@ -52,22 +132,16 @@ class GameService:
             logger.error("Cannot create game, game_collection is not available.")
             raise ValueError("Database collection not initialized")
 
-        game_pin = str(uuid.uuid4())[:6].upper()
-        # Simple uniqueness check (consider retrying if collisions are likely)
-        while await self.get_game_data_from_db(game_pin):
-            game_pin = str(uuid.uuid4())[:6].upper()
-        logger.info(f"Creating new game with pin {game_pin}")
         questions = self.quiz_service._get_default_quiz()
         if manual:
             questions = self.quiz_service.get_quiz_from_external(questions_data)
-            print("QUESTIONS ARE", questions)
 
         if not questions:
-            logger.error(f"No questions found for game {game_pin}")
+            logger.error("No questions found for new game")
             raise ValueError("No questions available")
 
+        created_at = datetime.now(timezone.utc)
         game_data_for_db = {
-            "game_pin": game_pin,
             "players": [],  # Start with no players in DB
             "questions": [q.dict() for q in questions],  # Store question data
             "current_question_index": 0,
@@ -75,14 +149,42 @@ class GameService:
             "player_answers": {},
             "current_question_start_time": None,
             "host_connected": False,  # Track host connection status
+            "created_at": created_at,
+            # Games idle for too long are archived as abandoned
+            "last_activity_at": created_at,
         }
 
-        result = await self.game_collection.insert_one(game_data_for_db)
+        # The allocator reserves the PIN atomically; the unique index on
+        # game_pin still guards against a document left behind under it
+        while True:
+            game_pin = await self.pin_allocator.allocate(
+                fallback_exists=self._game_exists
+            )
+            logger.info(f"Creating new game with pin {game_pin}")
+            try:
+                with MONGO_LATENCY.time(operation="create_game"):
+                    result = await self.game_collection.insert_one(
+                        {"game_pin": game_pin, **game_data_for_db}
+                    )
+                break
+            except DuplicateKeyError:
+                logger.warning(f"Pin {game_pin} is still taken in DB, allocating another")
+
         logger.info(
             f"Game created in DB with pin {game_pin}, Inserted ID: {result.inserted_id}"
         )
         return game_pin
 
+    async def _game_exists(self, game_pin: str) -> bool:
+        """Check for a game document without loading it"""
+        if self.game_collection is None:
+            logger.error("_game_exists: game collection is not set!")
+            return False
+        doc = await self.game_collection.find_one(
+            {"game_pin": game_pin}, projection={"_id": 1}
+        )
+        return doc is not None
+
     async def get_all_active_game_pins(self) -> List[str]:
         """Retrieves a list of all game pins from the database."""
         if self.game_collection is None:
@@ -93,17 +195,73 @@ class GameService:
         logger.debug(f"Fetched active game pins from DB: {pins}")
         return pins
 
-    async def get_game_data_from_db(self, game_pin: str) -> Optional[dict]:
+    async def get_game_data_from_db(
+        self, game_pin: str, projection: Optional[dict] = None
+    ) -> Optional[dict]:
         if self.game_collection is None:
             logger.error("get_game_data_from_db: game collection is not set!")
             return None
         logger.debug(f"Fetching game from the game pin {game_pin}")
-        print(f"Fetching game from the game pin {game_pin}")
-        x = await self.game_collection.find_one(
-            {"game_pin": game_pin}, projection=self._get_db_projection()
+        with MONGO_LATENCY.time(operation="get_game_data_from_db"):
+            return await self.game_collection.find_one(
+                {"game_pin": game_pin}, projection=projection or self._get_db_projection()
+            )
+
+    async def get_game_status(self, game_pin: str) -> Optional[dict]:
+        """
+        Status summary of a game. Served from memory when the game is live on
+        this process, otherwise computed by Mongo without loading the questions.
+        """
+        game_state = self.active_games.get(game_pin)
+        if game_state:
+            return {
+                "game_status": game_state.game_status,
+                "player_count": len(game_state.players),
+                "current_question_index": game_state.current_question_index,
+            }
+
+        if self.game_collection is None:
+            logger.error("get_game_status: game collection is not set!")
+            return None
+        cursor = self.game_collection.aggregate(
+            [
+                {"$match": {"game_pin": game_pin}},
+                {"$limit": 1},
+                {
+                    "$project": {
+                        "_id": 0,
+                        "game_status": 1,
+                        "current_question_index": 1,
+                        "player_count": {"$size": {"$ifNull": ["$players", []]}},
+                    }
+                },
+            ]
         )
-        print("FOUND GAME DATA", x)
-        return x
+        with MONGO_LATENCY.time(operation="get_game_status"):
+            summaries = await cursor.to_list(length=1)
+        return summaries[0] if summaries else None
+
+    async def get_question_stats(self, game_pin: str) -> Optional[dict]:
+        """
+        Answer statistics per question index: the summaries stored as each
+        question ended, plus the live numbers of a question still running
+        on this process.
+        """
+        game_data = await self.get_game_data_from_db(
+            game_pin, projection={"_id": 0, "question_stats": 1}
+        )
+        if game_data is None:
+            return None
+        stats = game_data.get("question_stats", {})
+        game_state = self.active_games.get(game_pin)
+        if (
+            game_state
+            and game_state.game_status == "in_progress"
+            and game_state.question_stats is not None
+        ):
+            live = game_state.question_stats
+            stats[str(live.question_index)] = live.summary()
+        return stats
 
     async def _update_game_state_in_db(
         self, game_pin: str, update_data: dict, array_filters=None
@@ -121,16 +279,17 @@ class GameService:
         update_operation = {"$set": update_data}
 
         try:
-            if array_filters:
-                result = await self.game_collection.update_one(
-                    {"game_pin": game_pin},
-                    update_operation,
-                    array_filters=array_filters,
-                )
-            else:
-                result = await self.game_collection.update_one(
-                    {"game_pin": game_pin}, update_operation
-                )
+            with MONGO_LATENCY.time(operation="_update_game_state_in_db"):
+                if array_filters:
+                    result = await self.game_collection.update_one(
+                        {"game_pin": game_pin},
+                        update_operation,
+                        array_filters=array_filters,
+                    )
+                else:
+                    result = await self.game_collection.update_one(
+                        {"game_pin": game_pin}, update_operation
+                    )
 
             logger.debug(
                 f"DB update result for {game_pin}: Matched={result.matched_count}, Modified={result.modified_count}"
@@ -147,9 +306,10 @@ class GameService:
         logger.debug(
             f"Adding player {player_data.get('nickname')} to DB for game {game_pin}"
         )
-        result = await self.game_collection.update_one(
-            {"game_pin": game_pin}, {"$push": {"players": player_data}}
-        )
+        with MONGO_LATENCY.time(operation="_push_player_to_db"):
+            result = await self.game_collection.update_one(
+                {"game_pin": game_pin}, {"$push": {"players": player_data}}
+            )
         logger.debug(
             f"DB push player result for {game_pin}: Matched={result.matched_count}, Modified={result.modified_count}"
         )
@@ -160,9 +320,10 @@ class GameService:
             logger.error("_pull_player_from_db: game_collection is not set!")
             return None
         logger.debug(f"Removing player {nickname} from DB for game {game_pin}")
-        result = await self.game_collection.update_one(
-            {"game_pin": game_pin}, {"$pull": {"players": {"nickname": nickname}}}
-        )
+        with MONGO_LATENCY.time(operation="_pull_player_from_db"):
+            result = await self.game_collection.update_one(
+                {"game_pin": game_pin}, {"$pull": {"players": {"nickname": nickname}}}
+            )
         logger.debug(
             f"DB pull player result for {game_pin}: Matched={result.matched_count}, Modified={result.modified_count}"
         )
@@ -177,10 +338,11 @@ class GameService:
         logger.debug(
             f"Updating score for player {nickname} to {new_score} in DB for game {game_pin}"
         )
-        result = await self.game_collection.update_one(
-            {"game_pin": game_pin, "players.nickname": nickname},
-            {"$set": {"players.$.score": new_score}},
-        )
+        with MONGO_LATENCY.time(operation="_update_player_score_in_db"):
+            result = await self.game_collection.update_one(
+                {"game_pin": game_pin, "players.nickname": nickname},
+                {"$set": {"players.$.score": new_score}},
+            )
         logger.debug(
             f"DB update score result for {game_pin}: Matched={result.matched_count}, Modified={result.modified_count}"
         )
@@ -190,33 +352,35 @@ class GameService:
         self, game_pin: str
     ) -> Optional[GameState]:
         """
-        Gets the GameState from active_games or loads from DB if needed.
+        Gets the GameState from the shared game registry, loading it from DB
+        only the first time any connection asks for it.
         Returns None if game doesn't exist in DB.
         """
-        if game_pin in self.active_games:
-            game_state = self.active_games[game_pin]
-            game_state.game_status = "in_progress"
-            print("OR IS IT HERE", game_state)
-
-            # Update the host connection from the connection manager
-            host_websocket = self.connection_manager.get_host_connection(game_pin)
-            game_state.host = host_websocket
-
-            # Update player websockets from the connection manager
-            for player in game_state.players:
-                player.websocket = self.connection_manager.get_player_connection(
-                    game_pin, player.nickname
-                )
-
-            return game_state
+        return await self.active_games.get_or_load(
+            game_pin, self._load_game_state_from_db
+        )
 
-        game_data = await self.get_game_data_from_db(game_pin)
+    async def _load_game_state_from_db(self, game_pin: str) -> Optional[GameState]:
+        """Build a GameState from the stored game document and its snapshot"""
+        # Make sure nothing buffered for this pin is missing from the document
+        await self.write_behind.flush(game_pin)
+        game_data, snapshot = await asyncio.gather(
+            self.get_game_data_from_db(game_pin), self.snapshots.load(game_pin)
+        )
         if not game_data:
             logger.warning(
                 f"_get_or_create_active_game_state: Game {game_pin} not found in DB"
             )
             return None
+        if game_data.get("game_status") in ENDED_STATUSES:
+            # Ended games stay in the collection for results only
+            logger.info(f"Not loading game {game_pin}: it has {game_data['game_status']}")
+            return None
+        return self._build_game_state(game_pin, game_data, snapshot)
 
+    def _build_game_state(
+        self, game_pin: str, game_data: dict, snapshot: Optional[dict] = None
+    ) -> GameState:
         # Deserialize data from DB into GameState
         players_from_db = []
         for player_data in game_data.get("players", []):
@@ -225,12 +389,10 @@ class GameService:
             websocket = self.connection_manager.get_player_connection(
                 game_pin, nickname
             )
-            players_from_db.append(Player(**player_data, websocket=websocket))
-        print("HEYY")
+            players_from_db.append(PlayerState.from_document(player_data, websocket))
         questions_from_db = [
             Question(**q_data) for q_data in game_data.get("questions", [])
         ]
-        print("GAME DATA IS", game_data)
         # Get host websocket from connection manager
         host_websocket = self.connection_manager.get_host_connection(game_pin)
 
@@ -244,17 +406,105 @@ class GameService:
             current_question_start_time=game_data.get("current_question_start_time"),
         )
 
-        self.active_games[game_pin] = game_state
-        logger.info(f"Loaded game {game_pin} from DB into active games.")
+        if snapshot:
+            before = compact(game_pin, game_state)
+            apply_snapshot(game_state, snapshot)
+            game_state.reset_question_stats()
+            if compact(game_pin, game_state) != before:
+                # The document fell behind (lost buffered writes); catch it up
+                logger.info(f"Game {game_pin} restored ahead of its document from a snapshot")
+                # Player by player, so players joining in the same flush are kept
+                stored = {
+                    player_data.get("nickname"): player_data.get("score", 0)
+                    for player_data in game_data.get("players", [])
+                }
+                for player in game_state.players:
+                    if player.nickname not in stored:
+                        self.write_behind.push_player(game_pin, player.to_document())
+                    elif player.score != stored[player.nickname]:
+                        self.write_behind.set_player_fields(
+                            game_pin, player.nickname, {"score": player.score}
+                        )
+                self.write_behind.set_fields(
+                    game_pin,
+                    {
+                        "current_question_index": game_state.current_question_index,
+                        "game_status": game_state.game_status,
+                        "player_answers": game_state.player_answers,
+                        "current_question_start_time": game_state.current_question_start_time,
+                    },
+                )
+
+        # A game loaded mid-question still closes at the original deadline
+        self._schedule_question_close(game_pin, game_state)
         return game_state
 
+    async def restore_games(self, timeout: float = RESTORE_TIMEOUT) -> int:
+        """
+        Put the games this worker owns that have a recent snapshot back into
+        the registry, in bulk: one read per batch of snapshots and one for
+        their documents. With WORKER_AFFINITY the router decides ownership;
+        a lone worker owns every game. Gives up after `timeout` seconds;
+        whatever is left is loaded lazily when its sockets reconnect.
+        Returns the number of games restored.
+        """
+        restored = 0
+        router = get_game_router()
+
+        async def restore():
+            nonlocal restored
+            async for batch in self.snapshots.live_batches():
+                snapshots = {
+                    snapshot["game_pin"]: snapshot
+                    for snapshot in batch
+                    if snapshot["game_pin"] not in self.active_games
+                }
+                pins = list(snapshots)
+                if router.enabled:
+                    pins = await router.owned(pins)
+                if not pins:
+                    continue
+                with MONGO_LATENCY.time(operation="restore_games"):
+                    documents = await self.game_collection.find(
+                        {"game_pin": {"$in": pins}}, self._get_db_projection()
+                    ).to_list(length=None)
+                for game_data in documents:
+                    game_pin = game_data["game_pin"]
+                    if (
+                        game_pin in self.active_games
+                        or game_data.get("game_status") in ENDED_STATUSES
+                    ):
+                        continue
+                    try:
+                        self.active_games.add(
+                            game_pin,
+                            self._build_game_state(game_pin, game_data, snapshots[game_pin]),
+                        )
+                        restored += 1
+                    except Exception as e:
+                        logger.error(f"Error restoring game {game_pin}: {e}")
+
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(restore(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"Game restore stopped after {timeout}s; remaining games will load on reconnect"
+            )
+        except Exception as e:
+            logger.error(f"Error restoring games from snapshots: {e}")
+        logger.info(
+            f"Restored {restored} game(s) from snapshots in {time.monotonic() - started:.2f}s"
+        )
+        return restored
+
     def _cleanup_active_game(self, game_pin: str):
         """Removes a game from active_games if no host or players are connected."""
         if game_pin in self.active_games:
             if not self.connection_manager.get_host_connection(
                 game_pin
             ) and not self.connection_manager.get_player_connections(game_pin):
-                del self.active_games[game_pin]
+                self.active_games.evict(game_pin)
                 logger.info(
                     f"Removed game {game_pin} from active games (no active host/players)."
                 )
@@ -268,10 +518,9 @@ class GameService:
 
         if not game_state:
             logger.error(f"Game with pin {game_pin} not found.")
-            await websocket.send_text(
-                json.dumps(
-                    {"type": "error", "message": f"Game with pin {game_pin} not found."}
-                )
+            await codec.send(
+                websocket,
+                {"type": "error", "message": f"Game with pin {game_pin} not found."},
             )
             raise ValueError(f"Game with pin {game_pin} not found.")
 
@@ -281,51 +530,71 @@ class GameService:
         )
 
         if not registration_success:
-            await websocket.send_text(
-                json.dumps({"type": "error", "message": "Host already connected."})
+            await codec.send(
+                websocket, {"type": "error", "message": "Host already connected."}
             )
             return False
 
         # Update the game state with the new host
         game_state.host = websocket
+        game_state.touch()
 
         logger.info(f"Host connected to game {game_pin}")
 
         # Send connection confirmation
-        await websocket.send_text(
-            json.dumps(
-                {
-                    "type": "connection_status",
-                    "status": "connected",
-                    "message": f"Connected as host for game {game_pin}",
-                }
-            )
+        await codec.send(
+            websocket,
+            {
+                "type": "connection_status",
+                "status": "connected",
+                "message": f"Connected as host for game {game_pin}",
+            },
         )
 
-        # Get player list from Redis
-        player_list = await self.connection_manager.get_player_list(game_pin)
-        logger.info(f"Players in game {game_pin} from Redis: {player_list}")
+        # Send the whole roster in one frame; player_joined and player_left
+        # events only describe changes after this snapshot
+        await codec.send(
+            websocket,
+            {
+                "type": "lobby_snapshot",
+                "players": [
+                    {
+                        "nickname": player.nickname,
+                        "score": player.score,
+                        "connected": player.websocket is not None,
+                    }
+                    for player in game_state.players
+                ],
+            },
+        )
+        logger.info(
+            f"Sent lobby snapshot of {len(game_state.players)} players to host of game {game_pin}"
+        )
 
-        # Send existing players to host
-        for player in game_state.players:
-            try:
-                logger.info(f"Sending player {player.nickname} to host")
-                await websocket.send_text(
-                    json.dumps({"type": "player_joined", "nickname": player.nickname})
-                )
-                await asyncio.sleep(0.05)
-            except Exception as e:
-                logger.error(f"Error sending player {player.nickname} to host: {e}")
+        # A host reconnecting mid-game picks up the question in play
+        await self._resync_question(game_pin, game_state, websocket, host=True)
 
         # Update DB to indicate host is connected
-        await self._update_game_state_in_db(game_pin, {"host_connected": True})
+        await self._update_game_state_in_db(
+            game_pin,
+            {"host_connected": True, "last_activity_at": datetime.now(timezone.utc)},
+        )
 
         # Keep connection active and handle messages
+        limiter = InboundLimiter("host", HOST_ACTION_LIMITS)
         try:
             while True:
-                data = await websocket.receive_text()
-                message = json.loads(data)
-                logger.info(f"Host message received for game {game_pin}: {message}")
+                data = await codec.receive(websocket)
+                self.connection_manager.mark_alive(game_pin, is_host=True)
+                message = limiter.accept(data)
+                if message is None:
+                    if limiter.exhausted:
+                        logger.warning(f"Closing host of game {game_pin}: too many dropped messages")
+                        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+                        await self.disconnect_host(game_pin)
+                        return True
+                    continue
+                logger.debug(f"Host message received for game {game_pin}: {message}")
 
                 # Process host messages (start game, next question, etc.)
                 if message.get("action") == "start_quiz":
@@ -344,23 +613,28 @@ class GameService:
         # Accept the WebSocket connection
         # await websocket.accept()
 
+        if not is_valid_nickname(nickname):
+            await codec.send(
+                websocket,
+                {"type": "error", "message": "Nicknames cannot contain '.' or start with '$'."},
+            )
+            return False
+
         game_state = await self._get_or_create_active_game_state(game_pin)
 
         if not game_state:
             logger.error(f"Game with pin {game_pin} not found")
-            await websocket.send_text(
-                json.dumps({"type": "error", "message": "Invalid game pin."})
+            await codec.send(
+                websocket, {"type": "error", "message": "Invalid game pin."}
             )
             return False
 
         logger.debug(
-            f"Existing players in game {game_pin}: {[p.nickname for p in game_state.players]}"
+            f"Game {game_pin} has {len(game_state.players)} players before {nickname} joins"
         )
 
         # Check if nickname is already taken
-        existing_player = next(
-            (p for p in game_state.players if p.nickname == nickname), None
-        )
+        existing_player = game_state.get_player(nickname)
 
         if existing_player:
             # If player exists but has no websocket, update the websocket
@@ -373,7 +647,8 @@ class GameService:
                 await self.connection_manager.register_player(
                     game_pin, nickname, websocket
                 )
-                existing_player.websocket = websocket
+                game_state.attach(existing_player, websocket)
+                game_state.touch()
                 logger.info(f"Reconnected player {nickname} to game {game_pin}")
 
                 # Important: Notify the host about the reconnected player
@@ -382,27 +657,36 @@ class GameService:
                 )
 
                 # Notify the player
-                await websocket.send_text(
-                    json.dumps(
-                        {
-                            "type": "joined_game",
-                            "message": f"Successfully rejoined game {game_pin}",
-                            "nickname": nickname,
-                        }
-                    )
+                await codec.send(
+                    websocket,
+                    {
+                        "type": "joined_game",
+                        "message": f"Successfully rejoined game {game_pin}",
+                        "nickname": nickname,
+                    },
                 )
-                return True
+                await self._resync_question(game_pin, game_state, websocket)
+                return await self._handle_player_messages(game_pin, websocket, nickname)
+
+            # Someone connected is already playing under this nickname
+            await codec.send(
+                websocket, {"type": "error", "message": "Nickname already taken."}
+            )
+            return False
 
         # Add new player
-        player = Player(websocket=websocket, nickname=nickname, score=0)
-        game_state.players.append(player)
+        player = PlayerState(nickname, websocket=websocket)
+        game_state.add_player(player)
 
         # Register the player connection in the connection manager
         await self.connection_manager.register_player(game_pin, nickname, websocket)
 
-        # Store player in DB (without websocket)
-        player_data = player.dict(exclude={"websocket"})
-        await self._push_player_to_db(game_pin, player_data)
+        # Store player in DB (without websocket), batched with other joins
+        self.write_behind.push_player(game_pin, player.to_document())
+        game_state.touch()
+        self.write_behind.set_fields(
+            game_pin, {"last_activity_at": datetime.now(timezone.utc)}
+        )
 
         logger.info(f"Player {nickname} joined game {game_pin}, notifying host")
 
@@ -412,35 +696,53 @@ class GameService:
         )
 
         # Send confirmation to the player
-        await websocket.send_text(
-            json.dumps(
-                {
-                    "type": "joined_game",
-                    "message": f"Successfully joined game {game_pin}",
-                    "nickname": nickname,
-                }
-            )
+        await codec.send(
+            websocket,
+            {
+                "type": "joined_game",
+                "message": f"Successfully joined game {game_pin}",
+                "nickname": nickname,
+            },
         )
+        # Joined mid-game: catch up on the question and the leaderboard
+        await self._resync_question(game_pin, game_state, websocket)
 
-        # Handle player messages
+        return await self._handle_player_messages(game_pin, websocket, nickname)
+
+    async def _handle_player_messages(
+        self, game_pin: str, websocket: WebSocket, nickname: str
+    ) -> bool:
+        """Receive loop of a joined player, until the socket goes away"""
+        limiter = InboundLimiter("player", PLAYER_ACTION_LIMITS)
         try:
             while True:
-                data = await websocket.receive_text()
-                message = json.loads(data)
-                logger.info(f"Player {nickname} message for game {game_pin}: {message}")
+                data = await codec.receive(websocket)
+                received_at = time.time()
+                self.connection_manager.mark_alive(
+                    game_pin, is_host=False, nickname=nickname
+                )
+                message = limiter.accept(data)
+                if message is None:
+                    if limiter.exhausted:
+                        logger.warning(
+                            f"Closing player {nickname} of game {game_pin}: too many dropped messages"
+                        )
+                        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+                        await self.disconnect_player(game_pin, websocket)
+                        return True
+                    continue
+                logger.debug(f"Player {nickname} message for game {game_pin}: {message}")
 
                 # Process player messages (answer submission, etc.)
                 if (
                     message.get("action") == "submit_answer"
                     and "answer_index" in message
                 ):
-                    time_taken = message.get("time_taken", 0)
                     await self.submit_answer(
-                        game_pin, websocket, message["answer_index"], time_taken
+                        game_pin, websocket, message["answer_index"], received_at
                     )
-                elif message.get("action") == "time_up":
-                    # Handle when player time runs out
-                    await self.handle_player_timeout(game_pin, websocket)
+                # "time_up" from a client's countdown is ignored: the question
+                # timer closes the window and sends every player the reveal
 
         except Exception as e:
             logger.error(f"Error in player connection: {e}")
@@ -452,8 +754,8 @@ class GameService:
         """Disconnect a host from a game"""
         self.connection_manager.remove_host(game_pin)
 
-        if game_pin in self.active_games:
-            game_state = self.active_games[game_pin]
+        game_state = self.active_games.get(game_pin)
+        if game_state:
             game_state.host = None
             logger.info(f"Host disconnected from game {game_pin}")
 
@@ -477,11 +779,7 @@ class GameService:
             return
 
         # Find the player by their websocket
-        player_to_remove = None
-        for player in game_state.players:
-            if player.websocket == websocket:
-                player_to_remove = player
-                break
+        player_to_remove = game_state.player_for(websocket)
 
         if player_to_remove:
             nickname = player_to_remove.nickname
@@ -491,14 +789,10 @@ class GameService:
             self.connection_manager.remove_player(game_pin, nickname)
 
             # Remove player websocket from game state
-            player_to_remove.websocket = None
+            game_state.detach(player_to_remove)
 
             # Update player in DB to mark as disconnected instead of completely removing
-            await self._update_game_state_in_db(
-                game_pin,
-                {f"players.$[elem].connected": False},
-                array_filters=[{"elem.nickname": nickname}],
-            )
+            self.write_behind.set_player_fields(game_pin, nickname, {"connected": False})
 
             # Notify host that player has left
             await self.connection_manager.broadcast_to_host(
@@ -519,99 +813,254 @@ class GameService:
                 f"Could not find player with the given websocket in game {game_pin}"
             )
 
-    async def end_game(self, game_pin: str):
-        """End a game and notify all participants"""
-        # game_state = await self._get_or_create_active_game_state(game_pin)
-        game_state = await self.get_game_data_from_db(game_pin)
+    async def end_game(self, game_pin: str, status: str = "finished"):
+        """
+        End a game and notify all participants. Games that went idle are
+        ended with status "abandoned" instead of "finished". A game that has
+        already ended keeps its status, finished_at and PIN release.
+        """
+        game_state = self.active_games.get(game_pin)
         if game_state:
-            await self._update_game_state_in_db(game_pin, {"game_status": "finished"})
-            # game_state = await self._get_or_create_active_game_state(game_pin)
-            players_data = [
-                {"nickname": p.get('nickname'), "score": p.get('score')} for p in game_state.get('players', [])
-            ]
-            final_results = sorted(players_data, key=lambda x: x["score"], reverse=True)
-            print("FINAL RESULTS ARE", final_results)
-            # Use connection manager to notify everyone
-            await self.connection_manager.broadcast_to_all(
-                game_pin, {"type": "game_over", "results": final_results}
+            if game_state.game_status in ENDED_STATUSES:
+                return
+            game_state.game_status = status
+            leaderboard = game_state.leaderboard
+        else:
+            # Not loaded on this process, rank the stored scores instead
+            game_data = await self.get_game_data_from_db(
+                game_pin, projection={"_id": 0, "players": 1, "game_status": 1}
+            )
+            if not game_data:
+                raise ValueError(f"Game with pin {game_pin} not found.")
+            if game_data.get("game_status") in ENDED_STATUSES:
+                logger.info(f"Game {game_pin} has already ended")
+                return
+            leaderboard = Leaderboard.from_scores(
+                (p.get("nickname"), p.get("score")) for p in game_data.get("players", [])
             )
 
-            # Clean up all connections for this game
-            self.connection_manager.cleanup_game(game_pin)
-
-            # Remove from active games
-            if game_pin in self.active_games:
-                del self.active_games[game_pin]
-        else:
-            raise ValueError(f"Game with pin {game_pin} not found.")
+        # Persist everything still buffered along with the final status;
+        # ended games are archived a while after finished_at
+        self.write_behind.set_fields(
+            game_pin,
+            {"game_status": status, "finished_at": datetime.now(timezone.utc)},
+        )
+        await self.write_behind.close_game(game_pin)
+        final_results = leaderboard.results()
+        game_over = {"type": "game_over", "results": final_results}
+        if status != "finished":
+            game_over["reason"] = status
+        # Use connection manager to notify everyone
+        await self.connection_manager.broadcast_to_all(game_pin, game_over)
+
+        # Clean up all connections for this game
+        self.connection_manager.cleanup_game(game_pin)
+
+        # Evict from the game registry; an ended game is never restored
+        self.question_timer.cancel(game_pin)
+        self.leaderboard_publisher.discard(game_pin)
+        self.answer_stats_publisher.discard(game_pin)
+        self.active_games.evict(game_pin)
+        await self.snapshots.discard(game_pin)
+
+        # Let the PIN be reused once the ended game has aged out
+        await self.pin_allocator.release(game_pin)
+
+    async def _resync_question(
+        self, game_pin: str, game_state: GameState, websocket: WebSocket, host: bool = False
+    ):
+        """Resend the question and leaderboard to a socket that (re)connected mid-game"""
+        frames = game_state.current_question_frames()
+        if game_state.game_status != "in_progress" or frames is None:
+            return
+        # The cached frames hold the full time limit; count down what is left of it
+        ends_at = game_state.question_ends_at()
+        remaining = max(0, math.ceil(ends_at - time.time())) if ends_at is not None else None
+        frame = frames.host if host else frames.player
+        await codec.send(
+            websocket,
+            frame if remaining is None else {**frame.message, "time_limit": remaining},
+        )
+        if host and game_state.question_stats is not None:
+            await codec.send(
+                websocket,
+                {
+                    "type": "answer_stats",
+                    "players": len(game_state.players),
+                    **game_state.question_stats.summary(),
+                },
+            )
+        player = None if host else game_state.player_for(websocket)
+        if player is None:
+            return
+        if ends_at is not None and time.time() > ends_at + ANSWER_GRACE_MS / 1000:
+            # The window closed while the player was away; show them the result
+            question_index = game_state.current_question_index
+            answers = game_state.player_answers.get(str(question_index), {})
+            await codec.send(
+                websocket,
+                {
+                    "type": "answer_reveal",
+                    "is_correct": answers.get(player.nickname)
+                    == game_state.questions[question_index].correct_answer,
+                    "new_score": player.score,
+                    "answered": player.nickname in answers,
+                },
+            )
+        # Deltas sent before the player connected are lost; start from a full
+        # view of the list the next delta will patch
+        leaderboard = game_state.leaderboard
+        await codec.send(
+            websocket,
+            {
+                "type": "leaderboard_update",
+                "top_players": self.leaderboard_publisher.base(game_pin),
+            },
+        )
+        await codec.send(
+            websocket,
+            {
+                "type": "rank_update",
+                "rank": leaderboard.rank(player.nickname),
+                "score": player.score,
+                "players": len(leaderboard),
+            },
+        )
 
     async def _send_current_question(self, game_pin: str):
         """Send the current question to host and players"""
         game_state = self.active_games.get(game_pin)
         if game_state and game_state.current_question_index < len(game_state.questions):
-            current_question: Question = game_state.questions[
-                game_state.current_question_index
-            ]
-
             # Record the time this question was sent
             question_start_time = time.time()
             game_state.current_question_start_time = question_start_time
 
-            # Update in DB
-            await self._update_game_state_in_db(
-                game_pin, {"current_question_start_time": question_start_time}
-            )
-
-            # Send question to players - include time_limit for client-side timer
-            question_data = {
-                "type": "question",
-                "question": current_question.question,
-                "options": current_question.options,
-                "time_limit": current_question.time_limit
-                or 20,  # Default to 20 seconds if not specified
-            }
-            await self.connection_manager.broadcast_to_players(game_pin, question_data)
-
-            # Send more detailed question to host
-            host_question_data = {
-                "type": "current_question_host",
-                "question": current_question.question,
-                "options": current_question.options,
-                "question_number": game_state.current_question_index + 1,
-                "total_questions": len(game_state.questions),
-                "time_limit": current_question.time_limit or 20,
-                "correct_answer": current_question.correct_answer,  # Send correct answer to host
-            }
-            await self.connection_manager.broadcast_to_host(
-                game_pin, host_question_data
-            )
-
             # Reset player answers for this question
             game_state.player_answers = {}
-            await self._update_game_state_in_db(game_pin, {"player_answers": {}})
+            game_state.reset_question_stats()
+            game_state.touch()
 
+            # Question boundary: write the new question state and anything
+            # buffered from the previous question in one bulk write
+            self.write_behind.set_fields(
+                game_pin,
+                {
+                    "current_question_start_time": question_start_time,
+                    "player_answers": {},
+                    "last_activity_at": datetime.now(timezone.utc),
+                },
+            )
+            await self.write_behind.flush(game_pin)
+
+            # Frames were encoded when the game was loaded
+            frames = game_state.current_question_frames()
+            await self.connection_manager.broadcast_to_players(game_pin, frames.player)
+            await self.connection_manager.broadcast_to_host(game_pin, frames.host)
+            self._schedule_question_close(game_pin, game_state)
         elif game_state:
             await self.end_game(game_pin)
         else:
             raise ValueError(f"Game with pin {game_pin} not found.")
 
+    def _schedule_question_close(self, game_pin: str, game_state: GameState):
+        """Have the question timer close the current question's answer window"""
+        ends_at = game_state.question_ends_at()
+        if ends_at is None or game_state.game_status != "in_progress":
+            return
+        self.question_timer.schedule(
+            game_pin,
+            ends_at + ANSWER_GRACE_MS / 1000,
+            partial(self.close_question, game_pin, game_state.current_question_index),
+        )
+
+    async def close_question(self, game_pin: str, question_index: int):
+        """
+        Close a question's answer window once its time is up: every player
+        gets their result and the host gets the tally. Does nothing if the
+        game has moved on since the deadline was set.
+        """
+        game_state = self.active_games.get(game_pin)
+        if (
+            not game_state
+            or game_state.game_status != "in_progress"
+            or game_state.current_question_index != question_index
+        ):
+            return
+
+        correct_answer = game_state.questions[question_index].correct_answer
+        answers = game_state.player_answers.get(str(question_index), {})
+        summary = self._record_question_stats(game_pin, game_state)
+        await self.connection_manager.send_to_players(
+            game_pin,
+            {
+                player.nickname: {
+                    "type": "answer_reveal",
+                    "is_correct": answers.get(player.nickname) == correct_answer,
+                    "new_score": player.score,
+                    "answered": player.nickname in answers,
+                }
+                for player in game_state.players
+                if player.websocket is not None
+            },
+        )
+        await self.connection_manager.broadcast_to_host(
+            game_pin,
+            {
+                "type": "question_closed",
+                "question_index": question_index,
+                "correct_answer": correct_answer,
+                "answered": len(answers),
+                "players": len(game_state.players),
+                "stats": summary,
+            },
+        )
+
+        if AUTO_ADVANCE:
+            self.question_timer.schedule(
+                game_pin,
+                time.time() + AUTO_ADVANCE_DELAY,
+                partial(self._auto_advance, game_pin, question_index),
+            )
+
+    def _record_question_stats(
+        self, game_pin: str, game_state: GameState
+    ) -> Optional[dict]:
+        """Store the current question's statistics with the game; returns them"""
+        stats = game_state.question_stats
+        if stats is None:
+            return None
+        summary = stats.summary()
+        self.write_behind.set_fields(
+            game_pin, {f"question_stats.{stats.question_index}": summary}
+        )
+        return summary
+
+    async def _auto_advance(self, game_pin: str, question_index: int):
+        game_state = self.active_games.get(game_pin)
+        # The host may already have moved on by hand
+        if (
+            game_state
+            and game_state.game_status == "in_progress"
+            and game_state.current_question_index == question_index
+        ):
+            await self.next_question(game_pin)
+
     async def start_quiz(self, game_pin: str, websocket: WebSocket):
         """Start a quiz"""
         game_state = await self._get_or_create_active_game_state(game_pin)
 
         if not game_state:
             logger.error(f"Game with pin {game_pin} not found.")
-            await websocket.send_text(
-                json.dumps(
-                    {"type": "error", "message": f"Game with pin {game_pin} not found."}
-                )
+            await codec.send(
+                websocket,
+                {"type": "error", "message": f"Game with pin {game_pin} not found."},
             )
             raise ValueError(f"Game with pin {game_pin} not found.")
 
         # Check if host is connected
         if not self.connection_manager.get_host_connection(game_pin):
-            await websocket.send_text(
-                json.dumps({"type": "error", "message": "No host connected."})
+            await codec.send(
+                websocket, {"type": "error", "message": "No host connected."}
             )
             return False
 
@@ -619,11 +1068,10 @@ class GameService:
         game_state.game_status = "in_progress"
         game_state.current_question_index = 0
 
-        # Update in DB
-        await self._update_game_state_in_db(
+        # Update in DB, flushed when the first question goes out
+        self.write_behind.set_fields(
             game_pin, {"game_status": "in_progress", "current_question_index": 0}
         )
-        self.active_games[game_pin] = game_state
         # Send first question
         await self._send_current_question(game_pin)
 
@@ -634,116 +1082,84 @@ class GameService:
         )
         return True
 
-    async def handle_player_timeout(self, game_pin: str, player_websocket: WebSocket):
-        """Handle when a player's timer expires without submitting an answer"""
-        game_state = self.active_games.get(game_pin)
-        if not game_state:
-            return False
-
-        current_question: Question = game_state.questions[
-            game_state.current_question_index
-        ]
-
-        # Find player by websocket
-        player = None
-        for p in game_state.players:
-            if p.websocket == player_websocket:
-                player = p
-                break
-
-        if not player:
-            return False
-
-        # Player didn't answer in time
-        logger.info(f"Player {player.nickname} timed out for game {game_pin}")
-
-        # Notify host that this player timed out
-        await self.connection_manager.broadcast_to_host(
-            game_pin,
-            {
-                "type": "player_timeout",
-                "nickname": player.nickname,
-                "question_index": game_state.current_question_index,
-            },
-        )
-
-        is_correct = (
-            game_state.player_answers[str(game_state.current_question_index)][
-                player.nickname
-            ]
-            == current_question.correct_answer
-            if str(game_state.current_question_index) in game_state.player_answers
-            and player.nickname
-            in game_state.player_answers[str(game_state.current_question_index)]
-            else False
-        )
-        print("USER IS CORRECT", is_correct)
-        # Send feedback to player that they didn't answer in time
-        await player_websocket.send_text(
-            json.dumps(
-                {
-                    "type": "answer_reveal",
-                    "is_correct": is_correct,
-                    "new_score": player.score,
-                    "message": "Time's up!",
-                }
-            )
-        )
-
-        return True
-
     async def submit_answer(
         self,
         game_pin: str,
         player_websocket: WebSocket,
         answer_index: int,
-        time_taken: float = 0,
+        received_at: Optional[float] = None,
     ):
-        """Submit a player's answer"""
+        """
+        Submit a player's answer. Timing is the server's: `received_at` is
+        when the answer frame arrived (now if not given), answers after the
+        question's deadline are rejected, and the time taken is measured
+        from when the question was sent.
+        """
+        if received_at is None:
+            received_at = time.time()
         game_state = await self._get_or_create_active_game_state(game_pin)
         if not game_state:
-            await player_websocket.send_text(
-                json.dumps({"type": "error", "message": "Invalid game pin."})
+            await codec.send(
+                player_websocket, {"type": "error", "message": "Invalid game pin."}
             )
             return False
 
         if game_state.game_status != "in_progress":
             print("THIS IS THE GAME PROGRRESS", game_state.game_status)
-            await player_websocket.send_text(
-                json.dumps({"type": "error", "message": "Game is not in progress."})
+            await codec.send(
+                player_websocket,
+                {"type": "error", "message": "Game is not in progress."},
             )
             return False
 
         # Find player by websocket
-        player = None
-        for p in game_state.players:
-            if p.websocket == player_websocket:
-                player = p
-                break
-
+        player = game_state.player_for(player_websocket)
         if not player:
-            await player_websocket.send_text(
-                json.dumps({"type": "error", "message": "Player not found in game."})
+            await codec.send(
+                player_websocket,
+                {"type": "error", "message": "Player not found in game."},
             )
             return False
 
         question_index = game_state.current_question_index
         if question_index >= len(game_state.questions):
-            await player_websocket.send_text(
-                json.dumps({"type": "error", "message": "Invalid question index."})
+            await codec.send(
+                player_websocket,
+                {"type": "error", "message": "Invalid question index."},
             )
             return False
 
         current_question = game_state.questions[question_index]
 
+        # One answer per question: repeats are dropped before any write or broadcast
+        answers = game_state.player_answers.get(str(question_index))
+        if answers and player.nickname in answers:
+            WS_DROPPED.inc(role="player", reason="duplicate_answer")
+            return False
+
+        ends_at = game_state.question_ends_at()
+        if ends_at is not None and received_at > ends_at + ANSWER_GRACE_MS / 1000:
+            WS_DROPPED.inc(role="player", reason="late_answer")
+            await codec.send(
+                player_websocket,
+                {
+                    "type": "answer_rejected",
+                    "reason": "too_late",
+                    "question_index": question_index,
+                },
+            )
+            return False
+
         # Store the answer
         if str(question_index) not in game_state.player_answers:
             game_state.player_answers[str(question_index)] = {}
 
         game_state.player_answers[str(question_index)][player.nickname] = answer_index
+        game_state.touch()
+        ANSWERS.inc()
 
-        # Update in DB
-        await self._update_game_state_in_db(
+        # Update in DB on the next write-behind flush
+        self.write_behind.set_fields(
             game_pin,
             {f"player_answers.{question_index}.{player.nickname}": answer_index},
         )
@@ -751,6 +1167,13 @@ class GameService:
         # Check if the answer is correct
         is_correct = answer_index == current_question.correct_answer
 
+        # Measured by the server, from sending the question to receiving the answer
+        time_taken = None
+        if game_state.current_question_start_time is not None:
+            time_taken = max(0, received_at - game_state.current_question_start_time)
+        if game_state.question_stats is not None:
+            game_state.question_stats.add(answer_index, time_taken)
+
         # Calculate score based on correctness and time taken
         score_to_add = 0
         if is_correct:
@@ -760,15 +1183,16 @@ class GameService:
             # Time factor (faster answers get more points)
             # Assuming a 20-second timer by default
             time_limit = current_question.time_limit or 20
-            time_factor = max(0, (time_limit - time_taken) / time_limit)
+            time_factor = max(0, (time_limit - (time_taken or 0)) / time_limit)
 
             # Calculate score
             score_to_add = int(base_score * time_factor)
 
             # Update player's score
             player.score += score_to_add
-            await self._update_player_score_in_db(
-                game_pin, player.nickname, player.score
+            game_state.leaderboard.set_score(player.nickname, player.score)
+            self.write_behind.set_player_fields(
+                game_pin, player.nickname, {"score": player.score}
             )
 
         # # Notify player about their answer result
@@ -783,33 +1207,10 @@ class GameService:
         #     )
         # )
 
-        # Get top players for leaderboard
-        top_players = sorted(
-            [{"nickname": p.nickname, "score": p.score} for p in game_state.players],
-            key=lambda x: x["score"],
-            reverse=True,
-        )[
-            :10
-        ]  # Get top 10
-
-        # Send leaderboard update to all players
-        await self.connection_manager.broadcast_to_players(
-            game_pin, {"type": "leaderboard_update", "top_players": top_players}
-        )
-
-        # Notify host about the answer
-        await self.connection_manager.broadcast_to_host(
-            game_pin,
-            {
-                "type": "player_answered",
-                "nickname": player.nickname,
-                "question_index": question_index,
-                "answer_index": answer_index,
-                "is_correct": is_correct,
-                "score_added": score_to_add,
-                "new_score": player.score,
-            },
-        )
+        # Players get the leaderboard changes, and the host the answer
+        # stats, on the game's next tick
+        self.leaderboard_publisher.mark(game_pin)
+        self.answer_stats_publisher.mark(game_pin)
 
         return True
 
@@ -828,11 +1229,14 @@ class GameService:
             )
             return False
 
+        # The question being left is over, whether or not its time ran out
+        self._record_question_stats(game_pin, game_state)
+
         # Move to next question index
         game_state.current_question_index += 1
 
-        # Update in DB
-        await self._update_game_state_in_db(
+        # Update in DB, flushed with the next question or the end of the game
+        self.write_behind.set_fields(
             game_pin, {"current_question_index": game_state.current_question_index}
         )
 
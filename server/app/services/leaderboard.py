@@ -0,0 +1,80 @@
+import bisect
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+class Leaderboard:
+    """
+    Ranked view of the player scores of a single game.
+    Entries are kept sorted by (-score, nickname), so a score change is two
+    binary searches on an already ordered list instead of a full re-sort.
+    """
+
+    def __init__(self):
+        self._ranking: List[Tuple[int, str]] = []
+        self._scores: Dict[str, int] = {}
+
+    @classmethod
+    def from_scores(cls, scores: Iterable[Tuple[str, int]]) -> "Leaderboard":
+        """Build a leaderboard from (nickname, score) pairs"""
+        leaderboard = cls()
+        for nickname, score in scores:
+            leaderboard._scores[nickname] = score or 0
+        leaderboard._ranking = sorted(
+            (-score, nickname) for nickname, score in leaderboard._scores.items()
+        )
+        return leaderboard
+
+    def __len__(self) -> int:
+        return len(self._ranking)
+
+    def __contains__(self, nickname: str) -> bool:
+        return nickname in self._scores
+
+    def add_player(self, nickname: str, score: int = 0):
+        """Add a player if they are not ranked yet"""
+        if nickname not in self._scores:
+            self.set_score(nickname, score)
+
+    def remove_player(self, nickname: str):
+        """Remove a player from the ranking"""
+        score = self._scores.pop(nickname, None)
+        if score is not None:
+            index = bisect.bisect_left(self._ranking, (-score, nickname))
+            del self._ranking[index]
+
+    def set_score(self, nickname: str, score: int):
+        """Set a player's score and move them to their new position"""
+        old_score = self._scores.get(nickname)
+        if old_score == score:
+            return
+        if old_score is not None:
+            index = bisect.bisect_left(self._ranking, (-old_score, nickname))
+            del self._ranking[index]
+        self._scores[nickname] = score
+        bisect.insort(self._ranking, (-score, nickname))
+
+    def get_score(self, nickname: str) -> Optional[int]:
+        return self._scores.get(nickname)
+
+    def rank(self, nickname: str) -> Optional[int]:
+        """1-based rank of a player, or None if they are not ranked"""
+        score = self._scores.get(nickname)
+        if score is None:
+            return None
+        return bisect.bisect_left(self._ranking, (-score, nickname)) + 1
+
+    def top(self, k: int = 10) -> List[dict]:
+        """The k highest scoring players, best first"""
+        return [
+            {"nickname": nickname, "score": -score}
+            for score, nickname in self._ranking[:k]
+        ]
+
+    def ranked(self) -> Iterator[Tuple[int, str, int]]:
+        """(rank, nickname, score) for every player, best first"""
+        for index, (score, nickname) in enumerate(self._ranking, start=1):
+            yield index, nickname, -score
+
+    def results(self) -> List[dict]:
+        """Every player ranked, best first"""
+        return self.top(len(self._ranking))
@@ -0,0 +1,131 @@
+import asyncio
+import os
+from typing import Dict, List, Optional, Set, Tuple
+import logging
+
+from app.services.game_registry import GameRegistry, get_game_registry
+from app.websocket.codec import Frame
+from app.websocket.connection_manager import (
+    RedisConnectionManager,
+    get_connection_manager,
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+LEADERBOARD_TICK_MS = int(os.getenv("LEADERBOARD_TICK_MS", "500"))
+LEADERBOARD_SIZE = 10
+
+
+class LeaderboardPublisher:
+    """
+    Coalesces leaderboard updates per game. Answers only mark their game
+    dirty; once per tick every dirty game sends one `leaderboard_delta`
+    with the top entries that changed since the last tick, and a
+    `rank_update` to each player whose own rank or score changed. Outbound
+    leaderboard traffic per question grows with the number of ticks and
+    players, instead of with answers times players.
+    """
+
+    def __init__(
+        self,
+        connection_manager: RedisConnectionManager = None,
+        registry: Optional[GameRegistry] = None,
+        tick_ms: int = LEADERBOARD_TICK_MS,
+        size: int = LEADERBOARD_SIZE,
+    ):
+        self.connection_manager = connection_manager or get_connection_manager()
+        self.registry = registry or get_game_registry()
+        self.tick = tick_ms / 1000
+        self.size = size
+        self.dirty: Set[str] = set()
+        # What players last saw, per game: the top entries and each player's (rank, score)
+        self.sent_top: Dict[str, List[Tuple[str, int]]] = {}
+        self.sent_ranks: Dict[str, Dict[str, Tuple[int, int]]] = {}
+        self.tick_task: Optional[asyncio.Task] = None
+
+    def mark(self, game_pin: str):
+        """Note that a game's scores changed; players hear about it on the next tick"""
+        self.dirty.add(game_pin)
+        if self.tick_task is None or self.tick_task.done():
+            self.tick_task = asyncio.create_task(self._tick_loop())
+
+    async def _tick_loop(self):
+        try:
+            while self.dirty:
+                await asyncio.sleep(self.tick)
+                pins, self.dirty = self.dirty, set()
+                await asyncio.gather(*(self.publish(game_pin) for game_pin in pins))
+        except asyncio.CancelledError:
+            pass
+
+    async def publish(self, game_pin: str):
+        """Send a game's players what changed on the leaderboard since last time"""
+        game_state = self.registry.get(game_pin)
+        if game_state is None:
+            self.discard(game_pin)
+            return
+        leaderboard = game_state.leaderboard
+        try:
+            top = [(entry["nickname"], entry["score"]) for entry in leaderboard.top(self.size)]
+            previous = self.sent_top.get(game_pin, [])
+            changes = [
+                {"rank": rank, "nickname": nickname, "score": score}
+                for rank, (nickname, score) in enumerate(top, start=1)
+                if rank > len(previous) or previous[rank - 1] != (nickname, score)
+            ]
+            if changes or len(top) != len(previous):
+                self.sent_top[game_pin] = top
+                await self.connection_manager.broadcast_to_players(
+                    game_pin,
+                    {"type": "leaderboard_delta", "changes": changes, "size": len(top)},
+                )
+
+            sent = self.sent_ranks.setdefault(game_pin, {})
+            total = len(leaderboard)
+            updates = {}
+            for rank, nickname, score in leaderboard.ranked():
+                if sent.get(nickname) != (rank, score):
+                    sent[nickname] = (rank, score)
+                    updates[nickname] = Frame(
+                        {"type": "rank_update", "rank": rank, "score": score, "players": total}
+                    )
+            if updates:
+                await self.connection_manager.send_to_players(game_pin, updates)
+        except Exception as e:
+            logger.error(f"Error publishing leaderboard for game {game_pin}: {e}")
+
+    def base(self, game_pin: str) -> List[dict]:
+        """
+        The top entries the game's next delta is relative to: what players
+        were last sent, or the current top if nothing was sent yet (the
+        first delta then lists every rank anyway)
+        """
+        top = self.sent_top.get(game_pin)
+        if top is None:
+            game_state = self.registry.get(game_pin)
+            return game_state.leaderboard.top(self.size) if game_state is not None else []
+        return [{"nickname": nickname, "score": score} for nickname, score in top]
+
+    def discard(self, game_pin: str):
+        """Forget a game that ended"""
+        self.dirty.discard(game_pin)
+        self.sent_top.pop(game_pin, None)
+        self.sent_ranks.pop(game_pin, None)
+
+    async def close(self):
+        if self.tick_task is not None:
+            self.tick_task.cancel()
+            self.tick_task = None
+
+
+# Singleton instance
+_leaderboard_publisher = None
+
+
+def get_leaderboard_publisher() -> LeaderboardPublisher:
+    """Get the global leaderboard publisher instance"""
+    global _leaderboard_publisher
+    if _leaderboard_publisher is None:
+        _leaderboard_publisher = LeaderboardPublisher()
+    return _leaderboard_publisher
@@ -0,0 +1,125 @@
+import os
+import secrets
+import time
+from typing import Awaitable, Callable, Optional
+import logging
+
+from app.metrics import REDIS_LATENCY
+from app.websocket.connection_manager import (
+    RedisConnectionManager,
+    get_connection_manager,
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PIN_LENGTH = 6
+# How long a PIN stays reserved while its game can still be looked up
+PIN_RESERVATION_TTL = int(os.getenv("PIN_RESERVATION_TTL", str(2 * 24 * 3600)))
+# How long a released PIN rests before it may be handed out again
+PIN_REUSE_DELAY = int(os.getenv("PIN_REUSE_DELAY", str(24 * 3600)))
+
+FREE_PINS_KEY = "pins:free"
+
+
+class PinAllocator:
+    """
+    Hands out game PINs reserved atomically in Redis.
+    A PIN is claimed with SET NX, so two workers can never hand out the same
+    one, and one random draw from 16^6 PINs almost always succeeds on the
+    first try. Released PINs rest in a sorted set for PIN_REUSE_DELAY and are
+    then reused before new random PINs are drawn.
+    """
+
+    def __init__(
+        self,
+        connection_manager: Optional[RedisConnectionManager] = None,
+        max_attempts: int = 10,
+    ):
+        self.connection_manager = connection_manager or get_connection_manager()
+        self.max_attempts = max_attempts
+
+    @staticmethod
+    def _random_pin() -> str:
+        return secrets.token_hex(PIN_LENGTH // 2).upper()
+
+    @staticmethod
+    def _reservation_key(game_pin: str) -> str:
+        return f"pin:{game_pin}"
+
+    async def _reserve(self, game_pin: str) -> bool:
+        redis = self.connection_manager.redis
+        with REDIS_LATENCY.time(operation="reserve_pin"):
+            return bool(
+                await redis.set(
+                    self._reservation_key(game_pin),
+                    "reserved",
+                    nx=True,
+                    ex=PIN_RESERVATION_TTL,
+                )
+            )
+
+    async def _pop_recycled(self) -> Optional[str]:
+        """Take the oldest released PIN if its rest period is over"""
+        redis = self.connection_manager.redis
+        popped = await redis.zpopmin(FREE_PINS_KEY)
+        if not popped:
+            return None
+        game_pin, available_at = popped[0]
+        if available_at > time.time():
+            # Still resting, put it back for a later allocation
+            await redis.zadd(FREE_PINS_KEY, {game_pin: available_at})
+            return None
+        return game_pin
+
+    async def allocate(
+        self, fallback_exists: Optional[Callable[[str], Awaitable[bool]]] = None
+    ) -> str:
+        """
+        Reserve and return a free PIN. When Redis is unavailable and
+        `fallback_exists` is given, PINs are checked against it instead.
+        """
+        try:
+            await self.connection_manager.connect_to_redis()
+            recycled = await self._pop_recycled()
+            if recycled and await self._reserve(recycled):
+                logger.info(f"Reusing released pin {recycled}")
+                return recycled
+            for _ in range(self.max_attempts):
+                game_pin = self._random_pin()
+                if await self._reserve(game_pin):
+                    return game_pin
+        except Exception as e:
+            if fallback_exists is None:
+                raise
+            logger.warning(f"Pin reservation in Redis failed, checking the database: {e}")
+            game_pin = self._random_pin()
+            while await fallback_exists(game_pin):
+                game_pin = self._random_pin()
+            return game_pin
+
+        raise RuntimeError(f"Could not reserve a free pin in {self.max_attempts} attempts")
+
+    async def release(self, game_pin: str):
+        """Return a finished game's PIN to the pool after the reuse delay"""
+        try:
+            await self.connection_manager.connect_to_redis()
+            async with self.connection_manager.redis.pipeline(transaction=True) as pipe:
+                pipe.zadd(FREE_PINS_KEY, {game_pin: time.time() + PIN_REUSE_DELAY})
+                pipe.expire(self._reservation_key(game_pin), PIN_REUSE_DELAY)
+                with REDIS_LATENCY.time(operation="release_pin"):
+                    await pipe.execute()
+        except Exception as e:
+            logger.error(f"Error releasing pin {game_pin}: {e}")
+
+
+# Singleton instance
+_pin_allocator = None
+
+
+def get_pin_allocator() -> PinAllocator:
+    """Get the global PIN allocator instance"""
+    global _pin_allocator
+    if _pin_allocator is None:
+        _pin_allocator = PinAllocator()
+    return _pin_allocator
@@ -1,9 +1,18 @@
+import asyncio
 import json
 import os
-from openai import OpenAI
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import logging
+
+from openai import AsyncOpenAI
 from dotenv import load_dotenv
 
 load_dotenv()
+logger = logging.getLogger(__name__)
+
 SYSTEM_PROMPT = """
 You are a question generator for a quiz game.
 
@@ -50,40 +59,150 @@ Example output:
 """
 
 PERPLEXITY_API_KEY = os.getenv("PERPLEXITY_API_KEY")
+# Point at a local stub server to test without the real API
+LLM_BASE_URL = os.getenv("LLM_BASE_URL", "https://api.perplexity.ai")
+LLM_MODEL = os.getenv("LLM_MODEL", "sonar-pro")
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+QUESTION_CACHE_TTL = float(os.getenv("QUESTION_CACHE_TTL", "3600"))
+QUESTION_CACHE_SIZE = int(os.getenv("QUESTION_CACHE_SIZE", "256"))
+
+
+def normalize_topic(message: str) -> str:
+    """Cache key for a topic: case, spacing and trailing punctuation do not matter"""
+    return re.sub(r"\s+", " ", message).strip().strip(".!?").strip().lower()
+
+
+class QuestionCache:
+    """LRU cache of generated question sets whose entries expire after a TTL"""
+
+    def __init__(self, max_size: int = QUESTION_CACHE_SIZE, ttl: float = QUESTION_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: dict):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class QuestionGenerator:
+    """
+    Generates questions through one shared async client. Successful results
+    are cached per normalized topic, and concurrent requests for the same
+    topic share a single upstream call.
+    """
 
+    def __init__(
+        self,
+        client: Optional[AsyncOpenAI] = None,
+        cache: Optional[QuestionCache] = None,
+        model: str = LLM_MODEL,
+    ):
+        self.client = client
+        self.cache = cache or QuestionCache()
+        self.model = model
+        self.inflight: Dict[str, asyncio.Task] = {}
+        self.upstream_calls = 0
 
-def get_questions_response(message: str) -> dict:
+    def _get_client(self) -> AsyncOpenAI:
+        if self.client is None:
+            self.client = AsyncOpenAI(
+                api_key=PERPLEXITY_API_KEY,
+                base_url=LLM_BASE_URL,
+                timeout=LLM_TIMEOUT,
+            )
+        return self.client
 
-    messages = [
-        {"role": "system", "content": SYSTEM_PROMPT},
-        {"role": "user", "content": message},
-    ]
+    async def generate(self, message: str) -> dict:
+        key = normalize_topic(message)
+        cached = self.cache.get(key)
+        if cached is not None:
+            logger.debug(f"Question cache hit for topic {key!r}")
+            return cached
 
-    try:
-        client = OpenAI(
-            api_key=PERPLEXITY_API_KEY, base_url="https://api.perplexity.ai"
-        )
-        response = client.chat.completions.create(
-            model="sonar-pro", messages=messages, temperature=0.7
-        )
+        task = self.inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._generate_and_cache(key, message))
+            self.inflight[key] = task
+        # A caller going away must not cancel the call other callers wait on
+        return await asyncio.shield(task)
 
-        # Extract the JSON from the response
-        content = response.choices[0].message.content.strip()
+    async def _generate_and_cache(self, key: str, message: str) -> dict:
+        try:
+            result = await self._request(message)
+            if result["success"]:
+                self.cache.set(key, result)
+            return result
+        finally:
+            self.inflight.pop(key, None)
+
+    async def _request(self, message: str) -> dict:
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": message},
+        ]
 
-        # Try to parse as JSON
         try:
-            questions_data = json.loads(content)
-            return {
-                "success": True,
-                "data": questions_data,
-                "message": "Questions generated successfully",
-            }
-        except json.JSONDecodeError as e:
-            return {
-                "success": False,
-                "error": f"Invalid JSON response: {str(e)}",
-                "raw_content": content,
-            }
-
-    except Exception as e:
-        return {"success": False, "error": f"API call failed: {str(e)}"}
+            self.upstream_calls += 1
+            response = await self._get_client().chat.completions.create(
+                model=self.model, messages=messages, temperature=0.7
+            )
+
+            # Extract the JSON from the response
+            content = response.choices[0].message.content.strip()
+
+            # Try to parse as JSON
+            try:
+                questions_data = json.loads(content)
+                return {
+                    "success": True,
+                    "data": questions_data,
+                    "message": "Questions generated successfully",
+                }
+            except json.JSONDecodeError as e:
+                return {
+                    "success": False,
+                    "error": f"Invalid JSON response: {str(e)}",
+                    "raw_content": content,
+                }
+
+        except Exception as e:
+            return {"success": False, "error": f"API call failed: {str(e)}"}
+
+    async def close(self):
+        """Close the pooled HTTP connections of the shared client"""
+        if self.client is not None:
+            await self.client.close()
+            self.client = None
+
+
+# Singleton instance
+_question_generator = None
+
+
+def get_question_generator() -> QuestionGenerator:
+    """Get the global question generator instance"""
+    global _question_generator
+    if _question_generator is None:
+        _question_generator = QuestionGenerator()
+    return _question_generator
+
+
+async def get_questions_response(message: str) -> dict:
+    return await get_question_generator().generate(message)
@@ -0,0 +1,135 @@
+import hashlib
+import json
+from datetime import datetime, timezone
+from typing import Callable, Iterable, List, Optional
+import logging
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pydantic import ValidationError
+from pymongo import UpdateOne
+
+from app.database.database import get_question_collection
+from app.metrics import MONGO_LATENCY
+from app.models.question import Question, QuestionQuery
+from app.services.prompt_service import normalize_topic
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+QUESTION_FIELDS = {field: 1 for field in Question.model_fields}
+
+
+def fingerprint(question: Question) -> str:
+    """Identity of a question regardless of topic: its text and options"""
+    key = json.dumps(
+        [normalize_topic(question.question), [o.strip().lower() for o in question.options]]
+    )
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+class QuestionBank:
+    """
+    Persistent store of questions, each stored once (keyed by fingerprint)
+    with its topic and difficulty. Topic and difficulty lookups use the
+    compound index and free-text search uses the text index, so a quiz can be
+    assembled with one query.
+    """
+
+    def __init__(
+        self, collection_getter: Callable[[], AsyncIOMotorCollection] = get_question_collection
+    ):
+        self.collection_getter = collection_getter
+
+    async def add_questions(
+        self,
+        questions: Iterable,
+        topic: str,
+        difficulty: str = "medium",
+        source: str = "manual",
+    ) -> int:
+        """Store questions not already in the bank; returns how many were new"""
+        now = datetime.now(timezone.utc)
+        topic = normalize_topic(topic)
+        operations = []
+        for item in questions:
+            try:
+                question = item if isinstance(item, Question) else Question(**item)
+            except (TypeError, ValidationError) as e:
+                logger.warning(f"Skipping invalid question for topic {topic!r}: {e}")
+                continue
+            operations.append(
+                UpdateOne(
+                    {"fingerprint": fingerprint(question)},
+                    {
+                        "$setOnInsert": {
+                            **question.model_dump(),
+                            "topic": topic,
+                            "difficulty": difficulty,
+                            "source": source,
+                            "created_at": now,
+                        }
+                    },
+                    upsert=True,
+                )
+            )
+        if not operations:
+            return 0
+        with MONGO_LATENCY.time(operation="add_bank_questions"):
+            result = await self.collection_getter().bulk_write(operations, ordered=False)
+        added = getattr(result, "upserted_count", len(operations))
+        logger.info(f"Added {added} of {len(operations)} question(s) to the bank for {topic!r}")
+        return added
+
+    async def find(self, query: QuestionQuery) -> List[Question]:
+        """Questions matching a topic, difficulty and/or text search"""
+        match: dict = {}
+        if query.topic:
+            match["topic"] = normalize_topic(query.topic)
+        if query.difficulty:
+            match["difficulty"] = query.difficulty
+        if query.text:
+            match["$text"] = {"$search": query.text}
+
+        collection = self.collection_getter()
+        with MONGO_LATENCY.time(operation="find_bank_questions"):
+            if query.random:
+                cursor = collection.aggregate(
+                    [
+                        {"$match": match},
+                        {"$sample": {"size": query.limit}},
+                        {"$project": {"_id": 0, **QUESTION_FIELDS}},
+                    ]
+                )
+            elif query.text:
+                cursor = (
+                    collection.find(
+                        match,
+                        {"_id": 0, **QUESTION_FIELDS, "score": {"$meta": "textScore"}},
+                    )
+                    .sort([("score", {"$meta": "textScore"})])
+                    .limit(query.limit)
+                )
+            else:
+                cursor = collection.find(match, {"_id": 0, **QUESTION_FIELDS}).limit(
+                    query.limit
+                )
+            documents = await cursor.to_list(length=query.limit)
+        return [Question(**{k: d[k] for k in QUESTION_FIELDS}) for d in documents]
+
+    async def for_topic(self, topic: str, limit: int = 10) -> Optional[List[Question]]:
+        """A full quiz for a topic if the bank already holds enough questions"""
+        # Sampled, so repeated games on a popular topic get different questions
+        questions = await self.find(QuestionQuery(topic=topic, limit=limit, random=True))
+        return questions if len(questions) >= limit else None
+
+
+# Singleton instance
+_question_bank = None
+
+
+def get_question_bank() -> QuestionBank:
+    """Get the global question bank instance"""
+    global _question_bank
+    if _question_bank is None:
+        _question_bank = QuestionBank()
+    return _question_bank
@@ -0,0 +1,119 @@
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Allowance for the question frame and the answer to cross the network
+ANSWER_GRACE_MS = int(os.getenv("ANSWER_GRACE_MS", "500"))
+# Move on to the next question on its own once the answer window has closed
+AUTO_ADVANCE = os.getenv("AUTO_ADVANCE", "0").lower() in ("1", "true", "yes")
+# How long players see the answer before the next question when auto-advancing
+AUTO_ADVANCE_DELAY = float(os.getenv("AUTO_ADVANCE_DELAY", "5"))
+
+
+class QuestionTimer:
+    """
+    One scheduler for every game's deadlines. Each game has at most one
+    pending deadline; they are kept in a single heap ordered by due time,
+    and one task sleeps until the earliest of them instead of one sleeping
+    task per game. Replacing or cancelling a deadline leaves its heap entry
+    behind, and stale entries are skipped when they reach the top.
+
+    Deadlines are wall-clock times, like `current_question_start_time`, so a
+    game restored on another worker closes its question at the same moment.
+    """
+
+    def __init__(self):
+        self.heap: List[Tuple[float, int, str]] = []
+        # Game -> (sequence number of its live heap entry, callback)
+        self.pending: Dict[str, Tuple[int, Callable[[], Awaitable[None]]]] = {}
+        self.sequence = itertools.count()
+        self.wakeup = asyncio.Event()
+        self.timer_task: Optional[asyncio.Task] = None
+        self.running: Set[asyncio.Task] = set()  # Callbacks still in progress
+
+    def schedule(
+        self, game_pin: str, deadline: float, callback: Callable[[], Awaitable[None]]
+    ):
+        """Run `callback` at `deadline`, replacing the game's pending deadline"""
+        entry = next(self.sequence)
+        self.pending[game_pin] = (entry, callback)
+        heapq.heappush(self.heap, (deadline, entry, game_pin))
+        if self.timer_task is None or self.timer_task.done():
+            self.timer_task = asyncio.create_task(self._timer_loop())
+        elif self.heap[0][1] == entry:
+            # New earliest deadline: cut the current sleep short
+            self.wakeup.set()
+
+    def cancel(self, game_pin: str):
+        self.pending.pop(game_pin, None)
+
+    def _pop_due(self, now: float) -> List[Callable[[], Awaitable[None]]]:
+        due = []
+        while self.heap and self.heap[0][0] <= now:
+            _, entry, game_pin = heapq.heappop(self.heap)
+            pending = self.pending.get(game_pin)
+            if pending is not None and pending[0] == entry:
+                del self.pending[game_pin]
+                due.append(pending[1])
+        return due
+
+    def _drop_stale(self):
+        while self.heap:
+            _, entry, game_pin = self.heap[0]
+            pending = self.pending.get(game_pin)
+            if pending is not None and pending[0] == entry:
+                return
+            heapq.heappop(self.heap)
+
+    async def _timer_loop(self):
+        try:
+            while True:
+                self._drop_stale()
+                if not self.heap:
+                    return
+                delay = self.heap[0][0] - time.time()
+                if delay > 0:
+                    self.wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self.wakeup.wait(), delay)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                # A slow callback must not hold back the deadlines after it
+                for callback in self._pop_due(time.time()):
+                    task = asyncio.create_task(callback())
+                    self.running.add(task)
+                    task.add_done_callback(self._callback_done)
+        except asyncio.CancelledError:
+            pass
+
+    def _callback_done(self, task: asyncio.Task):
+        self.running.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Error in question timer callback: {task.exception()}")
+
+    async def close(self):
+        if self.timer_task is not None:
+            self.timer_task.cancel()
+            self.timer_task = None
+        for task in list(self.running):
+            task.cancel()
+
+
+# Singleton instance
+_question_timer = None
+
+
+def get_question_timer() -> QuestionTimer:
+    """Get the global question timer instance"""
+    global _question_timer
+    if _question_timer is None:
+        _question_timer = QuestionTimer()
+    return _question_timer
@@ -0,0 +1,200 @@
+import asyncio
+import os
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Callable, Dict, List, Optional
+import logging
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ReplaceOne
+
+from app.database.database import get_snapshot_collection
+from app.metrics import MONGO_LATENCY
+from app.models.runtime import GameState, PlayerState
+from app.services.game_registry import GameRegistry, get_game_registry
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_INTERVAL = float(os.getenv("SNAPSHOT_INTERVAL", "5"))
+# Snapshots older than this belong to games nobody is coming back to
+SNAPSHOT_MAX_AGE = int(os.getenv("SNAPSHOT_MAX_AGE", "3600"))
+# Upper bound on startup restore; games not restored by then load lazily
+RESTORE_TIMEOUT = float(os.getenv("RESTORE_TIMEOUT", "10"))
+RESTORE_BATCH_SIZE = int(os.getenv("RESTORE_BATCH_SIZE", "500"))
+
+STATUS_ORDER = {"waiting": 0, "in_progress": 1, "finished": 2, "abandoned": 2}
+# Statuses a game never leaves
+ENDED_STATUSES = ["finished", "abandoned"]
+
+
+def compact(game_pin: str, game_state: GameState) -> dict:
+    """
+    Everything about a live game that changes during play, in one small
+    document. Questions are left out: they never change and are read from
+    the game document on restore.
+    """
+    return {
+        "game_pin": game_pin,
+        "game_status": game_state.game_status,
+        "current_question_index": game_state.current_question_index,
+        "current_question_start_time": game_state.current_question_start_time,
+        "player_answers": {
+            question: dict(answers) for question, answers in game_state.player_answers.items()
+        },
+        "scores": [[player.nickname, player.score] for player in game_state.players],
+    }
+
+
+def apply_snapshot(game_state: GameState, snapshot: dict):
+    """
+    Bring a game state rebuilt from the game document up to a snapshot.
+    Whichever source is further ahead wins: scores only grow, and the
+    question index and status only move forward.
+    """
+    if STATUS_ORDER.get(snapshot["game_status"], 0) > STATUS_ORDER.get(
+        game_state.game_status, 0
+    ):
+        game_state.game_status = snapshot["game_status"]
+
+    index = snapshot["current_question_index"]
+    if index > game_state.current_question_index:
+        game_state.current_question_index = index
+        game_state.current_question_start_time = snapshot["current_question_start_time"]
+        game_state.player_answers = snapshot["player_answers"]
+    elif index == game_state.current_question_index:
+        for question, answers in snapshot["player_answers"].items():
+            game_state.player_answers.setdefault(question, {}).update(answers)
+
+    for nickname, score in snapshot["scores"]:
+        player = game_state.get_player(nickname)
+        if player is None:
+            game_state.add_player(PlayerState(nickname, score))
+        elif score > player.score:
+            player.score = score
+            game_state.leaderboard.set_score(nickname, score)
+
+
+class SnapshotManager:
+    """
+    Writes a compact snapshot of every live game in the registry every
+    `interval` seconds, skipping games unchanged since their last snapshot,
+    with one unordered bulk write per round. On startup the snapshots let
+    a restarted worker put its games back in memory in a few bulk reads
+    instead of one cold load per reconnecting socket.
+    """
+
+    def __init__(
+        self,
+        registry: Optional[GameRegistry] = None,
+        collection_getter: Callable[[], AsyncIOMotorCollection] = get_snapshot_collection,
+        interval: float = SNAPSHOT_INTERVAL,
+    ):
+        self.registry = registry or get_game_registry()
+        self.collection_getter = collection_getter
+        self.interval = interval
+        self.last_written: Dict[str, dict] = {}
+        self.snapshot_task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self.snapshot_task is None:
+            self.snapshot_task = asyncio.create_task(self._snapshot_loop())
+
+    async def _snapshot_loop(self):
+        try:
+            while True:
+                await asyncio.sleep(self.interval)
+                await self.save_all()
+        except asyncio.CancelledError:
+            pass
+
+    async def save_all(self) -> int:
+        """Snapshot every live game that changed; returns how many were written"""
+        now = datetime.now(timezone.utc)
+        operations = []
+        written = {}
+        for game_pin in self.registry.pins():
+            game_state = self.registry.get(game_pin)
+            if game_state is None:
+                continue
+            snapshot = compact(game_pin, game_state)
+            if self.last_written.get(game_pin) == snapshot:
+                continue
+            written[game_pin] = snapshot
+            operations.append(
+                ReplaceOne(
+                    {"game_pin": game_pin}, {**snapshot, "taken_at": now}, upsert=True
+                )
+            )
+        if not operations:
+            return 0
+        try:
+            with MONGO_LATENCY.time(operation="save_snapshots"):
+                await self.collection_getter().bulk_write(operations, ordered=False)
+        except Exception as e:
+            logger.error(f"Error writing {len(operations)} game snapshot(s): {e}")
+            return 0
+        self.last_written.update(written)
+        # Forget games that have left the registry
+        for game_pin in [pin for pin in self.last_written if pin not in self.registry]:
+            del self.last_written[game_pin]
+        logger.debug(f"Wrote {len(operations)} game snapshot(s)")
+        return len(operations)
+
+    async def load(self, game_pin: str) -> Optional[dict]:
+        try:
+            with MONGO_LATENCY.time(operation="load_snapshot"):
+                return await self.collection_getter().find_one(
+                    {"game_pin": game_pin}, projection={"_id": 0}
+                )
+        except Exception as e:
+            logger.error(f"Error loading snapshot for game {game_pin}: {e}")
+            return None
+
+    async def discard(self, game_pin: str):
+        """Drop an ended game's snapshot so it is never restored"""
+        self.last_written.pop(game_pin, None)
+        try:
+            await self.collection_getter().delete_one({"game_pin": game_pin})
+        except Exception as e:
+            logger.error(f"Error deleting snapshot for game {game_pin}: {e}")
+
+    async def live_batches(
+        self, batch_size: int = RESTORE_BATCH_SIZE
+    ) -> AsyncIterator[List[dict]]:
+        """Recent snapshots of unfinished games, newest first, in batches"""
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=SNAPSHOT_MAX_AGE)
+        cursor = (
+            self.collection_getter()
+            .find(
+                {"game_status": {"$nin": ENDED_STATUSES}, "taken_at": {"$gte": cutoff}},
+                projection={"_id": 0},
+            )
+            .sort("taken_at", -1)
+        )
+        batch = []
+        async for snapshot in cursor:
+            batch.append(snapshot)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    async def close(self):
+        """Stop the periodic snapshots and take a final one"""
+        if self.snapshot_task is not None:
+            self.snapshot_task.cancel()
+            self.snapshot_task = None
+        await self.save_all()
+
+
+# Singleton instance
+_snapshot_manager = None
+
+
+def get_snapshot_manager() -> SnapshotManager:
+    """Get the global snapshot manager instance"""
+    global _snapshot_manager
+    if _snapshot_manager is None:
+        _snapshot_manager = SnapshotManager()
+    return _snapshot_manager
@@ -0,0 +1,221 @@
+import asyncio
+import copy
+import os
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+import logging
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from app.database.database import get_game_collection
+from app.metrics import MONGO_LATENCY
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+WRITE_BEHIND_INTERVAL_MS = int(os.getenv("WRITE_BEHIND_INTERVAL_MS", "250"))
+# Flushes in a row that may fail to reach the database before a game's
+# unwritten operations are dropped
+WRITE_BEHIND_MAX_RETRIES = int(os.getenv("WRITE_BEHIND_MAX_RETRIES", "20"))
+
+
+class GameWriteBuffer:
+    """Dirty fields of a single game waiting to be written to the database"""
+
+    def __init__(self):
+        self.sets: Dict[str, Any] = {}
+        self.player_sets: Dict[str, Dict[str, Any]] = {}
+        self.pushed_players: List[dict] = []
+        self._prefixes: Set[str] = set()
+        self._copied: Set[str] = set()
+
+    def is_empty(self) -> bool:
+        return not (self.sets or self.player_sets or self.pushed_players)
+
+    def set(self, path: str, value: Any):
+        """
+        Record a `$set` of a dotted path. Later writes win, and writes under a
+        path that is already dirty are folded into it so the final `$set`
+        never contains conflicting paths.
+        """
+        parts = path.split(".")
+        for depth in range(1, len(parts)):
+            ancestor = ".".join(parts[:depth])
+            if ancestor in self.sets:
+                if ancestor not in self._copied:
+                    # Never mutate a value the caller may still hold
+                    self.sets[ancestor] = copy.deepcopy(self.sets[ancestor])
+                    self._copied.add(ancestor)
+                container = self.sets[ancestor]
+                for part in parts[depth:-1]:
+                    container = container.setdefault(part, {})
+                container[parts[-1]] = value
+                return
+
+        if path in self._prefixes:
+            for key in [k for k in self.sets if k.startswith(path + ".")]:
+                del self.sets[key]
+
+        self.sets[path] = value
+        self._copied.discard(path)
+        for depth in range(1, len(parts)):
+            self._prefixes.add(".".join(parts[:depth]))
+
+    def set_player_fields(self, nickname: str, fields: Dict[str, Any]):
+        self.player_sets.setdefault(nickname, {}).update(fields)
+
+    def push_player(self, player_data: dict):
+        self.pushed_players.append(player_data)
+
+    def to_operations(self, game_pin: str) -> List[UpdateOne]:
+        """
+        Turn the buffered changes into an ordered list of bulk operations.
+        Every operation is idempotent, so a batch that failed part way can be
+        written again: a player is only pushed if not in the array yet.
+        """
+        operations = []
+        for player_data in self.pushed_players:
+            operations.append(
+                UpdateOne(
+                    {"game_pin": game_pin, "players.nickname": {"$ne": player_data["nickname"]}},
+                    {"$push": {"players": player_data}},
+                )
+            )
+        if self.sets:
+            operations.append(UpdateOne({"game_pin": game_pin}, {"$set": self.sets}))
+        for nickname, fields in self.player_sets.items():
+            operations.append(
+                UpdateOne(
+                    {"game_pin": game_pin, "players.nickname": nickname},
+                    {"$set": {f"players.$.{k}": v for k, v in fields.items()}},
+                )
+            )
+        return operations
+
+
+class WriteBehindManager:
+    """
+    Coalesces game state writes per game and persists them with one bulk
+    write every `flush_interval_ms`, or sooner when a caller flushes at a
+    question boundary, game end or shutdown.
+    """
+
+    def __init__(
+        self,
+        collection_getter: Callable[[], AsyncIOMotorCollection] = get_game_collection,
+        flush_interval_ms: int = WRITE_BEHIND_INTERVAL_MS,
+    ):
+        self.collection_getter = collection_getter
+        self.flush_interval = flush_interval_ms / 1000
+        self.buffers: Dict[str, GameWriteBuffer] = {}
+        self.flush_locks: Dict[str, asyncio.Lock] = {}
+        # Game -> (operations a failed flush left unwritten, failures in a row)
+        self.retries: Dict[str, Tuple[List[UpdateOne], int]] = {}
+        self.flush_task: Optional[asyncio.Task] = None
+
+    def _buffer(self, game_pin: str) -> GameWriteBuffer:
+        buffer = self.buffers.get(game_pin)
+        if buffer is None:
+            buffer = self.buffers[game_pin] = GameWriteBuffer()
+        self._ensure_flush_loop()
+        return buffer
+
+    def _ensure_flush_loop(self):
+        if self.flush_task is None or self.flush_task.done():
+            self.flush_task = asyncio.create_task(self._flush_loop())
+
+    def set_fields(self, game_pin: str, update_data: Dict[str, Any]):
+        """Queue a `$set` on the game document"""
+        buffer = self._buffer(game_pin)
+        for path, value in update_data.items():
+            buffer.set(path, value)
+
+    def set_player_fields(self, game_pin: str, nickname: str, fields: Dict[str, Any]):
+        """Queue a `$set` on one entry of the game's players array"""
+        self._buffer(game_pin).set_player_fields(nickname, fields)
+
+    def push_player(self, game_pin: str, player_data: dict):
+        """Queue appending a player to the game's players array"""
+        self._buffer(game_pin).push_player(player_data)
+
+    async def flush(self, game_pin: str):
+        """
+        Write everything buffered for a game in a single bulk write. An
+        operation the database rejects is logged and skipped, and the rest
+        are written; if the database cannot be reached, the operations not
+        yet written are retried, ahead of newer ones, on the next flush.
+        """
+        lock = self.flush_locks.setdefault(game_pin, asyncio.Lock())
+        async with lock:
+            buffer = self.buffers.pop(game_pin, None)
+            operations, failures = self.retries.pop(game_pin, ([], 0))
+            if buffer is not None:
+                operations = operations + buffer.to_operations(game_pin)
+            if not operations:
+                return
+            try:
+                while operations:
+                    try:
+                        with MONGO_LATENCY.time(operation="write_behind_flush"):
+                            await self.collection_getter().bulk_write(operations, ordered=True)
+                        logger.debug(f"Flushed {len(operations)} write(s) for game {game_pin}")
+                        operations = []
+                    except BulkWriteError as e:
+                        # Ordered: everything before the first error was written
+                        error = e.details["writeErrors"][0]
+                        index = error["index"]
+                        logger.error(
+                            f"Skipping write for game {game_pin} rejected by the database: "
+                            f"{error.get('errmsg')} ({operations[index]})"
+                        )
+                        operations = operations[index + 1 :]
+            except Exception as e:
+                failures += 1
+                if failures >= WRITE_BEHIND_MAX_RETRIES:
+                    logger.error(
+                        f"Dropping {len(operations)} write(s) for game {game_pin} "
+                        f"after {failures} failed flushes: {e}"
+                    )
+                    return
+                logger.error(f"Error flushing writes for game {game_pin}, will retry: {e}")
+                self.retries[game_pin] = (operations, failures)
+
+    async def close_game(self, game_pin: str):
+        """Flush a finished game and drop its bookkeeping"""
+        await self.flush(game_pin)
+        self.flush_locks.pop(game_pin, None)
+
+    async def flush_all(self):
+        """Flush every game with pending writes"""
+        pins = set(self.buffers) | set(self.retries)
+        if pins:
+            await asyncio.gather(*(self.flush(pin) for pin in pins))
+
+    async def _flush_loop(self):
+        try:
+            while True:
+                await asyncio.sleep(self.flush_interval)
+                await self.flush_all()
+        except asyncio.CancelledError:
+            pass
+
+    async def close(self):
+        """Stop the periodic flush and persist anything still buffered"""
+        if self.flush_task is not None:
+            self.flush_task.cancel()
+            self.flush_task = None
+        await self.flush_all()
+        logger.info("Write-behind buffers flushed")
+
+
+# Singleton instance
+_write_behind_manager = None
+
+
+def get_write_behind() -> WriteBehindManager:
+    """Get the global write-behind manager instance"""
+    global _write_behind_manager
+    if _write_behind_manager is None:
+        _write_behind_manager = WriteBehindManager()
+    return _write_behind_manager
@@ -0,0 +1,104 @@
+"""
+Wire formats for WebSocket frames. Clients that offer the
+`quizblitz.msgpack` subprotocol get MessagePack binary frames; everyone
+else, including clients that offer no subprotocol at all, gets JSON text.
+Inbound frames are decoded by frame type, so a client may always fall back
+to sending JSON text.
+"""
+
+import json
+from typing import Any, Union
+
+import msgpack
+from fastapi import WebSocket, WebSocketDisconnect
+
+JSON = "json"
+MSGPACK = "msgpack"
+
+JSON_SUBPROTOCOL = "quizblitz.json"
+MSGPACK_SUBPROTOCOL = "quizblitz.msgpack"
+
+# Where the negotiated codec is kept on the connection's ASGI scope
+CODEC_SCOPE_KEY = "quizblitz.codec"
+
+
+class Frame:
+    """
+    One outbound message, encoded at most once per wire format however many
+    sockets it is sent to.
+    """
+
+    __slots__ = ("message", "_text", "_packed")
+
+    def __init__(self, message: Union[dict, str]):
+        if isinstance(message, str):
+            self.message = None
+            self._text = message
+        else:
+            self.message = message
+            self._text = None
+        self._packed = None
+
+    @classmethod
+    def of(cls, message: Union[dict, str, "Frame"]) -> "Frame":
+        return message if isinstance(message, Frame) else cls(message)
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = json.dumps(self.message)
+        return self._text
+
+    @property
+    def packed(self) -> bytes:
+        if self._packed is None:
+            message = self.message if self.message is not None else json.loads(self._text)
+            self._packed = msgpack.packb(message, use_bin_type=True)
+        return self._packed
+
+    def encode(self, codec: str) -> Union[str, bytes]:
+        return self.packed if codec == MSGPACK else self.text
+
+
+def codec_of(websocket: WebSocket) -> str:
+    return websocket.scope.get(CODEC_SCOPE_KEY, JSON)
+
+
+async def accept(websocket: WebSocket):
+    """Accept a socket in the best wire format both sides support"""
+    offered = websocket.scope.get("subprotocols") or []
+    codec, subprotocol = JSON, None
+    if MSGPACK_SUBPROTOCOL in offered:
+        codec, subprotocol = MSGPACK, MSGPACK_SUBPROTOCOL
+    elif JSON_SUBPROTOCOL in offered:
+        subprotocol = JSON_SUBPROTOCOL
+    websocket.scope[CODEC_SCOPE_KEY] = codec
+    await websocket.accept(subprotocol=subprotocol)
+
+
+async def send(websocket: WebSocket, message: Union[dict, str, Frame]):
+    """Send a message in the socket's wire format"""
+    data = Frame.of(message).encode(codec_of(websocket))
+    if isinstance(data, bytes):
+        await websocket.send_bytes(data)
+    else:
+        await websocket.send_text(data)
+
+
+async def receive(websocket: WebSocket) -> Union[str, bytes]:
+    """The next text or binary frame, undecoded"""
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000), message.get("reason"))
+    text = message.get("text")
+    return text if text is not None else message.get("bytes", b"")
+
+
+def decode(data: Union[str, bytes]) -> Any:
+    """Parse a frame; raises ValueError if it is not valid in its format"""
+    if isinstance(data, str):
+        return json.loads(data)
+    try:
+        return msgpack.unpackb(data, raw=False)
+    except Exception as e:
+        raise ValueError(f"Invalid MessagePack frame: {e}") from e
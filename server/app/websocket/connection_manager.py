@@ -1,15 +1,30 @@
-import json
 import asyncio
-from typing import Dict, List, Optional, Set
+import os
+import time
+from typing import Dict, List, Optional, Set, Tuple, Union
 import logging
 from fastapi import WebSocket, WebSocketDisconnect
 from fastapi.websockets import WebSocketState
 import redis.asyncio as redis
 from redis.asyncio import Redis
 
+from app.metrics import (
+    BROADCAST_DURATION,
+    BROADCAST_FAILURES,
+    BROADCAST_FRAMES,
+    REDIS_LATENCY,
+)
+from app.websocket.codec import Frame, codec_of, send
+from app.websocket.heartbeat import HeartbeatScheduler
+from app.websocket.pubsub import CROSS_NODE_BROADCAST, GameEventBus
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# A game with no activity for this long is ended and evicted from memory;
+# its presence keys in Redis expire after the same time
+GAME_IDLE_TIMEOUT = int(os.getenv("GAME_IDLE_TIMEOUT", "7200"))
+
 
 class RedisConnectionManager:
     """
@@ -17,15 +32,33 @@ class RedisConnectionManager:
     This allows for distributed connection management across multiple server instances
     """
 
-    def __init__(self, redis_url: str = "redis://localhost:6379"):
+    def __init__(
+        self,
+        redis_url: str = "redis://localhost:6379",
+        broadcast_concurrency: int = 100,
+        send_timeout: float = 5.0,
+        cross_node_broadcast: bool = CROSS_NODE_BROADCAST,
+    ):
         """Initialize the connection manager with Redis connection"""
         self.redis_url = redis_url
+        self.broadcast_concurrency = broadcast_concurrency  # Max in-flight sends per broadcast
+        self.send_timeout = send_timeout  # Seconds before a single send is abandoned
+        self.last_broadcast_stats: Dict[str, dict] = {}
+        self.pending_player_registrations: Dict[str, Set[str]] = {}
+        self.registration_task: Optional[asyncio.Task] = None
         self.redis: Optional[Redis] = None
         self.active_connections: Dict[str, Dict[str, WebSocket]] = {}
         self.host_connections: Dict[str, WebSocket] = {}
-        self.heartbeat_tasks: Dict[str, Dict[str, asyncio.Task]] = (
-            {}
-        )  # Track heartbeat tasks
+        self.heartbeat = HeartbeatScheduler(
+            fan_out=self._fan_out, on_dead=self._close_dead_connection
+        )
+        self.heartbeat_keys: Dict[str, Set[str]] = {}  # Heartbeat keys per game
+        # Relays broadcasts to sockets held by other server instances
+        self.events: Optional[GameEventBus] = (
+            GameEventBus(redis_getter=self._get_redis, deliver=self._deliver_remote_event)
+            if cross_node_broadcast
+            else None
+        )
 
     async def connect_to_redis(self):
         """Connect to Redis if not already connected with retry logic"""
@@ -54,85 +87,92 @@ class RedisConnectionManager:
                         raise
                     await asyncio.sleep(1)  # Wait before retrying
 
-    async def start_heartbeat(self, game_pin: str, is_host: bool, nickname: str = None):
-        """Start heartbeat for a connection to keep it alive"""
-        key = f"host:{game_pin}" if is_host else f"player:{game_pin}:{nickname}"
+    async def _get_redis(self) -> Redis:
+        await self.connect_to_redis()
+        return self.redis
 
-        # Initialize heartbeat tracking for this game if not exists
-        if game_pin not in self.heartbeat_tasks:
-            self.heartbeat_tasks[game_pin] = {}
+    async def _subscribe_game(self, game_pin: str):
+        """Listen for other nodes' events once this node holds a socket for the game"""
+        if self.events is not None:
+            await self.events.subscribe(game_pin)
 
-        # Create and track the heartbeat task
-        task = asyncio.create_task(self._heartbeat_loop(game_pin, is_host, nickname))
-        self.heartbeat_tasks[game_pin][key] = task
+    def _release_game_channel(self, game_pin: str):
+        """Stop listening for a game once no socket for it is left on this node"""
+        if self.events is None:
+            return
+        if game_pin in self.host_connections or self.active_connections.get(game_pin):
+            return
+        asyncio.create_task(self.events.unsubscribe(game_pin))
 
-    async def _heartbeat_loop(self, game_pin: str, is_host: bool, nickname: str = None):
-        """Send periodic pings to keep the connection alive"""
-        try:
-            while True:
-                await asyncio.sleep(25)  # Send ping every 25 seconds
+    @staticmethod
+    def _heartbeat_key(game_pin: str, is_host: bool, nickname: str = None) -> str:
+        return f"host:{game_pin}" if is_host else f"player:{game_pin}:{nickname}"
 
-                try:
-                    if is_host:
-                        host_ws = self.get_host_connection(game_pin)
-                        if host_ws:
-                            await host_ws.send_text(json.dumps({"type": "ping"}))
-                    else:
-                        player_ws = self.get_player_connection(game_pin, nickname)
-                        if player_ws:
-                            await player_ws.send_text(json.dumps({"type": "ping"}))
-                except Exception as e:
-                    logger.debug(
-                        f"Heartbeat failed for {'host' if is_host else f'player {nickname}'} in game {game_pin}: {e}"
-                    )
-                    # Allow the loop to continue and try again until the task is cancelled
-        except asyncio.CancelledError:
-            logger.debug(
-                f"Heartbeat canceled for {'host' if is_host else f'player {nickname}'} in game {game_pin}"
-            )
-        except Exception as e:
-            logger.error(
-                f"Error in heartbeat for {'host' if is_host else f'player {nickname}'} in game {game_pin}: {e}"
-            )
+    async def start_heartbeat(self, game_pin: str, is_host: bool, nickname: str = None):
+        """Start heartbeat for a connection to keep it alive"""
+        websocket = (
+            self.host_connections.get(game_pin)
+            if is_host
+            else self.active_connections.get(game_pin, {}).get(nickname)
+        )
+        if websocket is None:
+            return
+        key = self._heartbeat_key(game_pin, is_host, nickname)
+        self.heartbeat.add(key, websocket)
+        self.heartbeat_keys.setdefault(game_pin, set()).add(key)
 
     def stop_heartbeat(self, game_pin: str, is_host: bool, nickname: str = None):
         """Stop heartbeat for a connection"""
-        if game_pin in self.heartbeat_tasks:
-            key = f"host:{game_pin}" if is_host else f"player:{game_pin}:{nickname}"
-            if key in self.heartbeat_tasks[game_pin]:
-                self.heartbeat_tasks[game_pin][key].cancel()
-                del self.heartbeat_tasks[game_pin][key]
+        key = self._heartbeat_key(game_pin, is_host, nickname)
+        self.heartbeat.remove(key)
+        if game_pin in self.heartbeat_keys:
+            self.heartbeat_keys[game_pin].discard(key)
+            # Clean up if no more heartbeats for this game
+            if not self.heartbeat_keys[game_pin]:
+                del self.heartbeat_keys[game_pin]
+
+    def mark_alive(self, game_pin: str, is_host: bool, nickname: str = None):
+        """Record that a connection answered a ping or sent any other frame"""
+        self.heartbeat.mark_alive(self._heartbeat_key(game_pin, is_host, nickname))
+
+    def _close_dead_connection(self, key: str, websocket: WebSocket):
+        """Close a socket that stopped answering heartbeats so its receive loop ends"""
+        logger.warning(f"Closing dead connection {key}")
+
+        async def close():
+            try:
+                await websocket.close(code=1001)
+            except Exception as e:
+                logger.debug(f"Error closing dead connection {key}: {e}")
 
-                # Clean up if no more heartbeats for this game
-                if not self.heartbeat_tasks[game_pin]:
-                    del self.heartbeat_tasks[game_pin]
+        asyncio.create_task(close())
 
     async def register_host(self, game_pin: str, websocket: WebSocket) -> bool:
         """Register a host connection for a game"""
         await self.connect_to_redis()
-
-        # Check if host already exists in Redis
-        host_exists = await self.redis.exists(f"host:{game_pin}")
-        if host_exists:
-            # Check if the host is still active in our local tracking
-            if (
-                game_pin in self.host_connections
-                and self.host_connections[game_pin].client_state == 1
-            ):
+        host_key = f"host:{game_pin}"
+
+        # Only a host that is still active locally can block this registration,
+        # so Redis is only asked about the key in that case
+        local_host = self.host_connections.get(game_pin)
+        if local_host is not None and local_host.client_state == WebSocketState.CONNECTED:
+            with REDIS_LATENCY.time(operation="host_exists"):
+                host_exists = await self.redis.exists(host_key)
+            if host_exists:
                 logger.warning(f"Host already connected for game {game_pin}")
                 return False
-            else:
-                # Host exists in Redis but not active locally, clean up
-                await self.redis.delete(f"host:{game_pin}")
 
         # Store host connection locally
         self.host_connections[game_pin] = websocket
 
-        # Store in Redis with expiration (e.g., 2 hours)
-        await self.redis.set(f"host:{game_pin}", "connected", ex=7200)
+        # Store in Redis with expiration (e.g., 2 hours). SET replaces any stale
+        # entry left by a previous host, so no separate delete is needed.
+        with REDIS_LATENCY.time(operation="register_host"):
+            await self.redis.set(host_key, "connected", ex=GAME_IDLE_TIMEOUT)
 
         # Start heartbeat for host
         await self.start_heartbeat(game_pin, is_host=True)
+        await self._subscribe_game(game_pin)
 
         logger.info(f"Host registered for game {game_pin}")
         return True
@@ -144,6 +184,7 @@ class RedisConnectionManager:
 
         if game_pin in self.host_connections:
             del self.host_connections[game_pin]
+        self._release_game_channel(game_pin)
 
         # Schedule Redis cleanup to run asynchronously
         asyncio.create_task(self._remove_host_from_redis(game_pin))
@@ -152,7 +193,8 @@ class RedisConnectionManager:
         """Remove host from Redis storage"""
         try:
             await self.connect_to_redis()
-            await self.redis.delete(f"host:{game_pin}")
+            with REDIS_LATENCY.time(operation="remove_host"):
+                await self.redis.delete(f"host:{game_pin}")
             logger.info(f"Host removed for game {game_pin}")
         except Exception as e:
             logger.error(f"Error removing host from Redis for game {game_pin}: {e}")
@@ -187,16 +229,61 @@ class RedisConnectionManager:
         # Store the connection
         self.active_connections[game_pin][nickname] = websocket
 
-        # Store in Redis with expiration (e.g., 2 hours)
-        await self.redis.hset(f"players:{game_pin}", nickname, "connected")
-        await self.redis.expire(f"players:{game_pin}", 7200)
+        # Store in Redis, sharing one pipeline with every join in this tick
+        self.pending_player_registrations.setdefault(game_pin, set()).add(nickname)
+        if self.registration_task is None:
+            self.registration_task = asyncio.create_task(
+                self._flush_player_registrations()
+            )
+        await asyncio.shield(self.registration_task)
 
         # Start heartbeat for player
         await self.start_heartbeat(game_pin, is_host=False, nickname=nickname)
+        await self._subscribe_game(game_pin)
 
         logger.info(f"Player {nickname} registered for game {game_pin}")
         return True
 
+    async def register_players(
+        self, game_pin: str, players: Dict[str, WebSocket]
+    ) -> bool:
+        """Register many player connections for a game with one Redis pipeline"""
+        await self.connect_to_redis()
+
+        self.active_connections.setdefault(game_pin, {}).update(players)
+        await self._write_player_registrations({game_pin: set(players)})
+
+        for nickname in players:
+            await self.start_heartbeat(game_pin, is_host=False, nickname=nickname)
+        await self._subscribe_game(game_pin)
+
+        logger.info(f"Registered {len(players)} players for game {game_pin}")
+        return True
+
+    async def _flush_player_registrations(self):
+        """Write every registration queued during the current tick"""
+        # Let the remaining handshakes of this tick join the batch
+        await asyncio.sleep(0)
+        batch = self.pending_player_registrations
+        self.pending_player_registrations = {}
+        self.registration_task = None
+        await self._write_player_registrations(batch)
+
+    async def _write_player_registrations(self, batch: Dict[str, Set[str]]):
+        """Store players in Redis with expiration (e.g., 2 hours) in one round trip"""
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for game_pin, nicknames in batch.items():
+                pipe.hset(
+                    f"players:{game_pin}",
+                    mapping={nickname: "connected" for nickname in nicknames},
+                )
+                pipe.expire(f"players:{game_pin}", GAME_IDLE_TIMEOUT)
+            with REDIS_LATENCY.time(operation="register_players"):
+                await pipe.execute()
+        logger.debug(
+            f"Pipelined {sum(len(n) for n in batch.values())} player registrations"
+        )
+
     def remove_player(self, game_pin: str, nickname: str):
         """Remove a player connection"""
         # Stop heartbeat first
@@ -211,6 +298,7 @@ class RedisConnectionManager:
             # If no more players in this game, clean up
             if not self.active_connections[game_pin]:
                 del self.active_connections[game_pin]
+                self._release_game_channel(game_pin)
 
         # Schedule Redis cleanup to run asynchronously
         asyncio.create_task(self._remove_player_from_redis(game_pin, nickname))
@@ -219,7 +307,8 @@ class RedisConnectionManager:
         """Remove player from Redis storage"""
         try:
             await self.connect_to_redis()
-            await self.redis.hdel(f"players:{game_pin}", nickname)
+            with REDIS_LATENCY.time(operation="remove_player"):
+                await self.redis.hdel(f"players:{game_pin}", nickname)
             logger.info(f"Player {nickname} removed from game {game_pin}")
         except Exception as e:
             logger.error(f"Error removing player from Redis for game {game_pin}: {e}")
@@ -276,7 +365,8 @@ class RedisConnectionManager:
         """Get list of all players in a game from Redis"""
         try:
             await self.connect_to_redis()
-            players = await self.redis.hkeys(f"players:{game_pin}")
+            with REDIS_LATENCY.time(operation="get_player_list"):
+                players = await self.redis.hkeys(f"players:{game_pin}")
             return players
         except Exception as e:
             logger.error(
@@ -284,73 +374,185 @@ class RedisConnectionManager:
             )
             return []
 
-    async def broadcast_to_host(self, game_pin: str, message: dict):
-        """Send a message to the host of a game"""
-        host_ws = self.get_host_connection(game_pin)
-        print("HOST WS", host_ws)
-        if host_ws:
-            try:
-                await host_ws.send_text(json.dumps(message))
-                logger.debug(
-                    f"Message sent to host of game {game_pin}: {message['type']}"
-                )
-            except WebSocketDisconnect:
-                logger.info(
-                    f"Host disconnected while sending message for game {game_pin}"
-                )
-                self.remove_host(game_pin)
-            except Exception as e:
-                logger.error(f"Error sending message to host: {e}")
-                # self.remove_host(game_pin)
+    async def broadcast_to_host(self, game_pin: str, message: Union[dict, str, Frame]):
+        """Send a message to the host of a game, wherever it is connected"""
+        frame = Frame.of(message)
+        if self.get_host_connection(game_pin):
+            await self._send_to_local_host(game_pin, frame)
+        elif self.events is not None:
+            # The host may be connected to another server instance
+            await self.events.publish(game_pin, "host", frame.text)
         else:
             logger.warning(f"No active host connection for game {game_pin}")
 
+    async def _send_to_local_host(self, game_pin: str, frame: Frame):
+        """Send a frame to the host if it is connected to this node"""
+        host_ws = self.get_host_connection(game_pin)
+        if not host_ws:
+            return
+        try:
+            await asyncio.wait_for(send(host_ws, frame), timeout=self.send_timeout)
+            logger.debug(f"Message sent to host of game {game_pin}")
+        except WebSocketDisconnect:
+            logger.info(f"Host disconnected while sending message for game {game_pin}")
+            self.remove_host(game_pin)
+        except asyncio.TimeoutError:
+            logger.warning(f"Timed out sending message to host of game {game_pin}")
+        except Exception as e:
+            logger.error(f"Error sending message to host: {e}")
+            # self.remove_host(game_pin)
+
+    async def _fan_out(
+        self, recipients: Dict[str, WebSocket], frame: Union[Frame, Dict[str, Frame]]
+    ) -> dict:
+        """
+        Send a frame to many sockets concurrently, encoded once per wire
+        format, or each recipient its own frame when `frame` is keyed by
+        nickname. At most `broadcast_concurrency` sends are in flight and each
+        one is bounded by `send_timeout`, so a slow client only delays itself.
+        Sockets whose send failed are closed.
+        """
+        personal = isinstance(frame, dict)
+        pending = iter(list(recipients.items()))
+        failed: List[str] = []
+        slowest = 0.0
+
+        async def worker():
+            nonlocal slowest
+            for nickname, websocket in pending:
+                started = time.perf_counter()
+                data = (frame[nickname] if personal else frame).encode(codec_of(websocket))
+                send_frame = (
+                    websocket.send_bytes if isinstance(data, bytes) else websocket.send_text
+                )
+                try:
+                    await asyncio.wait_for(send_frame(data), timeout=self.send_timeout)
+                except WebSocketDisconnect:
+                    logger.info(f"Player {nickname} disconnected while sending message")
+                    failed.append(nickname)
+                except asyncio.TimeoutError:
+                    logger.warning(
+                        f"Send to player {nickname} timed out after {self.send_timeout}s"
+                    )
+                    failed.append(nickname)
+                    # Dropped from the game, so its receive loop must end too
+                    self._close_dead_connection(nickname, websocket)
+                except Exception as e:
+                    logger.error(f"Error sending message to player {nickname}: {e}")
+                    failed.append(nickname)
+                    self._close_dead_connection(nickname, websocket)
+                slowest = max(slowest, time.perf_counter() - started)
+
+        started = time.perf_counter()
+        workers = min(self.broadcast_concurrency, len(recipients))
+        if workers:
+            await asyncio.gather(*(worker() for _ in range(workers)))
+
+        return {
+            "recipients": len(recipients),
+            "failures": len(failed),
+            "failed": failed,
+            "slowest_send": slowest,
+            "duration": time.perf_counter() - started,
+        }
+
     async def broadcast_to_players(
         self,
         game_pin: str,
-        message: dict,
+        message: Union[dict, str, Frame],
         exclude_nickname: str = None,
         exclude_websocket: WebSocket = None,
-    ):
+    ) -> dict:
         """Send a message to all players in a game, with optional exclusions"""
+        frame = Frame.of(message)
+        if self.events is not None:
+            # Other nodes fan the event out to the players connected to them
+            await self.events.publish(
+                game_pin, "players", frame.text, exclude=exclude_nickname
+            )
+        return await self._broadcast_to_local_players(
+            game_pin, frame, exclude_nickname, exclude_websocket
+        )
+
+    async def _broadcast_to_local_players(
+        self,
+        game_pin: str,
+        frame: Frame,
+        exclude_nickname: str = None,
+        exclude_websocket: WebSocket = None,
+    ) -> dict:
+        """Fan a frame out to the game's players connected to this node"""
         players = self.get_player_connections(game_pin)
-        print("Players are", players)
-        to_remove = []
+        recipients = {
+            nickname: websocket
+            for nickname, websocket in players.items()
+            if not (
+                (exclude_nickname and nickname == exclude_nickname)
+                or (exclude_websocket and websocket == exclude_websocket)
+            )
+        }
+
+        stats = await self._fan_out(recipients, frame)
+        self.last_broadcast_stats[game_pin] = stats
+        BROADCAST_DURATION.observe(stats["duration"])
+        BROADCAST_FRAMES.inc(stats["recipients"] - stats["failures"])
+        if stats["failures"]:
+            BROADCAST_FAILURES.inc(stats["failures"])
+
+        log = logger.warning if stats["failures"] else logger.debug
+        log(
+            f"Broadcast to game {game_pin}: recipients={stats['recipients']} "
+            f"failures={stats['failures']} slowest={stats['slowest_send'] * 1000:.1f}ms "
+            f"total={stats['duration'] * 1000:.1f}ms"
+        )
 
-        for nickname, websocket in players.items():
-            if (exclude_nickname and nickname == exclude_nickname) or (
-                exclude_websocket and websocket == exclude_websocket
-            ):
-                continue
+        # Clean up disconnected players
+        for nickname in stats["failed"]:
+            self.remove_player(game_pin, nickname)
 
-            try:
-                await websocket.send_text(json.dumps(message))
-            except WebSocketDisconnect:
-                logger.info(f"Player {nickname} disconnected while sending message")
-                to_remove.append(nickname)
-            except Exception as e:
-                logger.error(f"Error sending message to player {nickname}: {e}")
-                to_remove.append(nickname)
+        return stats
 
-        # Clean up disconnected players
-        for nickname in to_remove:
+    async def send_to_players(self, game_pin: str, messages: Dict[str, Union[dict, Frame]]) -> dict:
+        """
+        Send each player connected to this node its own message. Not relayed to
+        other nodes: with WORKER_AFFINITY every socket of a game is on its owner
+        """
+        players = self.get_player_connections(game_pin)
+        recipients = {
+            nickname: players[nickname] for nickname in messages if nickname in players
+        }
+        frames = {nickname: Frame.of(messages[nickname]) for nickname in recipients}
+        stats = await self._fan_out(recipients, frames)
+        BROADCAST_FRAMES.inc(stats["recipients"] - stats["failures"])
+        if stats["failures"]:
+            BROADCAST_FAILURES.inc(stats["failures"])
+        for nickname in stats["failed"]:
             self.remove_player(game_pin, nickname)
+        return stats
 
-    async def broadcast_to_all(self, game_pin: str, message: dict):
+    async def broadcast_to_all(self, game_pin: str, message: Union[dict, str, Frame]):
         """Send a message to all participants (host and players) in a game"""
-        # Send to host
-        await self.broadcast_to_host(game_pin, message)
+        frame = Frame.of(message)
+        await asyncio.gather(
+            self.broadcast_to_host(game_pin, frame),
+            self.broadcast_to_players(game_pin, frame),
+        )
 
-        # Send to all players
-        await self.broadcast_to_players(game_pin, message)
+    async def _deliver_remote_event(self, game_pin: str, event: dict):
+        """Hand an event published by another node to this node's sockets"""
+        frame = Frame(event["frame"])
+        if event["target"] == "host":
+            await self._send_to_local_host(game_pin, frame)
+        elif self.active_connections.get(game_pin):
+            await self._broadcast_to_local_players(
+                game_pin, frame, exclude_nickname=event.get("exclude")
+            )
 
     def cleanup_game(self, game_pin: str):
         """Remove all connections for a game"""
         # Clean up heartbeats
-        if game_pin in self.heartbeat_tasks:
-            for task in self.heartbeat_tasks[game_pin].values():
-                task.cancel()
-            del self.heartbeat_tasks[game_pin]
+        for key in self.heartbeat_keys.pop(game_pin, set()):
+            self.heartbeat.remove(key)
 
         # Clean up host
         if game_pin in self.host_connections:
@@ -360,6 +562,9 @@ class RedisConnectionManager:
         if game_pin in self.active_connections:
             del self.active_connections[game_pin]
 
+        self.last_broadcast_stats.pop(game_pin, None)
+        self._release_game_channel(game_pin)
+
         # Schedule Redis cleanup to run asynchronously
         asyncio.create_task(self._cleanup_game_from_redis(game_pin))
 
@@ -367,12 +572,18 @@ class RedisConnectionManager:
         """Remove all game data from Redis"""
         try:
             await self.connect_to_redis()
-            await self.redis.delete(f"host:{game_pin}")
-            await self.redis.delete(f"players:{game_pin}")
+            with REDIS_LATENCY.time(operation="cleanup_game"):
+                await self.redis.delete(f"host:{game_pin}", f"players:{game_pin}")
             logger.info(f"Cleaned up game {game_pin} from Redis")
         except Exception as e:
             logger.error(f"Error cleaning up game from Redis: {e}")
 
+    def connection_counts(self) -> Tuple[int, int, int]:
+        """Games, hosts and players connected to this process"""
+        games = len(self.host_connections.keys() | self.active_connections.keys())
+        players = sum(len(players) for players in self.active_connections.values())
+        return games, len(self.host_connections), players
+
     async def test_redis_connection(self) -> bool:
         """Test if Redis is reachable"""
         try:
@@ -0,0 +1,118 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+import logging
+from fastapi import WebSocket
+
+from app.metrics import HEARTBEAT_FAILURES
+from app.websocket.codec import Frame
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PING_FRAME = Frame({"type": "ping"})
+
+
+class HeartbeatScheduler:
+    """
+    Single timer wheel that pings every connection of the process.
+    The wheel has one slot per tick of the heartbeat interval; a connection
+    lives in one slot and is pinged each time the wheel passes it, together
+    with every other connection in that slot. Connections that miss
+    `max_missed` pongs in a row, or whose ping fails, are reported dead.
+    """
+
+    def __init__(
+        self,
+        fan_out: Callable[[Dict[str, WebSocket], Frame], Awaitable[dict]],
+        on_dead: Callable[[str, WebSocket], None],
+        interval: float = 25.0,
+        tick: float = 1.0,
+        max_missed: int = 3,
+    ):
+        self.fan_out = fan_out
+        self.on_dead = on_dead
+        self.tick = tick
+        self.max_missed = max_missed
+        self.slot_count = max(1, int(round(interval / tick)))
+        self.slots: List[Set[str]] = [set() for _ in range(self.slot_count)]
+        self.cursor = 0
+        self.connections: Dict[str, WebSocket] = {}
+        self.slot_of: Dict[str, int] = {}
+        self.missed: Dict[str, int] = {}
+        self.failures = 0
+        self.task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self.connections)
+
+    def add(self, key: str, websocket: WebSocket):
+        """Track a connection; its first ping is one interval away"""
+        self.remove(key)
+        slot = (self.cursor + self.slot_count - 1) % self.slot_count
+        self.slots[slot].add(key)
+        self.slot_of[key] = slot
+        self.connections[key] = websocket
+        self.missed[key] = 0
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+
+    def remove(self, key: str):
+        slot = self.slot_of.pop(key, None)
+        if slot is not None:
+            self.slots[slot].discard(key)
+        self.connections.pop(key, None)
+        self.missed.pop(key, None)
+
+    def mark_alive(self, key: str):
+        """Record a pong (or any other inbound frame) from a connection"""
+        if key in self.missed:
+            self.missed[key] = 0
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        try:
+            while self.connections:
+                next_tick += self.tick
+                await asyncio.sleep(max(0.0, next_tick - loop.time()))
+                slot = self.cursor
+                self.cursor = (self.cursor + 1) % self.slot_count
+                if self.slots[slot]:
+                    # Don't let slow sends hold back the following slots
+                    asyncio.create_task(self._process_slot(slot))
+        except asyncio.CancelledError:
+            pass
+
+    async def _process_slot(self, slot: int):
+        due: Dict[str, WebSocket] = {}
+        for key in list(self.slots[slot]):
+            if self.missed[key] >= self.max_missed:
+                logger.info(f"Connection {key} missed {self.missed[key]} heartbeats")
+                self._mark_dead(key)
+                continue
+            self.missed[key] += 1
+            due[key] = self.connections[key]
+
+        if not due:
+            return
+        try:
+            stats = await self.fan_out(due, PING_FRAME)
+        except Exception as e:
+            logger.error(f"Error sending heartbeat batch: {e}")
+            return
+        for key in stats["failed"]:
+            if self.connections.get(key) is due[key]:
+                self._mark_dead(key)
+
+    def _mark_dead(self, key: str):
+        websocket = self.connections.get(key)
+        self.remove(key)
+        self.failures += 1
+        HEARTBEAT_FAILURES.inc()
+        if websocket is not None:
+            self.on_dead(key, websocket)
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
@@ -1,6 +1,6 @@
 from fastapi import Depends, FastAPI, WebSocket, WebSocketDisconnect
-import json
 from app.services.game_service import GameService, get_game_service
+from app.websocket import codec
 
 
 async def host_websocket(
@@ -8,13 +8,12 @@ async def host_websocket(
     game_pin: str,
     game_service: GameService = Depends(get_game_service),
 ):
-    await websocket.accept()
+    await codec.accept(websocket)
     try:
         print("YELLO")
         await game_service.connect_host(game_pin, websocket)
         while True:
-            data = await websocket.receive_text()
-            payload = json.loads(data)
+            payload = codec.decode(await codec.receive(websocket))
             action = payload.get("action")
             print("HEY, IT PASSED HERE")
             if action == "start_quiz":
@@ -1,21 +1,40 @@
-from fastapi import WebSocket, WebSocketDisconnect
-from fastapi import WebSocketDisconnect
-import json
-from app.services.game_service import GameService
+from typing import Optional
+from fastapi import WebSocket, WebSocketDisconnect, status
+from app.services.game_service import get_game_service
+from app.websocket import codec
+
+
+async def receive_nickname(websocket: WebSocket) -> Optional[str]:
+    """
+    The nickname a player opens with: plain text, or in the negotiated
+    binary format either the bare string or {"nickname": ...}
+    """
+    data = await codec.receive(websocket)
+    if isinstance(data, str):
+        return data
+    try:
+        message = codec.decode(data)
+    except ValueError:
+        return None
+    if isinstance(message, dict):
+        message = message.get("nickname")
+    return message if isinstance(message, str) else None
 
 
 async def player_websocket(websocket: WebSocket, game_pin: str):
-    await websocket.accept()
-    game_service = GameService()
-    nickname = await websocket.receive_text()
+    await codec.accept(websocket)
+    game_service = get_game_service()
+    nickname = await receive_nickname(websocket)
+    if not nickname:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
     connected = await game_service.connect_player(game_pin, websocket, nickname)
     if not connected:
         await websocket.close()
         return
     try:
         while True:
-            data = await websocket.receive_text()
-            payload = json.loads(data)
+            payload = codec.decode(await codec.receive(websocket))
             action = payload.get("action")
             if action == "submit_answer":
                 answer_index = payload.get("answer")
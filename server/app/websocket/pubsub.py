@@ -0,0 +1,190 @@
+import asyncio
+import json
+import os
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+import logging
+
+from redis.asyncio import Redis
+
+from app.metrics import REDIS_LATENCY
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Off by default: a single worker needs no cross-node delivery
+CROSS_NODE_BROADCAST = os.getenv("CROSS_NODE_BROADCAST", "0").lower() in ("1", "true", "yes")
+# Events queued for publishing before publishers have to wait for the flush
+PUBSUB_MAX_PENDING = int(os.getenv("PUBSUB_MAX_PENDING", "1000"))
+
+
+def game_channel(game_pin: str) -> str:
+    return f"game:{game_pin}:events"
+
+
+class GameEventBus:
+    """
+    Relays game events between server instances over one Redis channel per
+    game. Each event is published once, whatever the number of recipients,
+    and every node that holds sockets for the game fans it out locally.
+
+    Events queued in the same tick are coalesced into one message per game
+    and all games share one pipelined round trip. When more than
+    `max_pending` events are waiting, publishers wait for the flush instead
+    of buffering without bound.
+    """
+
+    def __init__(
+        self,
+        redis_getter: Callable[[], Awaitable[Redis]],
+        deliver: Callable[[str, dict], Awaitable[None]],
+        node_id: Optional[str] = None,
+        max_pending: int = PUBSUB_MAX_PENDING,
+    ):
+        self.redis_getter = redis_getter
+        self.deliver = deliver  # Sends a remote event to this node's sockets
+        self.node_id = node_id or uuid.uuid4().hex
+        self.max_pending = max_pending
+        self.pending: Dict[str, List[dict]] = {}
+        self.pending_count = 0
+        self.flush_task: Optional[asyncio.Task] = None
+        self.channels: Set[str] = set()
+        self.pubsub = None
+        self.reader_task: Optional[asyncio.Task] = None
+        # Game -> its latest delivery task
+        self.delivering: Dict[str, asyncio.Task] = {}
+        self.published = 0
+        self.received = 0
+
+    async def publish(
+        self, game_pin: str, target: str, frame: str, exclude: Optional[str] = None
+    ):
+        """Queue an encoded frame for the game's `target` ("host" or "players") on other nodes"""
+        event = {"target": target, "frame": frame}
+        if exclude:
+            event["exclude"] = exclude
+        self.pending.setdefault(game_pin, []).append(event)
+        self.pending_count += 1
+        if self.flush_task is None:
+            self.flush_task = asyncio.create_task(self._flush())
+        if self.pending_count >= self.max_pending:
+            await asyncio.shield(self.flush_task)
+
+    async def _flush(self):
+        """Publish queued events until none are left"""
+        try:
+            # Let the rest of this tick's events join the batch
+            await asyncio.sleep(0)
+            while self.pending:
+                batch = self.pending
+                self.pending = {}
+                self.pending_count = 0
+                try:
+                    redis = await self.redis_getter()
+                    async with redis.pipeline(transaction=False) as pipe:
+                        for game_pin, events in batch.items():
+                            pipe.publish(
+                                game_channel(game_pin),
+                                json.dumps({"origin": self.node_id, "events": events}),
+                            )
+                        with REDIS_LATENCY.time(operation="publish"):
+                            await pipe.execute()
+                    self.published += len(batch)
+                except Exception as e:
+                    logger.error(f"Error publishing events for {len(batch)} game(s): {e}")
+        finally:
+            self.flush_task = None
+
+    async def subscribe(self, game_pin: str):
+        """Receive other nodes' events for a game this node has sockets for"""
+        channel = game_channel(game_pin)
+        if channel in self.channels:
+            return
+        self.channels.add(channel)
+        try:
+            if self.pubsub is None:
+                self.pubsub = (await self.redis_getter()).pubsub()
+            await self.pubsub.subscribe(channel)
+        except Exception as e:
+            self.channels.discard(channel)
+            logger.error(f"Error subscribing to {channel}: {e}")
+            return
+        if self.reader_task is None:
+            self.reader_task = asyncio.create_task(self._read())
+
+    async def unsubscribe(self, game_pin: str):
+        channel = game_channel(game_pin)
+        if channel not in self.channels:
+            return
+        self.channels.discard(channel)
+        try:
+            await self.pubsub.unsubscribe(channel)
+        except Exception as e:
+            logger.error(f"Error unsubscribing from {channel}: {e}")
+
+    async def _read(self):
+        """Hand events published by other nodes to delivery tasks while subscribed"""
+        try:
+            while self.channels:
+                message = await self.pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=1.0
+                )
+                if not message or message.get("type") != "message":
+                    continue
+                try:
+                    envelope = json.loads(message["data"])
+                    if envelope.get("origin") == self.node_id:
+                        continue
+                    game_pin = message["channel"].split(":")[1]
+                    self.received += 1
+                    self._dispatch(game_pin, envelope.get("events", []))
+                except Exception as e:
+                    logger.error(f"Dropped malformed event message on {message.get('channel')}: {e}")
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"Game event reader stopped: {e}")
+        finally:
+            self.reader_task = None
+
+    def _dispatch(self, game_pin: str, events: List[dict]):
+        """
+        Deliver a message's events without holding up the reader. A game's
+        messages still reach its sockets in order: each delivery task waits
+        for the game's previous one.
+        """
+        previous = self.delivering.get(game_pin)
+        task = asyncio.create_task(self._deliver_events(game_pin, events, previous))
+        self.delivering[game_pin] = task
+        task.add_done_callback(lambda _: self._delivered(game_pin, task))
+
+    async def _deliver_events(
+        self, game_pin: str, events: List[dict], previous: Optional[asyncio.Task]
+    ):
+        if previous is not None:
+            await asyncio.wait([previous])
+        for event in events:
+            try:
+                await self.deliver(game_pin, event)
+            except Exception as e:
+                logger.error(f"Error delivering event for game {game_pin}: {e}")
+
+    def _delivered(self, game_pin: str, task: asyncio.Task):
+        if self.delivering.get(game_pin) is task:
+            del self.delivering[game_pin]
+
+    async def close(self):
+        if self.reader_task is not None:
+            self.reader_task.cancel()
+        for task in self.delivering.values():
+            task.cancel()
+        self.delivering.clear()
+        if self.flush_task is not None:
+            await asyncio.shield(self.flush_task)
+        if self.pubsub is not None:
+            try:
+                await self.pubsub.aclose()
+            except Exception as e:
+                logger.debug(f"Error closing pubsub connection: {e}")
+            self.pubsub = None
+        self.channels.clear()
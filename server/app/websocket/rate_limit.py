@@ -0,0 +1,109 @@
+import os
+import time
+from typing import Dict, Optional, Tuple, Union
+
+from app.metrics import WS_DROPPED, WS_FRAMES
+from app.websocket.codec import decode
+
+# Largest inbound frame accepted; every legitimate message is well under 1 KB
+WS_MAX_FRAME_BYTES = int(os.getenv("WS_MAX_FRAME_BYTES", "4096"))
+# Per-connection budget across all actions
+WS_MESSAGE_RATE = float(os.getenv("WS_MESSAGE_RATE", "10"))
+WS_MESSAGE_BURST = int(os.getenv("WS_MESSAGE_BURST", "20"))
+# Consecutive dropped frames after which the connection is closed
+WS_MAX_VIOLATIONS = int(os.getenv("WS_MAX_VIOLATIONS", "50"))
+
+# Action -> (tokens per second, burst). Actions not listed are dropped.
+PLAYER_ACTION_LIMITS: Dict[str, Tuple[float, int]] = {
+    "submit_answer": (1.0, 3),
+    "time_up": (1.0, 3),
+    "pong": (1.0, 5),
+}
+HOST_ACTION_LIMITS: Dict[str, Tuple[float, int]] = {
+    "start_quiz": (0.5, 2),
+    "next_question": (2.0, 5),
+    "pong": (1.0, 5),
+}
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def take(self, now: float) -> bool:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class InboundLimiter:
+    """
+    Gatekeeper for one connection's receive loop. Oversized frames and
+    frames over the connection's budget are dropped before they are
+    parsed; parsed frames are then checked against their action's own
+    bucket. Only frames that pass everything reach the game logic.
+    """
+
+    __slots__ = ("role", "action_limits", "connection", "actions", "violations")
+
+    def __init__(
+        self,
+        role: str,
+        action_limits: Dict[str, Tuple[float, int]],
+        rate: float = WS_MESSAGE_RATE,
+        burst: int = WS_MESSAGE_BURST,
+    ):
+        self.role = role
+        self.action_limits = action_limits
+        self.connection = TokenBucket(rate, burst)
+        self.actions: Dict[str, TokenBucket] = {}
+        self.violations = 0
+
+    @property
+    def exhausted(self) -> bool:
+        """Whether the client kept sending after being dropped for too long"""
+        return self.violations >= WS_MAX_VIOLATIONS
+
+    def _drop(self, reason: str) -> None:
+        WS_DROPPED.inc(role=self.role, reason=reason)
+        self.violations += 1
+        return None
+
+    def accept(self, data: Union[str, bytes]) -> Optional[dict]:
+        """The parsed message if it may be dispatched, otherwise None"""
+        WS_FRAMES.inc(role=self.role)
+        # Text frames are limited by their UTF-8 size on the wire, not by characters
+        size = len(data.encode()) if isinstance(data, str) else len(data)
+        if size > WS_MAX_FRAME_BYTES:
+            return self._drop("too_large")
+        now = time.monotonic()
+        if not self.connection.take(now):
+            return self._drop("rate_limited")
+
+        try:
+            message = decode(data)
+        except ValueError:
+            return self._drop("malformed")
+        if not isinstance(message, dict):
+            return self._drop("malformed")
+
+        action = message.get("action")
+        bucket = self.actions.get(action)
+        if bucket is None:
+            limit = self.action_limits.get(action)
+            if limit is None:
+                return self._drop("unknown_action")
+            bucket = self.actions[action] = TokenBucket(*limit)
+        if not bucket.take(now):
+            return self._drop("action_rate_limited")
+
+        self.violations = 0
+        return message
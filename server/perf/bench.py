@@ -0,0 +1,349 @@
+"""
+Micro-benchmarks for the GameService hot paths.
+
+Each benchmark runs against in-memory Mongo/Redis stand-ins and fake
+WebSockets at several room sizes, and can be compared with a saved baseline
+so regressions in the answer and broadcast paths show up before deploy.
+
+    cd server
+    python -m perf.bench                      # run and compare with perf/baseline.json
+    python -m perf.bench --save-baseline      # record a new baseline
+    python -m perf.bench --sizes 10 100 --only submit_answer
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from fastapi import WebSocket
+from fastapi.websockets import WebSocketState
+
+from app.websocket import codec
+from perf.harness import install_fakes
+
+DEFAULT_SIZES = [10, 100, 1000, 10000]
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+class BenchWebSocket(WebSocket):
+    """
+    WebSocket that accepts every frame immediately. Subclasses the real one
+    only so the pydantic models accept it; there is no ASGI scope behind it.
+    """
+
+    client_state = WebSocketState.CONNECTED
+    application_state = WebSocketState.CONNECTED
+
+    def __init__(self, wire_format: str = codec.JSON):
+        self.scope = {"type": "websocket", codec.CODEC_SCOPE_KEY: wire_format}
+        self.frames_sent = 0
+        self.bytes_sent = 0
+
+    async def send_text(self, text: str):
+        self.frames_sent += 1
+        self.bytes_sent += len(text)
+
+    async def send_bytes(self, data: bytes):
+        self.frames_sent += 1
+        self.bytes_sent += len(data)
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+class Bench:
+    """Sets up rooms of a given size directly through the service"""
+
+    def __init__(self):
+        from app.services.game_service import get_game_service
+
+        self.game_service = get_game_service()
+        self.manager = self.game_service.connection_manager
+
+    async def make_room(
+        self, players: int, status: str = "in_progress", wire_format: str = codec.JSON
+    ) -> str:
+        from app.models.runtime import PlayerState
+
+        game_pin = await self.game_service.create_game()
+        game_state = await self.game_service._get_or_create_active_game_state(game_pin)
+        connections = self.manager.active_connections.setdefault(game_pin, {})
+        for index in range(players):
+            websocket = BenchWebSocket(wire_format)
+            nickname = f"player{index}"
+            game_state.add_player(PlayerState(nickname, websocket=websocket))
+            connections[nickname] = websocket
+        self.manager.host_connections[game_pin] = BenchWebSocket()
+        game_state.host = self.manager.host_connections[game_pin]
+        game_state.game_status = status
+        game_state.current_question_start_time = time.time()
+        return game_pin
+
+    async def drop_room(self, game_pin: str):
+        self.manager.active_connections.pop(game_pin, None)
+        self.manager.host_connections.pop(game_pin, None)
+        self.game_service.active_games.evict(game_pin)
+        self.game_service.question_timer.cancel(game_pin)
+        await self.game_service.write_behind.close_game(game_pin)
+
+
+async def measure(
+    run_once: Callable[[], Awaitable[None]],
+    setup: Optional[Callable[[], Awaitable[None]]] = None,
+    min_time: float = 0.2,
+    min_runs: int = 3,
+    max_runs: int = 1000,
+) -> List[float]:
+    """
+    Time `run_once` repeatedly, excluding `setup`, for at least `min_time`.
+    The first run is a warm-up and is not counted.
+    """
+    timings: List[float] = []
+    runs = -1
+    while len(timings) < max_runs and (
+        len(timings) < min_runs or sum(timings) < min_time
+    ):
+        if setup:
+            await setup()
+        started = time.perf_counter()
+        await run_once()
+        elapsed = time.perf_counter() - started
+        runs += 1
+        if runs:
+            timings.append(elapsed)
+    return timings
+
+
+async def bench_submit_answer(bench: Bench, size: int, min_time: float) -> List[float]:
+    game_pin = await bench.make_room(size)
+    game_state = bench.game_service.active_games.get(game_pin)
+    players = game_state.players
+    cursor = iter(range(10**9))
+
+    async def run_once():
+        player = players[next(cursor) % len(players)]
+        # Players answer once per question; forget the previous lap's answer
+        game_state.player_answers.get(str(game_state.current_question_index), {}).pop(
+            player.nickname, None
+        )
+        await bench.game_service.submit_answer(game_pin, player.websocket, 1)
+
+    async def reopen():
+        # Keep the answer window open however long the measurement runs
+        game_state.current_question_start_time = time.time() - 1.0
+
+    timings = await measure(run_once, setup=reopen, min_time=min_time)
+    await bench.drop_room(game_pin)
+    return timings
+
+
+async def bench_publish_leaderboard(bench: Bench, size: int, min_time: float) -> List[float]:
+    """One leaderboard tick after a mid-table player overtakes the leader"""
+    game_pin = await bench.make_room(size)
+    game_state = bench.game_service.active_games.get(game_pin)
+    players = game_state.players
+    publisher = bench.game_service.leaderboard_publisher
+    await publisher.publish(game_pin)
+    cursor = iter(range(10**9))
+
+    async def overtake():
+        player = players[(next(cursor) * 7919) % len(players)]
+        player.score += 1000 + len(players)
+        game_state.leaderboard.set_score(player.nickname, player.score)
+
+    async def run_once():
+        await publisher.publish(game_pin)
+
+    timings = await measure(run_once, setup=overtake, min_time=min_time)
+    publisher.discard(game_pin)
+    await bench.drop_room(game_pin)
+    return timings
+
+
+async def bench_send_current_question(bench: Bench, size: int, min_time: float) -> List[float]:
+    game_pin = await bench.make_room(size)
+
+    async def run_once():
+        await bench.game_service._send_current_question(game_pin)
+
+    timings = await measure(run_once, min_time=min_time)
+    await bench.drop_room(game_pin)
+    return timings
+
+
+async def bench_broadcast_to_players(
+    bench: Bench, size: int, min_time: float, wire_format: str = codec.JSON
+) -> List[float]:
+    game_pin = await bench.make_room(size, wire_format=wire_format)
+    message = {
+        "type": "leaderboard_update",
+        "top_players": [{"nickname": f"player{i}", "score": 1000 - i} for i in range(10)],
+    }
+
+    async def run_once():
+        await bench.manager.broadcast_to_players(game_pin, message)
+
+    timings = await measure(run_once, min_time=min_time)
+    await bench.drop_room(game_pin)
+    return timings
+
+
+async def bench_broadcast_to_players_msgpack(
+    bench: Bench, size: int, min_time: float
+) -> List[float]:
+    return await bench_broadcast_to_players(bench, size, min_time, codec.MSGPACK)
+
+
+async def bench_load_game_state(bench: Bench, size: int, min_time: float) -> List[float]:
+    """Cold load of a game document holding `size` players into the registry"""
+    game_pin = await bench.make_room(size)
+    game_state = bench.game_service.active_games.get(game_pin)
+    bench.game_service.write_behind.set_fields(
+        game_pin,
+        {"players": [{"nickname": p.nickname, "score": p.score} for p in game_state.players]},
+    )
+    await bench.game_service.write_behind.flush(game_pin)
+
+    async def evict():
+        bench.game_service.active_games.evict(game_pin)
+
+    async def run_once():
+        await bench.game_service._get_or_create_active_game_state(game_pin)
+
+    timings = await measure(run_once, setup=evict, min_time=min_time, max_runs=200)
+    await bench.drop_room(game_pin)
+    return timings
+
+
+async def bench_get_active_game_state(bench: Bench, size: int, min_time: float) -> List[float]:
+    """Registry hit, the path every answer takes"""
+    game_pin = await bench.make_room(size)
+
+    async def run_once():
+        await bench.game_service._get_or_create_active_game_state(game_pin)
+
+    timings = await measure(run_once, min_time=min_time)
+    await bench.drop_room(game_pin)
+    return timings
+
+
+async def bench_end_game(bench: Bench, size: int, min_time: float) -> List[float]:
+    rooms: List[str] = []
+
+    async def setup():
+        rooms.append(await bench.make_room(size))
+
+    async def run_once():
+        await bench.game_service.end_game(rooms[-1])
+
+    return await measure(run_once, setup=setup, min_time=min_time, max_runs=50)
+
+
+BENCHMARKS: Dict[str, Callable] = {
+    "submit_answer": bench_submit_answer,
+    "_send_current_question": bench_send_current_question,
+    "leaderboard tick": bench_publish_leaderboard,
+    "broadcast_to_players": bench_broadcast_to_players,
+    "broadcast_to_players (msgpack)": bench_broadcast_to_players_msgpack,
+    "_get_or_create_active_game_state (cold)": bench_load_game_state,
+    "_get_or_create_active_game_state (warm)": bench_get_active_game_state,
+    "end_game": bench_end_game,
+}
+
+
+async def run(args) -> Dict[str, Dict[str, float]]:
+    install_fakes()
+    bench = Bench()
+    results: Dict[str, Dict[str, float]] = {}
+    for name, benchmark in BENCHMARKS.items():
+        if args.only and not any(name.startswith(only) for only in args.only):
+            continue
+        results[name] = {}
+        for size in args.sizes:
+            timings = await benchmark(bench, size, args.min_time)
+            results[name][str(size)] = statistics.median(timings) * 1e6
+    await bench.game_service.write_behind.close()
+    bench.manager.heartbeat.stop()
+    return results
+
+
+def format_time(microseconds: float) -> str:
+    if microseconds >= 1e6:
+        return f"{microseconds / 1e6:.2f}s"
+    if microseconds >= 1e3:
+        return f"{microseconds / 1e3:.2f}ms"
+    return f"{microseconds:.1f}us"
+
+
+def report(results, baseline: Optional[dict], threshold: float) -> bool:
+    """Print median time per call; returns True if anything regressed"""
+    regressed = False
+    sizes = sorted({size for sizes in results.values() for size in sizes}, key=int)
+    name_width = max(len(name) for name in results) + 2
+    print("median per call".ljust(name_width) + "".join(f"{size:>22}" for size in sizes))
+    for name, by_size in results.items():
+        row = name.ljust(name_width)
+        for size in sizes:
+            current = by_size.get(size)
+            if current is None:
+                row += " " * 22
+                continue
+            cell = format_time(current)
+            previous = (baseline or {}).get(name, {}).get(size)
+            if previous:
+                change = current / previous - 1
+                cell += f" ({change:+.0%})"
+                if change > threshold:
+                    cell += "!"
+                    regressed = True
+            row += f"{cell:>22}"
+        print(row)
+    return regressed
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="GameService hot path benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--only", nargs="+", help="run benchmarks whose name starts with these")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per benchmark and size")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument(
+        "--threshold", type=float, default=0.3, help="slowdown that counts as a regression"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.getLogger("app").setLevel(logging.CRITICAL)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        results = asyncio.run(run(args))
+
+    baseline = None
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    regressed = report(results, baseline, args.threshold)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Baseline saved to {args.baseline}")
+    elif baseline is None:
+        print("No baseline found; run with --save-baseline to record one")
+    elif regressed:
+        print(f"Regression: some benchmarks are more than {args.threshold:.0%} slower")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
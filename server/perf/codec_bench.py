@@ -0,0 +1,72 @@
+"""
+Compares the JSON and MessagePack wire formats on the messages a game
+actually sends: bytes per frame, and CPU to encode a frame once and to
+decode one inbound frame.
+
+    cd server
+    python -m perf.codec_bench
+"""
+
+import argparse
+import json
+import timeit
+
+from app.websocket import codec
+
+MESSAGES = {
+    "question": {
+        "type": "question",
+        "question": "Which planet in our solar system has the most moons?",
+        "options": ["Jupiter", "Saturn", "Uranus", "Neptune"],
+        "time_limit": 20,
+    },
+    "leaderboard_update": {
+        "type": "leaderboard_update",
+        "top_players": [{"nickname": f"player{i}", "score": 9800 - 350 * i} for i in range(10)],
+    },
+    "answer_stats": {
+        "type": "answer_stats",
+        "players": 250,
+        "question_index": 3,
+        "answered": 212,
+        "histogram": [31, 140, 25, 16],
+        "correct": 140,
+        "percent_correct": 66.0,
+        "response_times": {
+            "bucket_seconds": 2.0,
+            "counts": [12, 48, 61, 37, 22, 14, 9, 5, 3, 1],
+            "average": 6.412,
+        },
+    },
+    "submit_answer": {"action": "submit_answer", "answer_index": 2},
+}
+
+
+def per_call_us(statement, number: int) -> float:
+    return min(timeit.repeat(statement, number=number, repeat=5)) / number * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="JSON vs MessagePack frame cost")
+    parser.add_argument("--number", type=int, default=20000, help="calls per timing")
+    args = parser.parse_args(argv)
+
+    header = f"{'message':<20}{'bytes json/msgpack':>22}{'encode us':>18}{'decode us':>18}"
+    print(header)
+    for name, message in MESSAGES.items():
+        text = json.dumps(message)
+        packed = codec.Frame(message).packed
+        encode_json = per_call_us(lambda: codec.Frame(message).text, args.number)
+        encode_packed = per_call_us(lambda: codec.Frame(message).packed, args.number)
+        decode_json = per_call_us(lambda: codec.decode(text), args.number)
+        decode_packed = per_call_us(lambda: codec.decode(packed), args.number)
+        print(
+            f"{name:<20}"
+            f"{f'{len(text)}/{len(packed)} ({len(packed) / len(text) - 1:+.0%})':>22}"
+            f"{f'{encode_json:.2f}/{encode_packed:.2f}':>18}"
+            f"{f'{decode_json:.2f}/{decode_packed:.2f}':>18}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,692 @@
+"""
+In-memory stand-ins for the MongoDB collection and Redis client used by the
+app, so load tests and benchmarks can drive the real services in-process.
+They implement only the calls the app makes, with an optional fixed latency
+per round trip to mimic a network hop.
+"""
+
+import asyncio
+import copy
+import fnmatch
+import random
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from pymongo.errors import DuplicateKeyError
+
+
+def _get_path(doc: Any, path: str) -> Any:
+    current = doc
+    for part in path.split("."):
+        if isinstance(current, list):
+            if not part.isdigit() or int(part) >= len(current):
+                return None
+            current = current[int(part)]
+        elif isinstance(current, dict):
+            if part not in current:
+                return None
+            current = current[part]
+        else:
+            return None
+    return current
+
+
+def _compare(value: Any, condition: Any) -> bool:
+    if isinstance(condition, dict) and any(k.startswith("$") for k in condition):
+        for op, arg in condition.items():
+            if op == "$eq" and value != arg:
+                return False
+            if op == "$ne" and value == arg:
+                return False
+            if op == "$in" and value not in arg:
+                return False
+            if op == "$nin" and value in arg:
+                return False
+            if op == "$exists" and (value is not None) != bool(arg):
+                return False
+            if op in ("$lt", "$lte", "$gt", "$gte"):
+                if value is None:
+                    return False
+                if op == "$lt" and not value < arg:
+                    return False
+                if op == "$lte" and not value <= arg:
+                    return False
+                if op == "$gt" and not value > arg:
+                    return False
+                if op == "$gte" and not value >= arg:
+                    return False
+        return True
+    return value == condition
+
+
+def matches(doc: dict, query: dict) -> bool:
+    """Evaluate the subset of the MongoDB query language the app uses"""
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(matches(doc, sub) for sub in condition):
+                return False
+            continue
+        if key == "$and":
+            if not all(matches(doc, sub) for sub in condition):
+                return False
+            continue
+        if key == "$text":
+            # Any search term in any string field, ignoring the text index's fields
+            text = " ".join(v for v in doc.values() if isinstance(v, str)).lower()
+            if not any(term in text for term in condition["$search"].lower().split()):
+                return False
+            continue
+        head, _, rest = key.partition(".")
+        container = doc.get(head) if isinstance(doc, dict) else None
+        if rest and isinstance(container, list):
+            items = [
+                isinstance(item, dict) and matches(item, {rest: condition})
+                for item in container
+            ]
+            negated = isinstance(condition, dict) and ("$ne" in condition or "$nin" in condition)
+            # Negations hold only if no element has the value, as in MongoDB
+            if not (all(items) if negated else any(items)):
+                return False
+            continue
+        if not _compare(_get_path(doc, key), condition):
+            return False
+    return True
+
+
+def project(doc: dict, projection: Optional[dict]) -> dict:
+    if not projection:
+        return copy.deepcopy(doc)
+    included = [k for k, v in projection.items() if v and k != "_id"]
+    if included:
+        result = {}
+        for key in included:
+            head = key.split(".")[0]
+            if head in doc:
+                result[head] = copy.deepcopy(doc[head])
+        if projection.get("_id", 1) and "_id" in doc:
+            result["_id"] = doc["_id"]
+        return result
+    result = copy.deepcopy(doc)
+    for key, value in projection.items():
+        if not value:
+            result.pop(key, None)
+    return result
+
+
+def _evaluate(doc: dict, expression: Any) -> Any:
+    """Tiny aggregation expression evaluator: field paths, $size and $ifNull"""
+    if isinstance(expression, str) and expression.startswith("$"):
+        return _get_path(doc, expression[1:])
+    if isinstance(expression, dict) and len(expression) == 1:
+        op, arg = next(iter(expression.items()))
+        if op == "$size":
+            return len(_evaluate(doc, arg) or [])
+        if op == "$ifNull":
+            value = _evaluate(doc, arg[0])
+            return _evaluate(doc, arg[1]) if value is None else value
+    return expression
+
+
+class FakeCursor:
+    def __init__(self, docs: List[dict], latency: float = 0.0):
+        self.docs = docs
+        self.latency = latency
+
+    def sort(self, key, direction: int = 1):
+        keys = key if isinstance(key, list) else [(key, direction)]
+        for field, order in reversed(keys):
+            if isinstance(order, dict):  # {"$meta": "textScore"}: keep match order
+                continue
+            self.docs.sort(
+                key=lambda d: (_get_path(d, field) is None, _get_path(d, field)),
+                reverse=order < 0,
+            )
+        return self
+
+    def skip(self, count: int):
+        self.docs = self.docs[count:]
+        return self
+
+    def limit(self, count: int):
+        if count:
+            self.docs = self.docs[:count]
+        return self
+
+    async def to_list(self, length: Optional[int] = None) -> List[dict]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self.docs[:length] if length else list(self.docs)
+
+    def __aiter__(self):
+        self._iterator = iter(self.docs)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iterator)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class FakeCollection:
+    """Async, in-memory subset of a Motor collection"""
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency = latency_ms / 1000
+        self.docs: List[dict] = []
+        self.unique_fields: List[str] = []
+        self.indexes: Dict[str, dict] = {}
+        self.calls: Dict[str, int] = {}
+        self._next_id = 1
+
+    async def _round_trip(self, name: str):
+        self.calls[name] = self.calls.get(name, 0) + 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def create_index(self, keys, name: Optional[str] = None, unique: bool = False, **kwargs):
+        await self._round_trip("create_index")
+        field = keys if isinstance(keys, str) else keys[0][0]
+        index_name = name or f"{field}_1"
+        self.indexes[index_name] = {"keys": keys, "unique": unique, **kwargs}
+        if unique and field not in self.unique_fields:
+            self.unique_fields.append(field)
+        return index_name
+
+    async def index_information(self) -> Dict[str, dict]:
+        await self._round_trip("index_information")
+        return copy.deepcopy(self.indexes)
+
+    async def drop_index(self, name: str):
+        await self._round_trip("drop_index")
+        self.indexes.pop(name, None)
+
+    def _check_unique(self, doc: dict, ignore: Optional[dict] = None):
+        for field in self.unique_fields:
+            value = _get_path(doc, field)
+            if value is None:
+                continue
+            for other in self.docs:
+                if other is not ignore and _get_path(other, field) == value:
+                    raise DuplicateKeyError(f"E11000 duplicate key {field}: {value}")
+
+    def _insert(self, doc: dict):
+        stored = copy.deepcopy(doc)
+        stored.setdefault("_id", self._next_id)
+        self._check_unique(stored)
+        self._next_id += 1
+        self.docs.append(stored)
+        doc.setdefault("_id", stored["_id"])
+        return stored["_id"]
+
+    async def insert_one(self, doc: dict):
+        await self._round_trip("insert_one")
+        return SimpleNamespace(inserted_id=self._insert(doc))
+
+    async def insert_many(self, docs: List[dict], ordered: bool = True):
+        await self._round_trip("insert_many")
+        return SimpleNamespace(inserted_ids=[self._insert(doc) for doc in docs])
+
+    def _find(self, query: Optional[dict]) -> List[dict]:
+        return [doc for doc in self.docs if matches(doc, query or {})]
+
+    async def find_one(self, query: dict, projection: Optional[dict] = None, **kwargs):
+        await self._round_trip("find_one")
+        found = self._find(query)
+        return project(found[0], projection) if found else None
+
+    def find(self, query: Optional[dict] = None, projection: Optional[dict] = None, **kwargs):
+        self.calls["find"] = self.calls.get("find", 0) + 1
+        return FakeCursor(
+            [project(doc, projection) for doc in self._find(query)], self.latency
+        )
+
+    async def count_documents(self, query: dict, **kwargs) -> int:
+        await self._round_trip("count_documents")
+        return len(self._find(query))
+
+    def aggregate(self, pipeline: List[dict]):
+        self.calls["aggregate"] = self.calls.get("aggregate", 0) + 1
+        docs = [copy.deepcopy(doc) for doc in self.docs]
+        for stage in pipeline:
+            (op, arg), = stage.items()
+            if op == "$match":
+                docs = [doc for doc in docs if matches(doc, arg)]
+            elif op == "$limit":
+                docs = docs[:arg]
+            elif op == "$sample":
+                docs = random.sample(docs, min(arg["size"], len(docs)))
+            elif op == "$sort":
+                docs = FakeCursor(docs).sort(list(arg.items())).docs
+            elif op == "$project":
+                projected = []
+                for doc in docs:
+                    out = {}
+                    for key, spec in arg.items():
+                        if spec in (0, False):
+                            continue
+                        out[key] = _get_path(doc, key) if spec in (1, True) else _evaluate(doc, spec)
+                    if arg.get("_id", 1) and "_id" in doc and "_id" not in out:
+                        out["_id"] = doc["_id"]
+                    projected.append(out)
+                docs = projected
+            else:
+                raise NotImplementedError(f"Aggregation stage {op}")
+        return FakeCursor(docs, self.latency)
+
+    async def update_one(self, query: dict, update: dict, upsert: bool = False, array_filters=None, **kwargs):
+        await self._round_trip("update_one")
+        return self._update(query, update, upsert, array_filters, many=False)
+
+    async def update_many(self, query: dict, update: dict, upsert: bool = False, array_filters=None, **kwargs):
+        await self._round_trip("update_many")
+        return self._update(query, update, upsert, array_filters, many=True)
+
+    async def replace_one(self, query: dict, replacement: dict, upsert: bool = False, **kwargs):
+        await self._round_trip("replace_one")
+        return self._replace(query, replacement, upsert)
+
+    def _replace(self, query: dict, replacement: dict, upsert: bool):
+        for index, doc in enumerate(self.docs):
+            if matches(doc, query):
+                new_doc = copy.deepcopy(replacement)
+                new_doc["_id"] = doc["_id"]
+                self.docs[index] = new_doc
+                return SimpleNamespace(matched_count=1, modified_count=1, upserted_id=None)
+        if upsert:
+            return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=self._insert(replacement))
+        return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=None)
+
+    async def delete_one(self, query: dict):
+        await self._round_trip("delete_one")
+        return self._delete(query, many=False)
+
+    async def delete_many(self, query: dict):
+        await self._round_trip("delete_many")
+        return self._delete(query, many=True)
+
+    async def bulk_write(self, operations: list, ordered: bool = True):
+        await self._round_trip("bulk_write")
+        modified = 0
+        upserted = 0
+        for operation in operations:
+            kind = type(operation).__name__
+            if kind == "InsertOne":
+                self._insert(operation._doc)
+            elif kind in ("UpdateOne", "UpdateMany"):
+                result = self._update(
+                    operation._filter,
+                    operation._doc,
+                    operation._upsert,
+                    operation._array_filters,
+                    many=kind == "UpdateMany",
+                )
+                modified += result.modified_count
+                upserted += result.upserted_id is not None
+            elif kind == "ReplaceOne":
+                result = self._replace(operation._filter, operation._doc, operation._upsert)
+                upserted += result.upserted_id is not None
+            elif kind in ("DeleteOne", "DeleteMany"):
+                self._delete(operation._filter, many=kind == "DeleteMany")
+            else:
+                raise NotImplementedError(f"Bulk operation {kind}")
+        return SimpleNamespace(modified_count=modified, upserted_count=upserted)
+
+    def _delete(self, query: dict, many: bool):
+        deleted = 0
+        remaining = []
+        for doc in self.docs:
+            if matches(doc, query) and (many or not deleted):
+                deleted += 1
+            else:
+                remaining.append(doc)
+        self.docs = remaining
+        return SimpleNamespace(deleted_count=deleted)
+
+    def _update(self, query, update, upsert, array_filters, many):
+        matched = 0
+        for doc in self.docs:
+            if matches(doc, query):
+                _apply_update(doc, query, update, array_filters or [], inserting=False)
+                matched += 1
+                if not many:
+                    break
+        if matched:
+            return SimpleNamespace(matched_count=matched, modified_count=matched, upserted_id=None)
+        if upsert:
+            doc = {k: v for k, v in query.items() if not k.startswith("$") and "." not in k}
+            _apply_update(doc, query, update, array_filters or [], inserting=True)
+            return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=self._insert(doc))
+        return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=None)
+
+
+def _targets(doc: Any, parts: List[str], query: dict, array_filters: List[dict], prefix: str = ""):
+    """Yield (container, key) pairs an update path resolves to"""
+    if len(parts) == 1:
+        yield doc, parts[0]
+        return
+    part, rest = parts[0], parts[1:]
+    if part == "$":
+        field = next(k for k in query if k.startswith(prefix + ".")).split(".", 1)[1]
+        condition = query[prefix + "." + field]
+        for item in doc:
+            if _compare(_get_path(item, field), condition):
+                yield from _targets(item, rest, query, array_filters)
+                return
+        return
+    if part.startswith("$[") and part.endswith("]"):
+        name = part[2:-1]
+        condition = next(
+            {k.split(".", 1)[1]: v for k, v in f.items()}
+            for f in array_filters
+            if any(k.split(".")[0] == name for k in f)
+        )
+        for item in doc:
+            if matches(item, condition):
+                yield from _targets(item, rest, query, array_filters)
+        return
+    if isinstance(doc, list):
+        yield from _targets(doc[int(part)], rest, query, array_filters)
+        return
+    child = doc.setdefault(part, {})
+    yield from _targets(child, rest, query, array_filters, part if not prefix else f"{prefix}.{part}")
+
+
+def _apply_update(doc: dict, query: dict, update: dict, array_filters: List[dict], inserting: bool):
+    for op, fields in update.items():
+        if op == "$setOnInsert" and not inserting:
+            continue
+        for path, value in fields.items():
+            for container, key in list(_targets(doc, path.split("."), query, array_filters)):
+                if op in ("$set", "$setOnInsert"):
+                    container[key] = copy.deepcopy(value)
+                elif op == "$unset":
+                    container.pop(key, None)
+                elif op == "$inc":
+                    container[key] = container.get(key, 0) + value
+                elif op == "$push":
+                    items = value["$each"] if isinstance(value, dict) and "$each" in value else [value]
+                    container.setdefault(key, []).extend(copy.deepcopy(items))
+                elif op == "$pull":
+                    container[key] = [
+                        item for item in container.get(key, [])
+                        if not (matches(item, value) if isinstance(value, dict) else item == value)
+                    ]
+                else:
+                    raise NotImplementedError(f"Update operator {op}")
+
+
+class FakeDatabase:
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.collections: Dict[str, FakeCollection] = {}
+
+    def __getattr__(self, name: str) -> FakeCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def __getitem__(self, name: str) -> FakeCollection:
+        if name not in self.collections:
+            self.collections[name] = FakeCollection(self.latency_ms)
+        return self.collections[name]
+
+
+class FakeMongoClient:
+    """Stand-in for AsyncIOMotorClient exposing `client.quizblitz.<collection>`"""
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.quizblitz = FakeDatabase(latency_ms)
+
+    async def server_info(self):
+        return {"version": "fake"}
+
+    def close(self):
+        pass
+
+
+class FakeRedis:
+    """Async, in-memory subset of redis.asyncio.Redis (decode_responses=True)"""
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency = latency_ms / 1000
+        self.data: Dict[str, Any] = {}
+        self.expiry: Dict[str, float] = {}
+        self.subscribers: Dict[str, List["FakePubSub"]] = {}
+        self.round_trips = 0
+
+    async def _round_trip(self):
+        self.round_trips += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    def _alive(self, key: str) -> bool:
+        expires_at = self.expiry.get(key)
+        if expires_at is not None and expires_at <= time.time():
+            self.data.pop(key, None)
+            self.expiry.pop(key, None)
+        return key in self.data
+
+    # Commands are implemented synchronously and wrapped for single calls and pipelines
+    def _ping(self):
+        return True
+
+    def _exists(self, *keys):
+        return sum(1 for key in keys if self._alive(key))
+
+    def _delete(self, *keys):
+        removed = 0
+        for key in keys:
+            if self._alive(key):
+                del self.data[key]
+                self.expiry.pop(key, None)
+                removed += 1
+        return removed
+
+    def _set(self, key, value, ex=None, px=None, nx=False, xx=False, **kwargs):
+        exists = self._alive(key)
+        if (nx and exists) or (xx and not exists):
+            return None
+        self.data[key] = str(value)
+        self.expiry.pop(key, None)
+        if ex is not None:
+            self.expiry[key] = time.time() + ex
+        if px is not None:
+            self.expiry[key] = time.time() + px / 1000
+        return True
+
+    def _get(self, key):
+        return self.data.get(key) if self._alive(key) else None
+
+    def _mget(self, *keys):
+        keys = keys[0] if len(keys) == 1 and isinstance(keys[0], list) else keys
+        return [self._get(key) for key in keys]
+
+    def _expire(self, key, seconds):
+        if not self._alive(key):
+            return False
+        self.expiry[key] = time.time() + seconds
+        return True
+
+    def _ttl(self, key):
+        if not self._alive(key):
+            return -2
+        expires_at = self.expiry.get(key)
+        return -1 if expires_at is None else int(expires_at - time.time())
+
+    def _keys(self, pattern="*"):
+        return [key for key in list(self.data) if self._alive(key) and fnmatch.fnmatch(key, pattern)]
+
+    def _hash(self, key) -> dict:
+        if not self._alive(key):
+            self.data[key] = {}
+        return self.data[key]
+
+    def _hset(self, key, field=None, value=None, mapping=None):
+        target = self._hash(key)
+        added = 0
+        items = dict(mapping or {})
+        if field is not None:
+            items[field] = value
+        for name, item in items.items():
+            added += name not in target
+            target[name] = str(item)
+        return added
+
+    def _hget(self, key, field):
+        return self._hash(key).get(field) if self._alive(key) else None
+
+    def _hgetall(self, key):
+        return dict(self.data[key]) if self._alive(key) else {}
+
+    def _hkeys(self, key):
+        return list(self.data[key]) if self._alive(key) else []
+
+    def _hdel(self, key, *fields):
+        if not self._alive(key):
+            return 0
+        removed = sum(1 for field in fields if self.data[key].pop(field, None) is not None)
+        if not self.data[key]:
+            self._delete(key)
+        return removed
+
+    def _sadd(self, key, *members):
+        if not self._alive(key):
+            self.data[key] = set()
+        before = len(self.data[key])
+        self.data[key].update(members)
+        return len(self.data[key]) - before
+
+    def _srem(self, key, *members):
+        if not self._alive(key):
+            return 0
+        before = len(self.data[key])
+        self.data[key].difference_update(members)
+        return before - len(self.data[key])
+
+    def _smembers(self, key):
+        return set(self.data[key]) if self._alive(key) else set()
+
+    def _zadd(self, key, mapping):
+        if not self._alive(key):
+            self.data[key] = {}
+        added = sum(1 for member in mapping if member not in self.data[key])
+        self.data[key].update({member: float(score) for member, score in mapping.items()})
+        return added
+
+    def _zpopmin(self, key, count=1):
+        if not self._alive(key) or not self.data[key]:
+            return []
+        ordered = sorted(self.data[key].items(), key=lambda item: (item[1], item[0]))[:count]
+        for member, _ in ordered:
+            del self.data[key][member]
+        return ordered
+
+    def _zrem(self, key, *members):
+        if not self._alive(key):
+            return 0
+        return sum(1 for member in members if self.data[key].pop(member, None) is not None)
+
+    def _eval(self, script, numkeys, *args):
+        """The app's Lua scripts, reimplemented in Python"""
+        from app.services.game_router import CLAIM_OWNER_SCRIPT
+
+        keys, argv = args[:numkeys], [str(arg) for arg in args[numkeys:]]
+        if script == CLAIM_OWNER_SCRIPT:
+            owner = self._get(keys[0])
+            if (owner or "") == argv[0]:
+                self._set(keys[0], argv[1], ex=int(argv[2]))
+                return argv[1]
+            return owner
+        raise NotImplementedError("FakeRedis does not know this script")
+
+    def _publish(self, channel, message):
+        subscribers = self.subscribers.get(channel, [])
+        for subscriber in subscribers:
+            subscriber.messages.put_nowait(
+                {"type": "message", "pattern": None, "channel": channel, "data": message}
+            )
+        return len(subscribers)
+
+    def __getattr__(self, name: str):
+        command = getattr(type(self), f"_{name}", None)
+        if command is None or name.startswith("_"):
+            raise AttributeError(name)
+
+        async def call(*args, **kwargs):
+            await self._round_trip()
+            return command(self, *args, **kwargs)
+
+        return call
+
+    def pipeline(self, transaction: bool = True) -> "FakePipeline":
+        return FakePipeline(self)
+
+    def pubsub(self) -> "FakePubSub":
+        return FakePubSub(self)
+
+    async def close(self):
+        pass
+
+
+class FakePipeline:
+    """Buffers commands and runs them in one simulated round trip"""
+
+    def __init__(self, redis: FakeRedis):
+        self.redis = redis
+        self.commands: list = []
+
+    def __getattr__(self, name: str):
+        command = getattr(type(self.redis), f"_{name}", None)
+        if command is None or name.startswith("_"):
+            raise AttributeError(name)
+
+        def queue(*args, **kwargs):
+            self.commands.append((command, args, kwargs))
+            return self
+
+        return queue
+
+    async def execute(self) -> list:
+        await self.redis._round_trip()
+        commands, self.commands = self.commands, []
+        return [command(self.redis, *args, **kwargs) for command, args, kwargs in commands]
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.commands = []
+
+
+class FakePubSub:
+    """One subscriber connection; messages are delivered when published"""
+
+    def __init__(self, redis: FakeRedis):
+        self.redis = redis
+        self.channels: set = set()
+        self.messages: asyncio.Queue = asyncio.Queue()
+
+    async def subscribe(self, *channels):
+        await self.redis._round_trip()
+        for channel in channels:
+            if channel not in self.channels:
+                self.channels.add(channel)
+                self.redis.subscribers.setdefault(channel, []).append(self)
+
+    async def unsubscribe(self, *channels):
+        await self.redis._round_trip()
+        for channel in channels or list(self.channels):
+            if channel in self.channels:
+                self.channels.discard(channel)
+                self.redis.subscribers[channel].remove(self)
+
+    async def get_message(self, ignore_subscribe_messages: bool = False, timeout: float = 0.0):
+        try:
+            return await asyncio.wait_for(self.messages.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def aclose(self):
+        await self.unsubscribe()
@@ -0,0 +1,113 @@
+"""
+Helpers to run the real ASGI app in-process: wiring the in-memory stand-ins
+into the app's singletons and a minimal ASGI WebSocket client.
+"""
+
+import asyncio
+import json
+import time
+from typing import Callable, List, Optional, Tuple
+
+from perf.fakes import FakeMongoClient, FakeRedis
+
+
+def install_fakes(
+    mongo_latency_ms: float = 0.0, redis_latency_ms: float = 0.0
+) -> Tuple[FakeMongoClient, FakeRedis]:
+    """Point the app's Mongo client and Redis connection at in-memory stand-ins"""
+    import app.database.database as database
+    from app.websocket.connection_manager import get_connection_manager
+
+    mongo = FakeMongoClient(mongo_latency_ms)
+    redis = FakeRedis(redis_latency_ms)
+    database.client = mongo
+    get_connection_manager().redis = redis
+    return mongo, redis
+
+
+class AsgiWebSocket:
+    """
+    Drives one WebSocket connection against an ASGI app without a network.
+    Every frame the server sends is timestamped on arrival and handed to
+    `on_frame` if given, otherwise queued for `receive`.
+    """
+
+    def __init__(
+        self,
+        app,
+        path: str,
+        subprotocols: Optional[List[str]] = None,
+        on_frame: Optional[Callable[["AsgiWebSocket", object, float], None]] = None,
+    ):
+        self.app = app
+        self.path = path
+        self.subprotocols = subprotocols or []
+        self.on_frame = on_frame
+        self.accepted_subprotocol: Optional[str] = None
+        self.close_code: Optional[int] = None
+        self.closed = asyncio.Event()
+        self.frames: asyncio.Queue = asyncio.Queue()
+        self.bytes_received = 0
+        self._to_app: asyncio.Queue = asyncio.Queue()
+        self._accepted = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def connect(self, timeout: float = 10.0):
+        scope = {
+            "type": "websocket",
+            "asgi": {"version": "3.0"},
+            "scheme": "ws",
+            "path": self.path,
+            "raw_path": self.path.encode(),
+            "root_path": "",
+            "query_string": b"",
+            "headers": [(b"host", b"loadtest")],
+            "client": ("127.0.0.1", 0),
+            "server": ("loadtest", 80),
+            "subprotocols": self.subprotocols,
+        }
+        await self._to_app.put({"type": "websocket.connect"})
+        self._task = asyncio.create_task(self.app(scope, self._to_app.get, self._from_app))
+        await asyncio.wait_for(self._accepted.wait(), timeout)
+
+    async def _from_app(self, message: dict):
+        kind = message["type"]
+        if kind == "websocket.accept":
+            self.accepted_subprotocol = message.get("subprotocol")
+            self._accepted.set()
+        elif kind == "websocket.send":
+            frame = message.get("text")
+            if frame is None:
+                frame = message.get("bytes")
+            self.bytes_received += len(frame)
+            if self.on_frame:
+                self.on_frame(self, frame, time.perf_counter())
+            else:
+                self.frames.put_nowait(frame)
+        elif kind == "websocket.close":
+            self.close_code = message.get("code", 1000)
+            self._accepted.set()
+            self.closed.set()
+
+    async def send_text(self, text: str):
+        await self._to_app.put({"type": "websocket.receive", "text": text})
+
+    async def send_bytes(self, data: bytes):
+        await self._to_app.put({"type": "websocket.receive", "bytes": data})
+
+    async def send_json(self, payload: dict):
+        await self.send_text(json.dumps(payload))
+
+    async def receive(self, timeout: float = 10.0):
+        return await asyncio.wait_for(self.frames.get(), timeout)
+
+    async def receive_json(self, timeout: float = 10.0) -> dict:
+        return json.loads(await self.receive(timeout))
+
+    async def close(self, code: int = 1000):
+        await self._to_app.put({"type": "websocket.disconnect", "code": code})
+        if self._task is not None:
+            try:
+                await asyncio.wait_for(self._task, 5)
+            except Exception:
+                pass
@@ -0,0 +1,74 @@
+"""
+Stand-in for the chat completions API used for question generation.
+
+    cd server
+    python -m perf.llm_stub --port 9999 --delay 2
+    LLM_BASE_URL=http://127.0.0.1:9999 PERPLEXITY_API_KEY=stub uvicorn app.main:app
+
+Every request waits `--delay` seconds and returns ten questions on the topic
+in the user message. GET /calls reports how many completions were served.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from fastapi import FastAPI, Request
+
+
+def make_app(delay: float) -> FastAPI:
+    app = FastAPI()
+    app.state.calls = 0
+
+    @app.post("/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        app.state.calls += 1
+        topic = body["messages"][-1]["content"]
+        await asyncio.sleep(delay)
+        questions = [
+            {
+                "question": f"{topic}: question {i + 1}?",
+                "options": ["A", "B", "C", "D"],
+                "answer": i % 4,
+                "time_limit": 30,
+                "correct_answer": i % 4,
+            }
+            for i in range(10)
+        ]
+        return {
+            "id": f"stub-{app.state.calls}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [
+                {
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": json.dumps(questions)},
+                }
+            ],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }
+
+    @app.get("/calls")
+    async def calls():
+        return {"calls": app.state.calls}
+
+    return app
+
+
+def main(argv=None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Chat completions stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9999)
+    parser.add_argument("--delay", type=float, default=1.0, help="seconds per completion")
+    args = parser.parse_args(argv)
+    uvicorn.run(make_app(args.delay), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+"""
+In-process load generator for the QuizBlitz ASGI app.
+
+Runs N games with M simulated players each against `app.main:app`, speaking
+the real protocol (nickname handshake, start_quiz, submit_answer with a think
+time, next_question) with Mongo and Redis replaced by in-memory stand-ins.
+
+    cd server
+    python -m perf.loadgen --games 4 --players 250 --questions 5
+    python -m perf.loadgen --codec msgpack    # negotiate binary frames
+"""
+
+import argparse
+import asyncio
+import contextlib
+import logging
+import os
+import random
+import statistics
+import time
+import tracemalloc
+from typing import Dict, List, Optional
+
+from app.websocket import codec
+from perf.harness import AsgiWebSocket, install_fakes
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+class LoadStats:
+    def __init__(self):
+        self.broadcast_latencies: List[float] = []
+        self.answers_sent = 0
+        self.answers_acknowledged = 0
+        self.answers_rejected = 0
+        self.answer_window = 0.0
+        self.frames_received = 0
+        self.bytes_received = 0
+        self.frames_by_type: Dict[str, int] = {}
+        self.join_seconds = 0.0
+        self.players_joined = 0
+        self.memory_per_player: Optional[float] = None
+        self.errors: List[str] = []
+
+    def count_frame(self, frame_type: str, size: int):
+        self.frames_received += 1
+        self.bytes_received += size
+        self.frames_by_type[frame_type] = self.frames_by_type.get(frame_type, 0) + 1
+
+
+class SimulatedGame:
+    """One host and its players following the quiz protocol"""
+
+    def __init__(self, app, game_pin: str, args, stats: LoadStats, rng: random.Random):
+        self.app = app
+        self.game_pin = game_pin
+        self.args = args
+        self.stats = stats
+        self.rng = rng
+        self.host: Optional[AsgiWebSocket] = None
+        self.players: List[AsgiWebSocket] = []
+        self.joined = 0
+        self.all_joined = asyncio.Event()
+        self.question_index = 0
+        self.acknowledged_this_question = 0
+        self.rejected_this_question = 0
+        self.all_answered = asyncio.Event()
+        self.game_over = asyncio.Event()
+        self.question_sent_at = 0.0
+        self.first_answer_at: Optional[float] = None
+        self.last_answer_at: Optional[float] = None
+
+    @staticmethod
+    async def _send(socket: AsgiWebSocket, payload: dict):
+        """Send in the wire format the server agreed to"""
+        if socket.accepted_subprotocol == codec.MSGPACK_SUBPROTOCOL:
+            await socket.send_bytes(codec.Frame(payload).packed)
+        else:
+            await socket.send_json(payload)
+
+    def _connect(self, path: str, on_frame) -> AsgiWebSocket:
+        subprotocols = (
+            [codec.MSGPACK_SUBPROTOCOL, codec.JSON_SUBPROTOCOL]
+            if self.args.codec == codec.MSGPACK
+            else None
+        )
+        return AsgiWebSocket(self.app, path, subprotocols=subprotocols, on_frame=on_frame)
+
+    def _decode(self, socket: AsgiWebSocket, frame) -> dict:
+        message = codec.decode(frame)
+        self.stats.count_frame(message.get("type", "?"), len(frame))
+        if message.get("type") == "ping":
+            asyncio.ensure_future(self._send(socket, {"action": "pong"}))
+        return message
+
+    def on_host_frame(self, socket: AsgiWebSocket, frame, received_at: float):
+        message = self._decode(socket, frame)
+        kind = message.get("type")
+        if kind == "player_joined":
+            self.joined += 1
+            if self.joined >= self.args.players:
+                self.all_joined.set()
+        elif kind == "answer_stats":
+            # One coalesced frame per tick, counting every answer so far
+            if message.get("question_index") != self.question_index:
+                return
+            answered = message.get("answered", 0)
+            if answered > self.acknowledged_this_question:
+                self.stats.answers_acknowledged += answered - self.acknowledged_this_question
+                self.acknowledged_this_question = answered
+                self.last_answer_at = received_at
+                self._check_all_answered()
+        elif kind == "game_over":
+            self.game_over.set()
+        elif kind == "error":
+            self.stats.errors.append(message.get("message", ""))
+
+    def _check_all_answered(self):
+        answers = self.acknowledged_this_question + self.rejected_this_question
+        if answers >= len(self.players):
+            self.all_answered.set()
+
+    def on_player_frame(self, socket: AsgiWebSocket, frame, received_at: float):
+        message = self._decode(socket, frame)
+        if message.get("type") == "answer_rejected":
+            # Thought past the server's deadline; the answer will never be acknowledged
+            self.stats.answers_rejected += 1
+            self.rejected_this_question += 1
+            self._check_all_answered()
+        elif message.get("type") == "question":
+            self.stats.broadcast_latencies.append(received_at - self.question_sent_at)
+            think = self.rng.uniform(self.args.think_min, self.args.think_max)
+            asyncio.get_running_loop().call_later(
+                think, lambda: asyncio.ensure_future(self._answer(socket, message))
+            )
+
+    async def _answer(self, socket: AsgiWebSocket, question: dict):
+        if self.first_answer_at is None:
+            self.first_answer_at = time.perf_counter()
+        self.stats.answers_sent += 1
+        await self._send(
+            socket,
+            {
+                "action": "submit_answer",
+                "answer_index": self.rng.randrange(len(question["options"])),
+            },
+        )
+
+    async def join(self):
+        self.host = self._connect(f"/ws/host/{self.game_pin}", self.on_host_frame)
+        await self.host.connect()
+
+        async def join_player(index: int):
+            socket = self._connect(f"/ws/join/{self.game_pin}", self.on_player_frame)
+            await socket.connect()
+            nickname = f"player{index}"
+            if socket.accepted_subprotocol == codec.MSGPACK_SUBPROTOCOL:
+                # Binary clients open with a binary frame too
+                await socket.send_bytes(codec.Frame({"nickname": nickname}).packed)
+            else:
+                await socket.send_text(nickname)
+            self.players.append(socket)
+
+        await asyncio.gather(*(join_player(i) for i in range(self.args.players)))
+        await asyncio.wait_for(self.all_joined.wait(), self.args.timeout)
+
+    async def play(self):
+        for question in range(self.args.questions):
+            self.question_index = question
+            self.acknowledged_this_question = 0
+            self.rejected_this_question = 0
+            self.all_answered.clear()
+            self.first_answer_at = None
+            self.last_answer_at = None
+            self.question_sent_at = time.perf_counter()
+            action = "start_quiz" if question == 0 else "next_question"
+            await self._send(self.host, {"action": action})
+            try:
+                await asyncio.wait_for(
+                    self.all_answered.wait(), self.args.time_limit + self.args.timeout
+                )
+            except asyncio.TimeoutError:
+                self.stats.errors.append(
+                    f"game {self.game_pin} q{question}: "
+                    f"{self.acknowledged_this_question}/{len(self.players)} answers"
+                )
+            if self.first_answer_at and self.last_answer_at:
+                self.stats.answer_window += self.last_answer_at - self.first_answer_at
+
+        await self._send(self.host, {"action": "next_question"})
+        await asyncio.wait_for(self.game_over.wait(), self.args.timeout)
+
+    async def close(self):
+        for socket in self.players:
+            await socket.close()
+        if self.host:
+            await self.host.close()
+
+
+def make_questions(count: int, time_limit: int):
+    from app.models.question import Question
+
+    return [
+        Question(
+            question=f"Load test question {i + 1}?",
+            options=["A", "B", "C", "D"],
+            answer=i % 4,
+            correct_answer=i % 4,
+            time_limit=time_limit,
+        )
+        for i in range(count)
+    ]
+
+
+async def run(args) -> LoadStats:
+    install_fakes(args.mongo_latency_ms, args.redis_latency_ms)
+
+    from app.main import app
+    from app.services.game_service import get_game_service
+
+    game_service = get_game_service()
+    stats = LoadStats()
+    rng = random.Random(args.seed)
+
+    games = []
+    for _ in range(args.games):
+        game_pin = await game_service.create_game(
+            manual=True, questions_data=make_questions(args.questions, args.time_limit)
+        )
+        games.append(SimulatedGame(app, game_pin, args, stats, rng))
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    await asyncio.gather(*(game.join() for game in games))
+    stats.join_seconds = time.perf_counter() - started
+    stats.players_joined = sum(len(game.players) for game in games)
+    stats.memory_per_player = (
+        tracemalloc.get_traced_memory()[0] - baseline
+    ) / max(1, stats.players_joined)
+    tracemalloc.stop()
+
+    await asyncio.gather(*(game.play() for game in games))
+    await asyncio.gather(*(game.close() for game in games))
+    return stats
+
+
+def report(args, stats: LoadStats):
+    latencies_ms = [value * 1000 for value in stats.broadcast_latencies]
+    answers_per_second = (
+        stats.answers_acknowledged / stats.answer_window if stats.answer_window else 0.0
+    )
+    print(
+        f"games={args.games} players/game={args.players} questions={args.questions} "
+        f"codec={args.codec}"
+    )
+    print(
+        f"join:       {stats.players_joined} players in {stats.join_seconds:.2f}s "
+        f"({stats.players_joined / max(stats.join_seconds, 1e-9):.0f}/s)"
+    )
+    print(
+        f"broadcast:  p50={percentile(latencies_ms, 50):.1f}ms "
+        f"p99={percentile(latencies_ms, 99):.1f}ms "
+        f"max={max(latencies_ms, default=0):.1f}ms "
+        f"mean={statistics.fmean(latencies_ms) if latencies_ms else 0:.1f}ms"
+    )
+    print(
+        f"answers:    {stats.answers_acknowledged}/{stats.answers_sent} acknowledged, "
+        f"{stats.answers_rejected} too late, {answers_per_second:.0f}/s while answering"
+    )
+    print(
+        f"outbound:   {stats.frames_received} frames, {stats.bytes_received / 1024:.0f} KiB "
+        f"{dict(sorted(stats.frames_by_type.items()))}"
+    )
+    if stats.memory_per_player is not None:
+        print(
+            f"memory:     {stats.memory_per_player / 1024:.1f} KiB per player "
+            f"(includes the simulated client's buffers)"
+        )
+    for error in stats.errors[:10]:
+        print(f"error:      {error}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--games", type=int, default=1)
+    parser.add_argument("--players", type=int, default=100, help="players per game")
+    parser.add_argument("--questions", type=int, default=3)
+    parser.add_argument("--time-limit", type=int, default=20)
+    parser.add_argument("--think-min", type=float, default=0.5, help="seconds")
+    parser.add_argument("--think-max", type=float, default=3.0, help="seconds")
+    parser.add_argument("--mongo-latency-ms", type=float, default=1.0)
+    parser.add_argument("--redis-latency-ms", type=float, default=0.5)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--codec", choices=[codec.JSON, codec.MSGPACK], default=codec.JSON,
+        help="wire format the simulated clients ask for",
+    )
+    parser.add_argument("--verbose", action="store_true", help="keep app logs and prints")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.verbose:
+        stats = asyncio.run(run(args))
+    else:
+        logging.getLogger("app").setLevel(logging.CRITICAL)
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            stats = asyncio.run(run(args))
+    report(args, stats)
+
+
+if __name__ == "__main__":
+    main()
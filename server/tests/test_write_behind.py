@@ -0,0 +1,111 @@
+import asyncio
+
+from pymongo.errors import BulkWriteError
+
+from app.services.write_behind import WriteBehindManager
+from perf.fakes import FakeCollection
+
+GAME = {
+    "game_pin": "1234",
+    "game_status": "waiting",
+    "current_question_index": 0,
+    "player_answers": {},
+    "players": [],
+}
+
+
+class FlakyCollection(FakeCollection):
+    """
+    Fails the first `failures` bulk writes after applying the first `applied`
+    operations of each, like a connection lost part way through a batch
+    """
+
+    def __init__(self, failures: int = 1, applied: int = 0):
+        super().__init__()
+        self.failures = failures
+        self.applied = applied
+
+    async def bulk_write(self, operations: list, ordered: bool = True):
+        if self.failures:
+            self.failures -= 1
+            await super().bulk_write(operations[: self.applied], ordered=ordered)
+            raise ConnectionError("connection reset")
+        return await super().bulk_write(operations, ordered=ordered)
+
+
+class RejectingCollection(FakeCollection):
+    """Rejects operations that touch `field`, as MongoDB does with an invalid path"""
+
+    def __init__(self, field: str):
+        super().__init__()
+        self.field = field
+
+    async def bulk_write(self, operations: list, ordered: bool = True):
+        for index, operation in enumerate(operations):
+            if self.field in str(operation._doc):
+                await super().bulk_write(operations[:index], ordered=ordered)
+                raise BulkWriteError(
+                    {"writeErrors": [{"index": index, "code": 52, "errmsg": "bad path"}]}
+                )
+        return await super().bulk_write(operations, ordered=ordered)
+
+
+async def new_game(collection: FakeCollection) -> WriteBehindManager:
+    await collection.insert_one(dict(GAME, players=[]))
+    return WriteBehindManager(collection_getter=lambda: collection)
+
+
+def test_failed_flush_is_retried_with_newer_writes():
+    async def scenario():
+        collection = FlakyCollection(failures=1)
+        write_behind = await new_game(collection)
+        write_behind.push_player("1234", {"nickname": "ada", "score": 0})
+        write_behind.set_fields("1234", {"game_status": "in_progress"})
+        await write_behind.flush("1234")
+        assert "1234" in write_behind.retries
+
+        # Written after the failure: must land on top of the retried writes
+        write_behind.set_player_fields("1234", "ada", {"score": 900})
+        write_behind.set_fields("1234", {"current_question_index": 1})
+        await write_behind.flush("1234")
+        await write_behind.close()
+        return collection
+
+    game = asyncio.run(scenario()).docs[0]
+    assert game["game_status"] == "in_progress"
+    assert game["current_question_index"] == 1
+    assert game["players"] == [{"nickname": "ada", "score": 900}]
+
+
+def test_partly_applied_flush_is_retried_without_duplicates():
+    async def scenario():
+        # Each failed attempt gets the player pushes through before failing
+        collection = FlakyCollection(failures=5, applied=2)
+        write_behind = await new_game(collection)
+        write_behind.push_player("1234", {"nickname": "ada", "score": 0})
+        write_behind.push_player("1234", {"nickname": "bob", "score": 0})
+        write_behind.set_fields("1234", {"game_status": "in_progress"})
+        for _ in range(6):
+            await write_behind.flush("1234")
+        assert not write_behind.retries
+        return collection
+
+    game = asyncio.run(scenario()).docs[0]
+    assert [player["nickname"] for player in game["players"]] == ["ada", "bob"]
+    assert game["game_status"] == "in_progress"
+
+
+def test_rejected_operation_is_skipped_and_the_rest_written():
+    async def scenario():
+        collection = RejectingCollection("player_answers")
+        write_behind = await new_game(collection)
+        write_behind.push_player("1234", {"nickname": "ada", "score": 0})
+        write_behind.set_fields("1234", {"player_answers.0.ada": 1})
+        write_behind.set_player_fields("1234", "ada", {"score": 500})
+        await write_behind.flush("1234")
+        assert not write_behind.retries
+        return collection
+
+    game = asyncio.run(scenario()).docs[0]
+    assert game["players"] == [{"nickname": "ada", "score": 500}]
+    assert game["player_answers"] == {}